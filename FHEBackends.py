@@ -0,0 +1,87 @@
+import importlib
+import importlib.util
+from typing import Dict, List, Tuple, Type
+
+from FHEScheme import FHEScheme
+
+
+class FHEBackend:
+    """
+    Scheme registered by name, whose module is only imported when the scheme is first used.
+
+    Attributes:
+        name: Name of the backend.
+        module: Module defining the scheme.
+        class_name: Name of the scheme class in the module.
+        requires: Top-level packages the module needs, e.g. Sage, checked without importing them.
+    """
+
+    def __init__(self, name: str, module: str, class_name: str, requires: Tuple[str, ...] = ()):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.requires = requires
+
+    def available(self) -> bool:
+        """
+        Returns whether the packages the backend needs are installed, without importing them.
+        """
+        return all(importlib.util.find_spec(package) is not None for package in self.requires)
+
+    def load(self) -> Type[FHEScheme]:
+        """
+        Imports the module of the backend (once, the module being cached by Python) and returns its scheme class.
+        """
+        if not self.available():
+            raise ImportError(f"The {self.name} backend needs {', '.join(self.requires)}!")
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+
+_backends: Dict[str, FHEBackend] = dict()
+
+
+def register_backend(name: str, module: str, class_name: str, requires: Tuple[str, ...] = ()) -> None:
+    """
+    Registers a scheme under a name, without importing it.
+
+    :param name: name of the backend.
+    :param module: module defining the scheme.
+    :param class_name: name of the scheme class in the module.
+    :param requires: top-level packages the module needs.
+    """
+    _backends[name] = FHEBackend(name, module, class_name, requires)
+
+
+def backends() -> List[str]:
+    """
+    Returns the names of the registered backends.
+    """
+    return list(_backends)
+
+
+def available_backends() -> List[str]:
+    """
+    Returns the names of the registered backends whose dependencies are installed.
+    """
+    return [name for name, backend in _backends.items() if backend.available()]
+
+
+def backend_class(name: str) -> Type[FHEScheme]:
+    """
+    Returns the scheme class of a backend, importing its module (and its dependencies) on first use.
+    """
+    if name not in _backends:
+        raise ValueError(f"Unknown backend {name}, the backends are {', '.join(_backends)}!")
+    return _backends[name].load()
+
+
+def create_scheme(name: str) -> FHEScheme:
+    """
+    Creates a scheme of a backend, to be set up with keygen.
+    """
+    return backend_class(name)()
+
+
+register_backend("lwe", "LWE.LWE_GSW", "LWEGSW")
+register_backend("ntt-rlwe", "RLWE.NTT_RLWE_GSW", "NTTRLWEGSW")
+register_backend("rlwe", "RLWE.RLWE_GSW", "RLWEGSW", requires=("sage",))
@@ -1,45 +1,64 @@
-from typing import TypeVar, Generic, List, Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TypeVar, Generic, List, Callable, Optional, Dict, Tuple
 from FHEBinaryGate import FHEBinaryGate
+from FHECircuitDAG import GATE_NAMES, MUL_OPCODES
+from FHECompiledCircuit import FHECompiledCircuit, InstructionType
+from FHEProfiler import FHEProfiler, MUL_CATEGORY
 from FHEGates.ANDGate import ANDGate
 from FHEGates.NANDGate import NANDGate
 from FHEGates.NOTGate import NOTGate
 from FHEGates.ORGate import ORGate
 from FHEGates.XORGate import XORGate
 from FHEGates.WireGate import WireGate
+from FHEGates.ConstantGate import ConstantGate
 
 CypheredTextType = TypeVar('CypheredTextType')
 
+# Largest number of gates evaluated in a single stacked operation, bounding the memory of the stacks
+MAX_BATCH_SIZE = 64
+
 
 class FHEBinaryCircuit(Generic[CypheredTextType]):
     """
     Represents a Fully Homomorphic Encryption (FHE) binary circuit.
 
     This class allows the construction and evaluation of a binary circuit using FHE gates.
-    The gates supported include AND, OR, XOR, NOT, and a special Wire gate.
+    The gates supported include AND, OR, XOR, NOT, a special Wire gate and the constants ZERO and ONE.
 
     Attributes:
         depths: A list containing the gates organized by depth.
         gates: A dictionary containing instances of supported FHE gates.
+        opcode_gates: The gate instances indexed by their compiled opcode.
+        stack: Function stacking cyphered texts into a batch, or None if gates are evaluated one by one.
+        profiler: Optional profiler recording the gates and multiplications, None (the default) to disable it.
 
     Methods:
         __init__: Initializes the FHEBinaryCircuit with a given FHE one value and multiplication function.
         add_depth: Adds a depth to the circuit with specified gates.
         evaluate: Evaluates the circuit for the given inputs.
+        evaluate_compiled: Evaluates a compiled circuit for the given inputs.
 
     Note:
         Gates are added to the circuit by providing their names in a depth configuration.
-        The supported gate names are 'nand', 'and', 'or', 'xor', 'not', and 'wire'.
+        The supported gate names are 'nand', 'and', 'or', 'xor', 'not', 'wire', 'zero' and 'one'.
     """
 
-    def __init__(self, one: CypheredTextType, mul: Callable[[CypheredTextType, CypheredTextType], CypheredTextType]):
+    def __init__(self, one: CypheredTextType, mul: Callable[[CypheredTextType, CypheredTextType], CypheredTextType],
+                 stack: Optional[Callable[[List[CypheredTextType]], CypheredTextType]] = None):
         """
         Initializes a new instance of FHEBinaryCircuit.
 
         :param one: FHE representation of the constant '1'.
         :param mul: Multiplication function for FHE operations.
+        :param stack: Optional function stacking cyphered texts along a new leading axis. When given, mul and the
+                      gates must accept such stacks, and the multiplication gates of a compiled level are evaluated
+                      by kind in batches, indexing the result gives back the cyphered text of each gate.
         """
         self.depths: List[List[FHEBinaryGate[CypheredTextType]]] = []
         self.gates = dict()
+        self.profiler: Optional[FHEProfiler] = None
+        mul = partial(self._mul, mul)
 
         nand_gate = NANDGate[CypheredTextType](one, mul)
         self.gates["nand"] = nand_gate
@@ -48,6 +67,10 @@ class FHEBinaryCircuit(Generic[CypheredTextType]):
         self.gates["xor"] = XORGate[CypheredTextType]()
         self.gates["not"] = NOTGate[CypheredTextType](one)
         self.gates["wire"] = WireGate[CypheredTextType]()
+        self.gates["zero"] = ConstantGate[CypheredTextType](one - one)
+        self.gates["one"] = ConstantGate[CypheredTextType](one)
+        self.opcode_gates = [self.gates[name] for name in GATE_NAMES]
+        self.stack = stack
 
     def add_depth(self, str_depth: List[str]) -> None:
         """
@@ -83,11 +106,117 @@ class FHEBinaryCircuit(Generic[CypheredTextType]):
             raise ValueError("The amount of inputs does not match the circuit inputs")
 
         result = inputs
-        for depth in self.depths:
-            result = evaluate_depth(depth, result)
+        for depth_index, depth in enumerate(self.depths):
+            result = evaluate_depth(depth, result, self.profiler, depth_index)
 
         return result
 
+    def evaluate_compiled(self, compiled: FHECompiledCircuit, inputs: List[CypheredTextType],
+                          workers: int = 1) -> List[CypheredTextType]:
+        """
+        Evaluates a compiled circuit for the given inputs with the gates of this circuit, ignoring its own depths.
+        Each gate is evaluated once, and intermediate values are dropped as soon as no gate reads them anymore.
+
+        The gates of a level are independent: when the circuit has a stack function, the multiplication gates of a
+        level are evaluated by kind in stacked batches, and with more than one worker the gates (or batches) are
+        dispatched to a thread pool, the NumPy operations of the gates releasing the GIL.
+
+        :param compiled: A compiled circuit (see FHECompiledCircuit.compile_circuit).
+        :param inputs: A list of FHE-encoded inputs for the circuit.
+        :param workers: Number of threads evaluating the gates of a level concurrently.
+        :return: A list of FHE-encoded outputs after circuit evaluation.
+        """
+        if compiled.inputs != len(inputs):
+            raise ValueError("The amount of inputs does not match the circuit inputs")
+        if workers < 1:
+            raise ValueError("The number of workers must be positive!")
+
+        if workers == 1:
+            return self._evaluate_levels(compiled, inputs, None)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return self._evaluate_levels(compiled, inputs, executor)
+
+    def _evaluate_levels(self, compiled: FHECompiledCircuit, inputs: List[CypheredTextType],
+                         executor: Optional[ThreadPoolExecutor]) -> List[CypheredTextType]:
+        """
+        Evaluates the levels of a compiled circuit one after the other.
+
+        :param compiled: A compiled circuit.
+        :param inputs: A list of FHE-encoded inputs for the circuit.
+        :param executor: Thread pool evaluating the gates of a level, or None to evaluate them in order.
+        :return: A list of FHE-encoded outputs after circuit evaluation.
+        """
+        slots = list(inputs) + [None] * (compiled.slots - compiled.inputs)
+        for depth, (level, release) in enumerate(zip(compiled.levels, compiled.releases)):
+            tasks = self._level_tasks(level, slots, depth)
+            if executor is None or len(tasks) == 1:
+                results = [task() for _, task in tasks]
+            else:
+                results = [future.result() for future in [executor.submit(task) for _, task in tasks]]
+            for (output_slots, _), result in zip(tasks, results):
+                for i, output_slot in enumerate(output_slots):
+                    slots[output_slot] = result[i]
+            for slot in release:
+                slots[slot] = None
+
+        return [slots[slot] for slot in compiled.output_slots]
+
+    def _level_tasks(self, level: Tuple[InstructionType, ...], slots: List[CypheredTextType], depth: int) -> List[
+            Tuple[List[int], Callable[[], CypheredTextType]]]:
+        """
+        Splits the instructions of a level into tasks. Without a stack function each gate is a task; otherwise the
+        multiplication gates of the same kind are grouped into batches of at most MAX_BATCH_SIZE gates.
+
+        :param level: Instructions of the level.
+        :param slots: Values of the slots, the inputs of the level being set.
+        :param depth: Index of the level, recorded by the profiler.
+        :return: For each task, its output slots and a function evaluating it, whose result is indexed by the
+                 position of the output slot.
+        """
+        tasks = []
+        batches: Dict[int, List[InstructionType]] = dict()
+        for instruction in level:
+            opcode, input_slots, output_slot = instruction
+            if self.stack is not None and opcode in MUL_OPCODES:
+                batches.setdefault(opcode, []).append(instruction)
+            else:
+                tasks.append(([output_slot], self._gate_task(opcode, [slots[slot] for slot in input_slots], depth)))
+
+        for opcode, instructions in batches.items():
+            for start in range(0, len(instructions), MAX_BATCH_SIZE):
+                batch = instructions[start:start + MAX_BATCH_SIZE]
+                if len(batch) == 1:
+                    _, input_slots, output_slot = batch[0]
+                    tasks.append(([output_slot], self._gate_task(opcode, [slots[slot] for slot in input_slots], depth)))
+                    continue
+                stacked_inputs = [self.stack([slots[input_slots[i]] for _, input_slots, _ in batch])
+                                  for i in range(len(batch[0][1]))]
+                task = partial(self.opcode_gates[opcode].evaluate, stacked_inputs)
+                if self.profiler is not None:
+                    task = partial(self.profiler.gate, GATE_NAMES[opcode], depth, len(batch), task)
+                tasks.append(([output_slot for _, _, output_slot in batch], task))
+
+        return tasks
+
+    def _gate_task(self, opcode: int, inputs: List[CypheredTextType],
+                   depth: int) -> Callable[[], List[CypheredTextType]]:
+        """
+        Wraps the evaluation of a single gate into a task returning a batch of one cyphered text.
+        """
+        gate = self.opcode_gates[opcode]
+        if self.profiler is not None:
+            return partial(self.profiler.gate, GATE_NAMES[opcode], depth, 1, lambda: [gate.evaluate(inputs)])
+        return lambda: [gate.evaluate(inputs)]
+
+    def _mul(self, mul: Callable[[CypheredTextType, CypheredTextType], CypheredTextType], ct1: CypheredTextType,
+             ct2: CypheredTextType) -> CypheredTextType:
+        """
+        Multiplication given to the gates, recorded when a profiler is set.
+        """
+        if self.profiler is None:
+            return mul(ct1, ct2)
+        return self.profiler.call("mul", mul, ct1, ct2, category=MUL_CATEGORY)
+
     def _get_gate(self, name: str) -> FHEBinaryGate[CypheredTextType]:
         """
         Gets the FHE gate instance corresponding to the given gate name.
@@ -118,19 +247,28 @@ def inputs_amount(depth: List[FHEBinaryGate[CypheredTextType]]) -> int:
     return inputs_nb
 
 
-def evaluate_depth(depth: List[FHEBinaryGate[CypheredTextType]], inputs: List[CypheredTextType]) -> List[CypheredTextType]:
+def evaluate_depth(depth: List[FHEBinaryGate[CypheredTextType]], inputs: List[CypheredTextType],
+                   profiler: Optional[FHEProfiler] = None, depth_index: int = 0) -> List[CypheredTextType]:
     """
     Evaluates a depth in the FHE binary circuit.
 
     :param depth: A list of FHE gates representing a depth in the circuit.
     :param inputs: A list of FHE-encoded inputs for the circuit.
+    :param profiler: Optional profiler recording each gate.
+    :param depth_index: Index of the depth in the circuit, recorded by the profiler.
     :return: A list of FHE-encoded outputs after evaluating the given depth.
     """
     inputs_index = 0
     result = []
 
     for gate in depth:
-        result.append(gate.evaluate(inputs[inputs_index:inputs_index + gate.inputs()]))
+        gate_inputs = inputs[inputs_index:inputs_index + gate.inputs()]
+        if profiler is None:
+            result.append(gate.evaluate(gate_inputs))
+        else:
+            # The gate classes are named after their gate, e.g. ANDGate
+            result.append(profiler.gate(type(gate).__name__[:-len("Gate")].lower(), depth_index, 1,
+                                        partial(gate.evaluate, gate_inputs)))
         inputs_index += gate.inputs()
 
     return result
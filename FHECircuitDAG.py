@@ -0,0 +1,224 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+# Gate opcodes are the indexes of the gate names in this tuple, 'zero' and 'one' being constant gates without input
+GATE_NAMES = ("nand", "and", "or", "xor", "not", "wire", "zero", "one")
+GATE_INPUTS = (2, 2, 2, 2, 1, 1, 0, 0)
+NAND_OPCODE, AND_OPCODE, OR_OPCODE, XOR_OPCODE, NOT_OPCODE, WIRE_OPCODE, ZERO_OPCODE, ONE_OPCODE = range(8)
+# Gates evaluated with one multiplication of cyphered texts
+MUL_OPCODES = (NAND_OPCODE, AND_OPCODE, OR_OPCODE)
+
+WireType = Union[int, str]
+NodeType = Tuple[int, Tuple[int, ...]]
+NetlistKeyType = Tuple[int, Tuple[NodeType, ...], Tuple[int, ...]]
+
+
+class FHECircuitDAG:
+    """
+    Netlist representation of a binary circuit, where gates reference the wires they read.
+
+    Wires are numbered in creation order: the circuit inputs and the output of each gate are wires, and a wire can be
+    read by any number of gates (fan-out) while being computed only once. Wires can also be given names, and gates can
+    reference wires by index or by name. Since gates can only read existing wires, the gates are stored in a
+    topological order.
+
+    Attributes:
+        wires: For each wire, None for a circuit input, or the (opcode, input wires) of the gate computing it.
+        input_wires: Wires of the circuit inputs, in input order.
+        output_wires: Wires of the circuit outputs, in output order.
+        names: Wire indexes by name.
+
+    Methods:
+        add_input: Adds a circuit input.
+        add_gate: Adds a gate reading existing wires.
+        add_constant: Adds a constant wire.
+        set_outputs: Sets the circuit outputs.
+        from_depths: Translates the depth-list format into a netlist.
+        key: Returns a hashable key of the netlist structure.
+    """
+
+    def __init__(self, inputs: Union[int, List[str]] = 0):
+        """
+        Initializes a new netlist.
+
+        :param inputs: number of inputs, or names of the inputs, to create.
+        """
+        self.wires: List[Optional[NodeType]] = []
+        self.input_wires: List[int] = []
+        self.output_wires: List[int] = []
+        self.names: Dict[str, int] = dict()
+
+        if isinstance(inputs, int):
+            for _ in range(inputs):
+                self.add_input()
+        else:
+            for name in inputs:
+                self.add_input(name)
+
+    def add_input(self, name: Optional[str] = None) -> int:
+        """
+        Adds a circuit input.
+
+        :param name: optional name of the input wire.
+        :return: the index of the input wire.
+        """
+        wire = self._new_wire(None, name)
+        self.input_wires.append(wire)
+        return wire
+
+    def add_gate(self, gate: str, *inputs: WireType, name: Optional[str] = None) -> int:
+        """
+        Adds a gate reading existing wires. A 'wire' gate does not compute anything and returns its input wire.
+
+        :param gate: name of the gate: AND, NAND, OR, XOR, NOT, WIRE, ZERO or ONE.
+        :param inputs: indexes or names of the wires read by the gate.
+        :param name: optional name of the output wire.
+        :return: the index of the output wire.
+        """
+        opcode = gate_opcode(gate)
+        if len(inputs) != GATE_INPUTS[opcode]:
+            raise ValueError(f"Gate {gate} takes {GATE_INPUTS[opcode]} inputs ({len(inputs)} given)!")
+
+        input_wires = tuple(self.wire(wire) for wire in inputs)
+
+        if opcode == WIRE_OPCODE:
+            if name is not None:
+                self._set_name(name, input_wires[0])
+            return input_wires[0]
+
+        return self._new_wire((opcode, input_wires), name)
+
+    def add_constant(self, value: bool, name: Optional[str] = None) -> int:
+        """
+        Adds a constant wire.
+
+        :param value: the constant bit.
+        :param name: optional name of the wire.
+        :return: the index of the constant wire.
+        """
+        return self.add_gate("one" if value else "zero", name=name)
+
+    def set_outputs(self, outputs: List[WireType]) -> None:
+        """
+        Sets the circuit outputs.
+
+        :param outputs: indexes or names of the output wires, in output order.
+        """
+        self.output_wires = [self.wire(wire) for wire in outputs]
+
+    def wire(self, wire: WireType) -> int:
+        """
+        Resolves a wire reference.
+
+        :param wire: index or name of a wire.
+        :return: the index of the wire.
+        """
+        if isinstance(wire, str):
+            if wire not in self.names:
+                raise ValueError(f"Unknown wire {wire}!")
+            return self.names[wire]
+
+        if not 0 <= wire < len(self.wires):
+            raise ValueError(f"Unknown wire {wire}!")
+        return wire
+
+    def gates(self) -> int:
+        """
+        Returns the number of gates of the netlist.
+        """
+        return len(self.wires) - len(self.input_wires)
+
+    def key(self) -> NetlistKeyType:
+        """
+        Returns a hashable key of the netlist structure, wires being renumbered with the inputs first.
+
+        :return: the number of inputs, the (opcode, input wires) of each gate and the output wires.
+        """
+        renumbering = {wire: i for i, wire in enumerate(self.input_wires)}
+        nodes = []
+        for wire, node in enumerate(self.wires):
+            if node is not None:
+                renumbering[wire] = len(renumbering)
+                nodes.append((node[0], tuple(renumbering[i] for i in node[1])))
+
+        return len(self.input_wires), tuple(nodes), tuple(renumbering[wire] for wire in self.output_wires)
+
+    @classmethod
+    def from_key(cls, key: NetlistKeyType) -> 'FHECircuitDAG':
+        """
+        Builds a netlist from its key.
+
+        :param key: key returned by FHECircuitDAG.key.
+        :return: a netlist with the given structure.
+        """
+        inputs, nodes, outputs = key
+        dag = cls(inputs)
+        for opcode, input_wires in nodes:
+            dag._new_wire((opcode, input_wires), None)
+        dag.set_outputs(list(outputs))
+        return dag
+
+    @classmethod
+    def from_depths(cls, binary_circuit: List[List[str]]) -> 'FHECircuitDAG':
+        """
+        Translates a circuit in the depth-list format into a netlist: each depth consumes the outputs of the previous
+        depth positionally, and wire gates become plain references to their input.
+
+        :param binary_circuit: list of circuit depths where each depth consists of gate names.
+        :return: the equivalent netlist.
+        """
+        if len(binary_circuit) == 0:
+            raise ValueError("Cannot evaluate an empty circuit!")
+
+        opcodes = [[gate_opcode(name) for name in depth] for depth in binary_circuit]
+        dag = cls(sum(GATE_INPUTS[opcode] for opcode in opcodes[0]))
+
+        current = list(dag.input_wires)
+        for depth in opcodes:
+            # Outputs of the previous depth are equal to its number of gates
+            if sum(GATE_INPUTS[opcode] for opcode in depth) != len(current):
+                raise ValueError("Could not parse circuit: depths are not compatible!")
+
+            outputs = []
+            start = 0
+            for opcode in depth:
+                stop = start + GATE_INPUTS[opcode]
+                outputs.append(dag.add_gate(GATE_NAMES[opcode], *current[start:stop]))
+                start = stop
+            current = outputs
+
+        dag.set_outputs(current)
+        return dag
+
+    def _new_wire(self, node: Optional[NodeType], name: Optional[str]) -> int:
+        """
+        Appends a wire computed by the given node.
+        """
+        self.wires.append(node)
+        wire = len(self.wires) - 1
+        if name is not None:
+            self._set_name(name, wire)
+        return wire
+
+    def _set_name(self, name: str, wire: int) -> None:
+        """
+        Names a wire.
+        """
+        if name in self.names:
+            raise ValueError(f"Wire {name} is already defined!")
+        self.names[name] = wire
+
+    def __repr__(self):
+        return f"FHECircuitDAG(inputs={len(self.input_wires)}, gates={self.gates()}, outputs={len(self.output_wires)})"
+
+
+def gate_opcode(name: str) -> int:
+    """
+    Gets the opcode of a gate from its name.
+
+    :param name: The name of the gate, case insensitive.
+    :return: The index of the gate in GATE_NAMES.
+    """
+    raw_name = name.lower()
+    if raw_name not in GATE_NAMES:
+        raise ValueError("Could not recognize gate {}!".format(name))
+    return GATE_NAMES.index(raw_name)
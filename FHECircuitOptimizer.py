@@ -0,0 +1,350 @@
+import heapq
+from typing import Dict, List, Optional, Tuple, Union
+
+from FHECircuitDAG import FHECircuitDAG, NetlistKeyType, NAND_OPCODE, AND_OPCODE, OR_OPCODE, XOR_OPCODE, \
+    NOT_OPCODE, ZERO_OPCODE, ONE_OPCODE, MUL_OPCODES
+
+# Associative and commutative gates whose chains can be rebalanced
+CHAIN_OPCODES = (AND_OPCODE, OR_OPCODE, XOR_OPCODE)
+COMMUTATIVE_OPCODES = (NAND_OPCODE, AND_OPCODE, OR_OPCODE, XOR_OPCODE)
+
+
+class OptimizationReport:
+    """
+    Statistics of a circuit before and after optimization.
+
+    Attributes:
+        gates_before: Number of gates of the original circuit.
+        gates_after: Number of gates of the optimized circuit.
+        muls_before: Number of multiplications (AND, NAND and OR gates) of the original circuit.
+        muls_after: Number of multiplications of the optimized circuit.
+        mul_depth_before: Multiplicative depth of the original circuit.
+        mul_depth_after: Multiplicative depth of the optimized circuit.
+    """
+
+    def __init__(self, before: NetlistKeyType, after: NetlistKeyType):
+        """
+        :param before: key of the original netlist.
+        :param after: key of the optimized netlist.
+        """
+        self.gates_before = len(before[1])
+        self.gates_after = len(after[1])
+        self.muls_before = mul_count(before)
+        self.muls_after = mul_count(after)
+        self.mul_depth_before = mul_depth(before)
+        self.mul_depth_after = mul_depth(after)
+
+    def __repr__(self):
+        return f"OptimizationReport(gates: {self.gates_before} -> {self.gates_after}, " \
+               f"muls: {self.muls_before} -> {self.muls_after}, " \
+               f"mul depth: {self.mul_depth_before} -> {self.mul_depth_after})"
+
+
+def optimize_circuit(binary_circuit: Union[List[List[str]], FHECircuitDAG]) -> Tuple[FHECircuitDAG,
+                                                                                        OptimizationReport]:
+    """
+    Optimizes a circuit to minimize its number of multiplications and its multiplicative depth.
+
+    The passes are, in order: constant folding and common subexpression elimination, dead gate elimination,
+    rebalancing of AND, OR and XOR chains into trees, lowering of NAND into NOT AND and of OR into a XOR b XOR ab so
+    that gates on the same operands share their product (followed by another folding and elimination), and finally
+    fusion of the products which are not shared back into NAND and OR gates.
+
+    :param binary_circuit: list of circuit depths where each depth consists of gate names, or a netlist.
+    :return: the optimized netlist and a report of the gate and multiplication counts before and after.
+    """
+    dag = binary_circuit if isinstance(binary_circuit, FHECircuitDAG) else FHECircuitDAG.from_depths(binary_circuit)
+    key = dag.key()
+    optimized = optimize_netlist(key)
+    return FHECircuitDAG.from_key(optimized), OptimizationReport(key, optimized)
+
+
+def optimize_netlist(key: NetlistKeyType) -> NetlistKeyType:
+    """
+    Applies the optimization pipeline of optimize_circuit on a netlist key.
+
+    :param key: key of the netlist to optimize.
+    :return: key of the optimized netlist.
+    """
+    key = eliminate_dead_gates(simplify(key, lower=False))
+    key = rebalance(key)
+    key = eliminate_dead_gates(simplify(key, lower=True))
+    return eliminate_dead_gates(fuse(key))
+
+
+class _NetlistBuilder:
+    """
+    Builds a netlist gate by gate, folding constants, applying algebraic identities and reusing identical gates.
+    """
+
+    def __init__(self, inputs: int, lower: bool):
+        """
+        :param inputs: number of inputs of the netlist.
+        :param lower: whether NAND and OR gates are rewritten with AND, XOR and NOT gates.
+        """
+        self.dag = FHECircuitDAG(inputs)
+        self.lower = lower
+        self.gates: Dict[Tuple[int, Tuple[int, ...]], int] = dict()
+
+    def node(self, wire: int) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        return self.dag.wires[wire]
+
+    def constant(self, wire: int) -> Optional[bool]:
+        """
+        Returns the value of a constant wire, or None.
+        """
+        node = self.node(wire)
+        if node is None or node[0] not in (ZERO_OPCODE, ONE_OPCODE):
+            return None
+        return node[0] == ONE_OPCODE
+
+    def negation_of(self, wire: int) -> Optional[int]:
+        """
+        Returns the wire negated by a NOT wire, or None.
+        """
+        node = self.node(wire)
+        return node[1][0] if node is not None and node[0] == NOT_OPCODE else None
+
+    def complementary(self, a: int, b: int) -> bool:
+        return self.negation_of(a) == b or self.negation_of(b) == a
+
+    def emit(self, opcode: int, inputs: Tuple[int, ...]) -> int:
+        """
+        Adds a gate, or returns the identical gate already built.
+        """
+        if opcode in COMMUTATIVE_OPCODES:
+            inputs = tuple(sorted(inputs))
+        gate = (opcode, inputs)
+        if gate not in self.gates:
+            self.gates[gate] = self.dag._new_wire(gate, None)
+        return self.gates[gate]
+
+    def gate(self, opcode: int, inputs: Tuple[int, ...]) -> int:
+        """
+        Adds a gate after simplification.
+
+        :param opcode: opcode of the gate.
+        :param inputs: wires of the built netlist read by the gate.
+        :return: the wire holding the value of the gate.
+        """
+        if opcode in (ZERO_OPCODE, ONE_OPCODE):
+            return self.emit(opcode, ())
+
+        if opcode == NOT_OPCODE:
+            value = self.constant(inputs[0])
+            if value is not None:
+                return self.emit(ZERO_OPCODE if value else ONE_OPCODE, ())
+            negated = self.negation_of(inputs[0])
+            return negated if negated is not None else self.emit(NOT_OPCODE, inputs)
+
+        a, b = inputs
+        values = [self.constant(a), self.constant(b)]
+        if values[0] is not None and values[1] is None:
+            a, b = b, a
+            values.reverse()
+
+        if opcode == AND_OPCODE:
+            if values[1] is not None:
+                return a if values[1] else b
+            if a == b:
+                return a
+            if self.complementary(a, b):
+                return self.emit(ZERO_OPCODE, ())
+            return self.emit(AND_OPCODE, (a, b))
+
+        if opcode == NAND_OPCODE:
+            if self.lower or values[1] is not None or a == b or self.complementary(a, b):
+                return self.gate(NOT_OPCODE, (self.gate(AND_OPCODE, (a, b)),))
+            return self.emit(NAND_OPCODE, (a, b))
+
+        if opcode == OR_OPCODE:
+            if values[1] is not None:
+                return b if values[1] else a
+            if a == b:
+                return a
+            if self.complementary(a, b):
+                return self.emit(ONE_OPCODE, ())
+            if self.lower:
+                return self.gate(XOR_OPCODE, (self.gate(XOR_OPCODE, (a, b)), self.gate(AND_OPCODE, (a, b))))
+            return self.emit(OR_OPCODE, (a, b))
+
+        if opcode == XOR_OPCODE:
+            if values[1] is not None:
+                if values[0] is not None:
+                    return self.emit(ONE_OPCODE if values[0] != values[1] else ZERO_OPCODE, ())
+                return self.gate(NOT_OPCODE, (a,)) if values[1] else a
+            if a == b:
+                return self.emit(ZERO_OPCODE, ())
+            if self.complementary(a, b):
+                return self.emit(ONE_OPCODE, ())
+            return self.emit(XOR_OPCODE, (a, b))
+
+        raise ValueError(f"Unsupported opcode {opcode}!")
+
+    def key(self, outputs: List[int]) -> NetlistKeyType:
+        self.dag.set_outputs(outputs)
+        return self.dag.key()
+
+
+def simplify(key: NetlistKeyType, lower: bool) -> NetlistKeyType:
+    """
+    Constant folding, algebraic simplification and common subexpression elimination pass.
+
+    :param key: key of the netlist to simplify.
+    :param lower: whether NAND and OR gates are rewritten with AND, XOR and NOT gates.
+    :return: key of the simplified netlist.
+    """
+    inputs, nodes, outputs = key
+    builder = _NetlistBuilder(inputs, lower)
+    mapping = list(range(inputs))
+    for opcode, input_wires in nodes:
+        mapping.append(builder.gate(opcode, tuple(mapping[wire] for wire in input_wires)))
+    return builder.key([mapping[wire] for wire in outputs])
+
+
+def eliminate_dead_gates(key: NetlistKeyType) -> NetlistKeyType:
+    """
+    Removes the gates whose value does not reach any output.
+
+    :param key: key of the netlist.
+    :return: key of the netlist without dead gates.
+    """
+    inputs, nodes, outputs = key
+    alive = [False] * (inputs + len(nodes))
+    for wire in outputs:
+        alive[wire] = True
+    for i in reversed(range(len(nodes))):
+        if alive[inputs + i]:
+            for wire in nodes[i][1]:
+                alive[wire] = True
+
+    mapping = list(range(inputs))
+    kept = []
+    for i, (opcode, input_wires) in enumerate(nodes):
+        mapping.append(inputs + len(kept) if alive[inputs + i] else -1)
+        if alive[inputs + i]:
+            kept.append((opcode, tuple(mapping[wire] for wire in input_wires)))
+    return inputs, tuple(kept), tuple(mapping[wire] for wire in outputs)
+
+
+def rebalance(key: NetlistKeyType) -> NetlistKeyType:
+    """
+    Rewrites chains of AND, OR or XOR gates into trees of minimal multiplicative depth.
+
+    A gate belongs to the chain of its reader when it is read only once, by a gate of the same kind, and is not an
+    output. The operands of a whole chain are then combined two by two, shallowest first.
+
+    :param key: key of the netlist.
+    :return: key of the rebalanced netlist.
+    """
+    inputs, nodes, outputs = key
+    readers: List[List[int]] = [[] for _ in range(inputs + len(nodes))]
+    for i, (_, input_wires) in enumerate(nodes):
+        for wire in input_wires:
+            readers[wire].append(inputs + i)
+    for wire in outputs:
+        readers[wire].append(-1)
+
+    def opcode_of(wire: int) -> Optional[int]:
+        return nodes[wire - inputs][0] if wire >= inputs else None
+
+    def absorbed(wire: int) -> bool:
+        return opcode_of(wire) in CHAIN_OPCODES and len(readers[wire]) == 1 and readers[wire][0] >= 0 \
+            and opcode_of(readers[wire][0]) == opcode_of(wire)
+
+    def operands(wire: int) -> List[int]:
+        result = []
+        for operand in nodes[wire - inputs][1]:
+            result.extend(operands(operand) if absorbed(operand) else [operand])
+        return result
+
+    dag = FHECircuitDAG(inputs)
+    mapping = list(range(inputs))
+    depths = [0] * inputs
+    for i, (opcode, input_wires) in enumerate(nodes):
+        wire = inputs + i
+        if absorbed(wire):
+            mapping.append(-1)
+            continue
+
+        if opcode not in CHAIN_OPCODES:
+            mapped = tuple(mapping[operand] for operand in input_wires)
+            depth = max((depths[operand] for operand in mapped), default=0) + (opcode in MUL_OPCODES)
+            new_wire = dag._new_wire((opcode, mapped), None)
+        else:
+            heap = [(depths[mapping[operand]], order, mapping[operand])
+                    for order, operand in enumerate(operands(wire))]
+            heapq.heapify(heap)
+            order = len(heap)
+            while len(heap) > 1:
+                depth_a, _, a = heapq.heappop(heap)
+                depth_b, _, b = heapq.heappop(heap)
+                depth = max(depth_a, depth_b) + (opcode in MUL_OPCODES)
+                new_wire = dag._new_wire((opcode, (a, b)), None)
+                depths.extend([0] * (new_wire + 1 - len(depths)))
+                depths[new_wire] = depth
+                heapq.heappush(heap, (depth, order, new_wire))
+                order += 1
+            depth, _, new_wire = heap[0]
+
+        depths.extend([0] * (new_wire + 1 - len(depths)))
+        depths[new_wire] = depth
+        mapping.append(new_wire)
+
+    dag.set_outputs([mapping[wire] for wire in outputs])
+    return dag.key()
+
+
+def fuse(key: NetlistKeyType) -> NetlistKeyType:
+    """
+    Fuses back the products which are not shared: NOT(AND(a, b)) into NAND(a, b), and XOR(XOR(a, b), AND(a, b)) into
+    OR(a, b), when the inner gates are not read by any other gate.
+
+    :param key: key of the netlist.
+    :return: key of the fused netlist.
+    """
+    inputs, nodes, outputs = key
+    reads = [0] * (inputs + len(nodes))
+    for _, input_wires in nodes:
+        for wire in input_wires:
+            reads[wire] += 1
+    for wire in outputs:
+        reads[wire] += 1
+
+    def node(wire: int) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        return nodes[wire - inputs] if wire >= inputs else None
+
+    def single_read(wire: int, opcode: int) -> bool:
+        return wire >= inputs and node(wire)[0] == opcode and reads[wire] == 1
+
+    fused = list(nodes)
+    for i, (opcode, input_wires) in enumerate(nodes):
+        if opcode == NOT_OPCODE and single_read(input_wires[0], AND_OPCODE):
+            fused[i] = (NAND_OPCODE, node(input_wires[0])[1])
+        elif opcode == XOR_OPCODE:
+            for sum_wire, product_wire in (input_wires, input_wires[::-1]):
+                if single_read(sum_wire, XOR_OPCODE) and single_read(product_wire, AND_OPCODE) \
+                        and sorted(node(sum_wire)[1]) == sorted(node(product_wire)[1]):
+                    fused[i] = (OR_OPCODE, node(product_wire)[1])
+                    break
+
+    return inputs, tuple(fused), outputs
+
+
+def mul_count(key: NetlistKeyType) -> int:
+    """
+    Counts the multiplications of cyphered texts (AND, NAND and OR gates) of a netlist.
+    """
+    return sum(1 for opcode, _ in key[1] if opcode in MUL_OPCODES)
+
+
+def mul_depth(key: NetlistKeyType) -> int:
+    """
+    Computes the multiplicative depth of a netlist: the highest number of multiplications on a path from an input to
+    an output.
+    """
+    inputs, nodes, outputs = key
+    depths = [0] * inputs
+    for opcode, input_wires in nodes:
+        depths.append(max((depths[wire] for wire in input_wires), default=0) + (opcode in MUL_OPCODES))
+    return max((depths[wire] for wire in outputs), default=0)
@@ -0,0 +1,153 @@
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+from FHECircuitDAG import FHECircuitDAG, GATE_NAMES, GATE_INPUTS, NetlistKeyType
+from FHECircuitOptimizer import optimize_netlist
+
+COMPILE_CACHE_SIZE = 128
+
+CircuitKeyType = Tuple[Tuple[str, ...], ...]
+InstructionType = Tuple[int, Tuple[int, ...], int]
+
+
+class FHECompiledCircuit:
+    """
+    Validated executable plan of a binary circuit.
+
+    Values are stored in slots: the circuit inputs are slots 0 to inputs - 1, and each instruction
+    (opcode, input slots, output slot) evaluates the gate with the given opcode on the input slots. Instructions are
+    grouped in levels, the instructions of a level only reading slots written by previous levels, and every gate being
+    evaluated exactly once. Compiled circuits are immutable and can be reused for any scheme and any number of
+    evaluations.
+
+    Attributes:
+        key: Normalized structure of the netlist the circuit was compiled from.
+        levels: Instructions of each level.
+        releases: For each level, the slots which are not read anymore once the level is evaluated.
+        inputs: Number of inputs of the circuit.
+        output_slots: Slots holding the outputs of the circuit, in output order.
+        outputs: Number of outputs of the circuit.
+        slots: Number of slots needed to evaluate the circuit.
+    """
+
+    def __init__(self, key: NetlistKeyType, levels: Tuple[Tuple[InstructionType, ...], ...],
+                 releases: Tuple[Tuple[int, ...], ...], inputs: int, output_slots: Tuple[int, ...], slots: int):
+        """
+        :param key: normalized structure of the netlist.
+        :param levels: instructions of each level.
+        :param releases: slots released after each level.
+        :param inputs: number of inputs.
+        :param output_slots: slots holding the outputs.
+        :param slots: number of slots.
+        """
+        self.key = key
+        self.levels = levels
+        self.releases = releases
+        self.inputs = inputs
+        self.output_slots = output_slots
+        self.outputs = len(output_slots)
+        self.slots = slots
+
+    def gates(self) -> int:
+        """
+        Returns the number of gates evaluated by the circuit.
+        """
+        return sum(len(level) for level in self.levels)
+
+    def __repr__(self):
+        return f"FHECompiledCircuit(levels={len(self.levels)}, gates={self.gates()}, inputs={self.inputs}, " \
+               f"outputs={self.outputs})"
+
+
+CircuitType = Union[List[List[str]], FHECircuitDAG, FHECompiledCircuit]
+
+
+def circuit_key(binary_circuit: List[List[str]]) -> CircuitKeyType:
+    """
+    Normalizes the structure of a circuit into a hashable key.
+
+    :param binary_circuit: list of circuit depths where each depth consists of gate names.
+    :return: a tuple of depths of lower case gate names.
+    """
+    return tuple(tuple(name.lower() for name in depth) for depth in binary_circuit)
+
+
+def compile_circuit(binary_circuit: CircuitType, optimize: bool = False) -> FHECompiledCircuit:
+    """
+    Compiles a circuit into an executable plan, compiled plans being cached on the circuit structure.
+
+    :param binary_circuit: list of circuit depths where each depth consists of gate names, a netlist, or an already
+                           compiled circuit which is returned as is.
+    :param optimize: whether to optimize the circuit before scheduling it (see FHECircuitOptimizer.optimize_circuit).
+    :return: the compiled circuit.
+    """
+    if isinstance(binary_circuit, FHECompiledCircuit):
+        return binary_circuit
+    if isinstance(binary_circuit, FHECircuitDAG):
+        key = binary_circuit.key()
+    else:
+        key = _netlist_key(circuit_key(binary_circuit))
+    return _compile_optimized(key) if optimize else _compile_netlist(key)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _netlist_key(key: CircuitKeyType) -> NetlistKeyType:
+    """
+    Translates a normalized depth-list circuit into the key of the equivalent netlist.
+
+    :param key: normalized structure of the circuit.
+    :return: the key of the netlist.
+    """
+    return FHECircuitDAG.from_depths([list(depth) for depth in key]).key()
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_optimized(key: NetlistKeyType) -> FHECompiledCircuit:
+    """
+    Optimizes a netlist and compiles it.
+
+    :param key: normalized structure of the netlist.
+    :return: the compiled optimized circuit.
+    """
+    return _compile_netlist(optimize_netlist(key))
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_netlist(key: NetlistKeyType) -> FHECompiledCircuit:
+    """
+    Schedules the gates of a netlist into levels and computes when each slot can be released.
+
+    :param key: normalized structure of the netlist, where the inputs are the first wires.
+    :return: the compiled circuit.
+    """
+    inputs, nodes, outputs = key
+    if len(outputs) == 0:
+        raise ValueError("Cannot evaluate a circuit without outputs!")
+
+    # The level of a gate is one more than the highest level of its inputs, inputs being at level 0
+    wire_levels = [0] * inputs
+    levels: List[List[InstructionType]] = []
+    for i, (opcode, input_wires) in enumerate(nodes):
+        if GATE_INPUTS[opcode] != len(input_wires):
+            raise ValueError(f"Gate {GATE_NAMES[opcode]} takes {GATE_INPUTS[opcode]} inputs!")
+
+        level = 1 + max((wire_levels[wire] for wire in input_wires), default=0)
+        wire_levels.append(level)
+        if len(levels) < level:
+            levels.append([])
+        levels[level - 1].append((opcode, input_wires, inputs + i))
+
+    # A slot is released after the last level reading it, unless it is an output
+    last_reads = dict()
+    for level, instructions in enumerate(levels):
+        for _, input_wires, _ in instructions:
+            for wire in input_wires:
+                last_reads[wire] = level
+    releases = [[] for _ in levels]
+    for wire, level in last_reads.items():
+        if wire not in outputs:
+            releases[level].append(wire)
+
+    return FHECompiledCircuit(key, tuple(tuple(level) for level in levels),
+                              tuple(tuple(sorted(release)) for release in releases), inputs, outputs,
+                              inputs + len(nodes))
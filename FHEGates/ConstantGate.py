@@ -0,0 +1,17 @@
+from typing import TypeVar, List
+
+from FHEBinaryGate import FHEBinaryGate
+
+CypheredTextType = TypeVar('CypheredTextType')
+
+
+class ConstantGate(FHEBinaryGate[CypheredTextType]):
+
+    def __init__(self, value: CypheredTextType):
+        self.value = value
+
+    def inputs(self) -> int:
+        return 0
+
+    def evaluate(self, inputs: List[CypheredTextType]) -> CypheredTextType:
+        return self.value
@@ -0,0 +1,155 @@
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from FHECompiledCircuit import FHECompiledCircuit, CircuitType
+
+# Default number of records evaluated together
+DEFAULT_BATCH_SIZE = 16
+# Default number of records read from the stream and not yet yielded
+DEFAULT_WINDOW = 64
+
+RecordType = List
+
+
+class StreamStats:
+    """
+    Statistics of a stream evaluated by evaluate_stream, updated as the records are yielded.
+
+    Attributes:
+        records: Number of records yielded.
+        batches: Number of micro-batches evaluated.
+        max_in_flight: Largest number of records read from the stream and not yet yielded.
+        stalls: Number of times reading the stream was paused because the window was full.
+        latencies: Time between reading each record and yielding its outputs, in seconds.
+        elapsed: Time since the stream started, in seconds.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.batches = 0
+        self.max_in_flight = 0
+        self.stalls = 0
+        self.latencies: List[float] = []
+        self.elapsed = 0.0
+
+    def throughput(self) -> float:
+        """
+        Returns the number of records yielded per second.
+        """
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    def mean_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        """
+        Returns a percentile (between 0 and 100) of the latencies.
+        """
+        return float(np.percentile(self.latencies, percentile)) if self.latencies else 0.0
+
+    def __repr__(self):
+        return f"StreamStats(records={self.records}, batches={self.batches}, " \
+               f"throughput={self.throughput():.1f}/s, mean_latency={self.mean_latency() * 1000:.1f}ms, " \
+               f"max_in_flight={self.max_in_flight}, stalls={self.stalls})"
+
+
+def evaluate_stream(scheme, binary_circuit: CircuitType, records: Iterable[RecordType],
+                    batch_size: int = DEFAULT_BATCH_SIZE, window: int = DEFAULT_WINDOW, workers: int = 1,
+                    stats: Optional[StreamStats] = None) -> Iterator[RecordType]:
+    """
+    Evaluates a circuit on each record of a stream, yielding the outputs of the records in order.
+
+    Records are read into micro-batches of batch_size records, which are evaluated on a thread pool while the
+    following ones are read. When the scheme stacks cyphered texts, the inputs of a micro-batch are stacked so that
+    its records are evaluated together, otherwise they are evaluated one by one. At most window records are read
+    from the stream and not yet yielded: the stream is only read further as outputs are consumed, which bounds the
+    memory held by the pipeline and slows the producer down to the pace of the consumer.
+
+    :param scheme: scheme with generated keys.
+    :param binary_circuit: circuit to evaluate, compiled once for the whole stream.
+    :param records: iterable of records, each record being the list of cyphered text inputs of the circuit.
+    :param batch_size: largest number of records evaluated together.
+    :param window: largest number of records in flight.
+    :param workers: number of micro-batches evaluated concurrently.
+    :param stats: optional statistics updated as the records are yielded.
+    :return: an iterator over the list of cyphered text outputs of each record.
+    """
+    if batch_size < 1 or window < 1 or workers < 1:
+        raise ValueError("The batch size, the window and the number of workers must be positive!")
+
+    compiled = scheme.compile(binary_circuit)
+    stats = stats if stats is not None else StreamStats()
+    evaluate_batch = batch_evaluator(scheme, compiled)
+    records = iter(records)
+    start = time.perf_counter()
+
+    pending: Deque[Tuple[Future, List[float]]] = deque()
+    in_flight = 0
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                while not exhausted and in_flight < window:
+                    batch, read_times = [], []
+                    for record in records:
+                        if len(record) != compiled.inputs:
+                            raise ValueError("The amount of inputs of a record does not match the circuit inputs")
+                        batch.append(list(record))
+                        read_times.append(time.perf_counter())
+                        if len(batch) == min(batch_size, window - in_flight):
+                            break
+                    else:
+                        exhausted = True
+                    if batch:
+                        pending.append((executor.submit(evaluate_batch, batch), read_times))
+                        in_flight += len(batch)
+                        stats.max_in_flight = max(stats.max_in_flight, in_flight)
+                if not exhausted:
+                    stats.stalls += 1
+                if not pending:
+                    break
+
+                future, read_times = pending.popleft()
+                outputs = future.result()
+                stats.batches += 1
+                for output, read_time in zip(outputs, read_times):
+                    stats.latencies.append(time.perf_counter() - read_time)
+                    stats.records += 1
+                    in_flight -= 1
+                    stats.elapsed = time.perf_counter() - start
+                    yield output
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+
+def batch_evaluator(scheme, compiled: FHECompiledCircuit) -> Callable[[List[RecordType]], List[RecordType]]:
+    """
+    Returns a function evaluating a circuit on a micro-batch of records, stacking them when the scheme allows it.
+
+    :param scheme: scheme with generated keys.
+    :param compiled: compiled circuit.
+    :return: a function mapping a list of records, each being the list of cyphered text inputs of the circuit, to
+             the list of cyphered text outputs of each record.
+    """
+    stack = getattr(scheme.circuit, 'stack', None)
+
+    def evaluate_one_by_one(batch: List[RecordType]) -> List[RecordType]:
+        return [scheme.evaluate(compiled, record) for record in batch]
+
+    def evaluate_stacked(batch: List[RecordType]) -> List[RecordType]:
+        if len(batch) == 1:
+            return evaluate_one_by_one(batch)
+        inputs = [stack([record[i] for record in batch]) for i in range(compiled.inputs)]
+        outputs = scheme.evaluate(compiled, inputs)
+        # Outputs which do not depend on the inputs are single cyphered texts instead of stacks
+        ndim = np.ndim(batch[0][0])
+        return [[output[j] if np.ndim(output) > ndim else output for output in outputs] for j in range(len(batch))]
+
+    if stack is None or compiled.inputs == 0:
+        return evaluate_one_by_one
+    return evaluate_stacked
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+GATE_CATEGORY = "gate"
+MUL_CATEGORY = "mul"
+PHASE_CATEGORY = "phase"
+
+
+class ProfileEvent:
+    """
+    Span of time recorded by a profiler.
+
+    Attributes:
+        name: Name of the gate, of the multiplication or of the phase of a multiplication.
+        category: GATE_CATEGORY, MUL_CATEGORY or PHASE_CATEGORY.
+        start: Start of the span since the profiler was created, in seconds.
+        duration: Wall time of the span, in seconds.
+        thread: Identifier of the thread which ran the span.
+        args: Details of the span, e.g. the depth, batch size, multiplications and bytes allocated of a gate.
+    """
+
+    def __init__(self, name: str, category: str, start: float, thread: int, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = 0.0
+        self.thread = thread
+        self.args = args
+
+    def __repr__(self):
+        return f"ProfileEvent({self.category}:{self.name}, start={self.start:.6f}, duration={self.duration:.6f})"
+
+
+class FHEProfiler:
+    """
+    Records the wall time of the gates evaluated by a circuit and of the multiplications of a scheme, to find where
+    the time of a circuit goes (bit decomposition, matrix product, modular reduction or Python overhead).
+
+    Circuits and schemes only call a profiler when one is set (see FHEScheme.profile), so that evaluation without a
+    profiler is not slowed down. Gate spans count the multiplications they run and, when tracking memory, the peak
+    number of bytes allocated above the memory in use when the gate started, as traced by tracemalloc: with several
+    workers, the allocations of concurrent gates are counted by each of them.
+
+    Attributes:
+        track_memory: Whether gate spans record the bytes they allocate.
+        events: The recorded spans, in the order they ended.
+
+    Methods:
+        gate: Runs and records the evaluation of a gate (or of a batch of gates of the same kind).
+        call: Runs and records a multiplication or one of its phases.
+        summary: Aggregates the spans per gate type and per phase.
+        format_summary: Formats the summary as a table.
+        chrome_trace: Returns the spans in the Chrome trace event format.
+        export_chrome_trace: Writes the spans to a JSON file readable by chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, track_memory: bool = False):
+        """
+        :param track_memory: whether gate spans record the bytes they allocate, which slows evaluation down.
+        """
+        self.track_memory = track_memory
+        self.events: List[ProfileEvent] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._started_tracing = False
+
+    def __enter__(self) -> 'FHEProfiler':
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def gate(self, name: str, depth: int, batch: int, task: Callable[[], Any]) -> Any:
+        """
+        Runs and records the evaluation of a gate.
+
+        :param name: name of the gate.
+        :param depth: level of the gate in the circuit.
+        :param batch: number of gates evaluated together in a stack.
+        :param task: function evaluating the gate.
+        :return: the result of the task.
+        """
+        event = ProfileEvent(name, GATE_CATEGORY, 0.0, threading.get_ident(),
+                             {"depth": depth, "batch": batch, "muls": 0})
+        parent = getattr(self._local, 'gate', None)
+        self._local.gate = event
+        measure_memory = self.track_memory and tracemalloc.is_tracing()
+        if measure_memory:
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            return task()
+        finally:
+            end = time.perf_counter()
+            if measure_memory:
+                event.args["bytes"] = max(tracemalloc.get_traced_memory()[1] - memory, 0)
+            self._local.gate = parent
+            self._record(event, start, end)
+
+    def call(self, name: str, func: Callable, *args, category: str = PHASE_CATEGORY) -> Any:
+        """
+        Runs and records a multiplication or one of its phases.
+
+        :param name: name of the span, e.g. "mul" or "bit_decomp".
+        :param func: function to run.
+        :param args: arguments of the function.
+        :param category: MUL_CATEGORY for multiplications, which are counted by the gate running them, or
+                         PHASE_CATEGORY.
+        :return: the result of the function.
+        """
+        event = ProfileEvent(name, category, 0.0, threading.get_ident(), dict())
+        gate = getattr(self._local, 'gate', None)
+        if gate is not None:
+            event.args["gate"] = gate.name
+            if category == MUL_CATEGORY:
+                gate.args["muls"] += 1
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._record(event, start, time.perf_counter())
+
+    def _record(self, event: ProfileEvent, start: float, end: float) -> None:
+        event.start = start - self._origin
+        event.duration = end - start
+        # Appending to a list is atomic, spans of concurrent workers need no lock
+        self.events.append(event)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregates the spans per gate type, and per multiplication phase.
+
+        :return: for each gate type (and "mul" or phase name, prefixed by its category), the number of spans, the
+                 number of gates, the total, mean and largest wall time in seconds, the number of multiplications and
+                 the bytes allocated.
+        """
+        summary: Dict[str, Dict[str, float]] = dict()
+        for event in self.events:
+            key = event.name if event.category == GATE_CATEGORY else f"{event.category}:{event.name}"
+            entry = summary.setdefault(key, {"count": 0, "gates": 0, "total": 0.0, "mean": 0.0, "max": 0.0,
+                                             "muls": 0, "bytes": 0})
+            entry["count"] += 1
+            entry["gates"] += event.args.get("batch", 0)
+            entry["total"] += event.duration
+            entry["max"] = max(entry["max"], event.duration)
+            entry["muls"] += event.args.get("muls", 0)
+            entry["bytes"] += event.args.get("bytes", 0)
+        for entry in summary.values():
+            entry["mean"] = entry["total"] / entry["count"]
+        return summary
+
+    def format_summary(self) -> str:
+        """
+        Formats the summary as a table, the slowest entries first.
+        """
+        lines = [f"{'span':<20} {'count':>7} {'gates':>7} {'total (ms)':>11} {'mean (ms)':>10} {'max (ms)':>10} "
+                 f"{'muls':>6} {'bytes':>12}"]
+        for key, entry in sorted(self.summary().items(), key=lambda item: -item[1]["total"]):
+            lines.append(f"{key:<20} {entry['count']:>7} {entry['gates']:>7} {entry['total'] * 1e3:>11.3f} "
+                         f"{entry['mean'] * 1e3:>10.3f} {entry['max'] * 1e3:>10.3f} {entry['muls']:>6} "
+                         f"{entry['bytes']:>12}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the spans as complete events of the Chrome trace event format, with times in microseconds.
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [{"name": event.name, "cat": event.category, "ph": "X", "ts": event.start * 1e6,
+                             "dur": event.duration * 1e6, "pid": pid, "tid": event.thread, "args": event.args}
+                            for event in self.events],
+            "displayTimeUnit": "ms",
+        }
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Writes the spans to a JSON file, which can be opened in chrome://tracing or https://ui.perfetto.dev.
+        """
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+def profiled(profiler: Optional[FHEProfiler], name: str, func: Callable, *args) -> Any:
+    """
+    Runs a phase of a multiplication, recording it when a profiler is set.
+    """
+    if profiler is None:
+        return func(*args)
+    return profiler.call(name, func, *args)
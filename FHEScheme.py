@@ -1,5 +1,14 @@
-from typing import TypeVar, Generic, List
+from typing import TypeVar, Generic, Iterable, Iterator, List, Optional, Tuple, Union
 from abc import abstractmethod, ABC
+from contextlib import contextmanager
+
+import numpy as np
+
+from FHECompiledCircuit import FHECompiledCircuit, CircuitType, compile_circuit
+from FHEPipeline import DEFAULT_BATCH_SIZE, DEFAULT_WINDOW, StreamStats, evaluate_stream
+from FHEProfiler import FHEProfiler
+from seeded import SeededArray
+from serialization import BufferType, CIPHERTEXT_KIND, PUBLIC_KEY_KIND, dumps, loads
 
 PublicKeyType = TypeVar('PublicKeyType')
 PrivateKeyType = TypeVar('PrivateKeyType')
@@ -14,12 +23,30 @@ class FHEScheme(ABC, Generic[PublicKeyType, PrivateKeyType, CypheredTextType, Ke
     This class defines the common interface for FHE schemes, including methods for key generation,
     encryption, decryption, and circuit evaluation.
 
+    Attributes:
+        profiler: Optional profiler recording the multiplications and their phases, set by profile.
+        public_key_seed: Seed of the uniform part of the last public key generated by keygen.
+        seeded_axis: Axis of the coefficient arrays (see _to_array) of public keys and seeded cyphered texts along
+                     which their first slice is stored and the other ones are expanded from a seed.
+
     Methods:
         keygen: Generates a key pair for the FHE scheme.
         encrypt: Encrypts a boolean bit into a cyphered text.
+        encrypt_sk: Encrypts a boolean bit into a cyphered text with the secret key.
         decrypt: Decrypts a cyphered text to obtain the original boolean bit.
         evaluate: Evaluates a binary circuit for a given set of cyphered text inputs.
+        compile: Compiles a binary circuit into a reusable executable plan.
+        evaluate_stream: Evaluates a binary circuit on a stream of records with bounded memory.
+        serialize: Serializes a cyphered text or a key into the versioned binary format.
+        deserialize: Loads a cyphered text or a key serialized with the same parameters.
+        compress_public_key: Compresses a public key into its seed and the coefficients which are not uniform.
+        expand: Expands a compressed public key or cyphered text.
+        profile: Records the gates and multiplications evaluated in a block.
     """
+    profiler: Optional[FHEProfiler] = None
+    public_key_seed: Optional[bytes] = None
+    seeded_axis: int = -1
+
     @abstractmethod
     def keygen(self, parameters: KeyGenType) -> (PrivateKeyType, PublicKeyType):
         """
@@ -39,6 +66,17 @@ class FHEScheme(ABC, Generic[PublicKeyType, PrivateKeyType, CypheredTextType, Ke
         """
         pass
 
+    @abstractmethod
+    def encrypt_sk(self, secret_key: PrivateKeyType, bit: bool) -> CypheredTextType:
+        """
+        Encrypts the given bit into a cyphered text with the secret key, which is cheaper than with the public key
+        when the party encrypting also decrypts
+        :param secret_key: secret key used to encrypt the bit
+        :param bit: actual bit represented as a boolean
+        :return: a cyphered text representing the bit, evaluated and decrypted like the ones of encrypt
+        """
+        pass
+
     @abstractmethod
     def decrypt(self, secret_key: PrivateKeyType, ct: CypheredTextType) -> bool:
         """
@@ -50,12 +88,137 @@ class FHEScheme(ABC, Generic[PublicKeyType, PrivateKeyType, CypheredTextType, Ke
         pass
 
     @abstractmethod
-    def evaluate(self, binary_circuit: List[List[str]], inputs: List[CypheredTextType]) -> CypheredTextType:
+    def evaluate(self, binary_circuit: CircuitType, inputs: List[CypheredTextType],
+                 workers: int = 1) -> CypheredTextType:
         """
         Evaluates a binary circuit for a given input
         :param binary_circuit: list of circuit depths where each depths consist of string with gate names: AND, NAND,
-        OR, XOR, NOT or WIRE(no gate)
+        OR, XOR, NOT or WIRE(no gate), a FHECircuitDAG netlist, or a circuit compiled with compile
         :param inputs: cyphered texts for which to evaluate the circuit
+        :param workers: number of threads evaluating the independent gates of a level concurrently
         :return:
         """
         pass
+
+    def compile(self, binary_circuit: CircuitType, optimize: bool = False) -> FHECompiledCircuit:
+        """
+        Compiles a binary circuit into a validated executable plan, which can be passed to evaluate any number of
+        times. Compiled plans are kept in an LRU cache keyed on the circuit structure, so evaluating the same circuit
+        in its list form only parses and validates it once.
+        :param binary_circuit: list of circuit depths where each depths consist of string with gate names, or a
+        FHECircuitDAG netlist
+        :param optimize: whether to fold constants, share common gates, remove dead gates and minimize the number of
+        multiplications and the multiplicative depth before scheduling the circuit
+        :return: the compiled circuit
+        """
+        return compile_circuit(binary_circuit, optimize)
+
+    def evaluate_stream(self, binary_circuit: CircuitType, records: Iterable[List[CypheredTextType]],
+                        batch_size: int = DEFAULT_BATCH_SIZE, window: int = DEFAULT_WINDOW, workers: int = 1,
+                        stats: Optional[StreamStats] = None) -> Iterator[List[CypheredTextType]]:
+        """
+        Evaluates a binary circuit on each record of a stream by micro-batches, yielding the outputs of the records
+        in order while keeping at most window records in flight (see FHEPipeline.evaluate_stream)
+        :param binary_circuit: circuit to evaluate
+        :param records: iterable of lists of cyphered text inputs
+        :param batch_size: largest number of records evaluated together
+        :param window: largest number of records read and not yet yielded
+        :param workers: number of micro-batches evaluated concurrently
+        :param stats: optional statistics (throughput, latencies) updated during the evaluation
+        :return: an iterator over the cyphered text outputs of each record
+        """
+        return evaluate_stream(self, binary_circuit, records, batch_size, window, workers, stats)
+
+    @contextmanager
+    def profile(self, profiler: Optional[FHEProfiler] = None) -> Iterator[FHEProfiler]:
+        """
+        Records the gates evaluated by the circuit of the scheme, its multiplications and their phases, within a
+        with block. Without a profiler, evaluation records nothing and is not slowed down
+        :param profiler: profiler to record into, a new one by default
+        :return: the profiler, whose summary and Chrome trace can be read after the block
+        """
+        profiler = profiler if profiler is not None else FHEProfiler()
+        previous = self.profiler
+        self.profiler = self.circuit.profiler = profiler
+        try:
+            with profiler:
+                yield profiler
+        finally:
+            self.profiler = self.circuit.profiler = previous
+
+    def serialize(self, value: Union[CypheredTextType, PublicKeyType, PrivateKeyType], kind: int = CIPHERTEXT_KIND,
+                  packed: bool = True) -> bytes:
+        """
+        Serializes a cyphered text or a key, with the parameters of the scheme in a header
+        :param value: cyphered text, public key or secret key
+        :param kind: serialization.CIPHERTEXT_KIND, PUBLIC_KEY_KIND or SECRET_KEY_KIND
+        :param packed: whether to pack each coefficient into ceil(log2 q) bits, or to store int64 coefficients which
+        can be loaded without copy
+        :return: the serialized value
+        """
+        return dumps(self, value, kind, packed)
+
+    def deserialize(self, data: BufferType,
+                    expand: bool = True) -> Union[CypheredTextType, PublicKeyType, PrivateKeyType, SeededArray]:
+        """
+        Loads a cyphered text or a key serialized by a scheme of the same type with the same parameters
+        :param data: serialized value
+        :param expand: whether to expand seeded values, or to return them as seeded arrays to expand later
+        :return: the cyphered text or key
+        """
+        return loads(self, data, expand)
+
+    def compress_public_key(self, public_key: PublicKeyType) -> SeededArray:
+        """
+        Compresses the public key generated by the last keygen: its uniform part is expanded from a seed, so that only
+        the seed and the other coefficients are stored and serialized, e.g. the b column of a LWE public key [b | A]
+        instead of the whole matrix
+        :param public_key: public key generated by the last keygen of the scheme
+        :return: the compressed public key, which encrypt accepts as well
+        """
+        if self.public_key_seed is None:
+            raise ValueError("The scheme has not generated a public key!")
+        q = self._parameters()[0]
+        array = np.asarray(self._to_array(public_key), dtype=np.int64) % q
+        return SeededArray.compress(array, self.public_key_seed, self.seeded_axis, 1, q)
+
+    def expand(self, value: Union[CypheredTextType, PublicKeyType, SeededArray],
+               kind: int = PUBLIC_KEY_KIND) -> Union[CypheredTextType, PublicKeyType]:
+        """
+        Expands a compressed public key or cyphered text, other values being returned as they are. The uniform parts
+        of public keys are cached by seed, so that a public key loaded several times is only expanded once
+        :param value: seeded array, or a key or cyphered text
+        :param kind: serialization.PUBLIC_KEY_KIND or CIPHERTEXT_KIND
+        :return: the expanded public key or cyphered text
+        """
+        if not isinstance(value, SeededArray):
+            return value
+        return self._from_array(value.expand(cache=kind == PUBLIC_KEY_KIND), kind)
+
+    @abstractmethod
+    def _parameters(self) -> Tuple[int, int]:
+        """
+        Returns the modulus and the dimension parameter given to keygen, stored in serialization headers
+        """
+        pass
+
+    @abstractmethod
+    def _ciphertext_shape(self) -> Tuple[int, ...]:
+        """
+        Returns the shape of the coefficient array (see _to_array) of a single cyphered text
+        """
+        pass
+
+    @abstractmethod
+    def _to_array(self, value: Union[CypheredTextType, PublicKeyType, PrivateKeyType]) -> np.ndarray:
+        """
+        Converts a cyphered text or a key to an integer array of its coefficients
+        """
+        pass
+
+    @abstractmethod
+    def _from_array(self, array: np.ndarray, kind: int) -> Union[CypheredTextType, PublicKeyType, PrivateKeyType]:
+        """
+        Converts an array of coefficients reduced modulo q back to a cyphered text or a key
+        """
+        pass
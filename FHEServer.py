@@ -0,0 +1,445 @@
+import asyncio
+import json
+import struct
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from FHECompiledCircuit import CircuitType
+from FHEPipeline import batch_evaluator
+from serialization import CIPHERTEXT_KIND, read_header
+
+# Default largest number of requests evaluated in a single batch
+DEFAULT_MAX_BATCH_SIZE = 32
+# Default time a request waits for other requests of the same circuit before its batch is evaluated, in seconds
+DEFAULT_BATCH_LATENCY = 0.005
+# Number of latencies and batch sizes kept to compute the metrics
+METRICS_WINDOW = 10000
+
+# Frames are prefixed by the size of their body
+FRAME_FORMAT = "<I"
+MAX_FRAME_SIZE = 1 << 30
+# Requests: operation, request id, size of the circuit name, followed by the name and, to evaluate, the cyphered texts
+REQUEST_FORMAT = "<BQH"
+EVALUATE_OPERATION = 0
+METRICS_OPERATION = 1
+# Responses: request id, status, followed by the cyphered texts, the metrics in JSON or an error message
+RESPONSE_FORMAT = "<QB"
+OK_STATUS = 0
+ERROR_STATUS = 1
+# Lists of cyphered texts: number of cyphered texts, then the size of each serialized cyphered text and its bytes
+COUNT_FORMAT = "<H"
+SIZE_FORMAT = "<I"
+
+BufferType = Union[bytes, bytearray, memoryview]
+
+
+def encode_cts(cts: List[bytes]) -> bytes:
+    """
+    Encodes a list of serialized cyphered texts.
+    """
+    return struct.pack(COUNT_FORMAT, len(cts)) + b"".join(struct.pack(SIZE_FORMAT, len(ct)) + ct for ct in cts)
+
+
+def decode_cts(data: BufferType) -> List[memoryview]:
+    """
+    Decodes a list of serialized cyphered texts, without copying them.
+    """
+    data = memoryview(data)
+    if len(data) < struct.calcsize(COUNT_FORMAT):
+        raise ValueError("Truncated list of cyphered texts!")
+    count, = struct.unpack_from(COUNT_FORMAT, data)
+    offset = struct.calcsize(COUNT_FORMAT)
+    cts = []
+    for _ in range(count):
+        if len(data) < offset + struct.calcsize(SIZE_FORMAT):
+            raise ValueError("Truncated list of cyphered texts!")
+        size, = struct.unpack_from(SIZE_FORMAT, data, offset)
+        offset += struct.calcsize(SIZE_FORMAT)
+        if len(data) < offset + size:
+            raise ValueError("Truncated list of cyphered texts!")
+        cts.append(data[offset:offset + size])
+        offset += size
+    return cts
+
+
+def frame(body: bytes) -> bytes:
+    return struct.pack(FRAME_FORMAT, len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    Reads the body of a frame, or returns None if the connection was closed.
+    """
+    try:
+        size, = struct.unpack(FRAME_FORMAT, await reader.readexactly(struct.calcsize(FRAME_FORMAT)))
+        if size > MAX_FRAME_SIZE:
+            raise ValueError(f"Frames are limited to {MAX_FRAME_SIZE} bytes!")
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class ServerMetrics:
+    """
+    Metrics of an evaluation server.
+
+    Attributes:
+        requests: Number of evaluation requests received.
+        errors: Number of evaluation requests which failed.
+        batches: Number of batches evaluated.
+        queue_depth: Number of evaluation requests received and not answered yet.
+        max_queue_depth: Largest queue depth.
+        batch_sizes: Number of requests of the last batches.
+        latencies: Time between receiving the last requests and sending their response, in seconds.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.batch_sizes: Deque[int] = deque(maxlen=METRICS_WINDOW)
+        self.latencies: Deque[float] = deque(maxlen=METRICS_WINDOW)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns the metrics as a dictionary, summarizing the batch sizes and the latencies.
+        """
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        batch_sizes = np.array(self.batch_sizes) if self.batch_sizes else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_batch_size": float(np.mean(batch_sizes)),
+            "max_batch_size": int(np.max(batch_sizes)),
+            "mean_latency": float(np.mean(latencies)),
+            "p50_latency": float(np.percentile(latencies, 50)),
+            "p99_latency": float(np.percentile(latencies, 99)),
+        }
+
+
+class FHEServer:
+    """
+    Asyncio server evaluating registered circuits on the cyphered texts sent by clients (see FHEClient).
+
+    Concurrent requests for the same circuit are coalesced: a request waits at most batch_latency seconds for other
+    requests, and the batch is evaluated at once, stacked when the scheme supports it (see FHEPipeline), as soon as
+    the delay expires or max_batch_size requests are waiting. Batches are deserialized, evaluated and serialized on
+    a thread pool, so that the event loop keeps reading requests meanwhile.
+
+    Cyphered texts are exchanged in the bit-packed serialization format (see serialization.py), the server and the
+    clients using schemes with the same parameters.
+
+    Attributes:
+        scheme: Scheme with the parameters of the clients.
+        circuits: Compiled circuits, by name.
+        max_batch_size: Largest number of requests evaluated in a batch.
+        batch_latency: Longest time a request waits for other requests, in seconds.
+        metrics: Metrics of the server.
+
+    Methods:
+        start: Listens on a TCP port.
+        start_unix: Listens on a Unix socket.
+        serve_forever: Serves until the server is closed.
+        close: Stops listening and waits for the running evaluations.
+    """
+
+    def __init__(self, scheme, circuits: Dict[str, CircuitType], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 batch_latency: float = DEFAULT_BATCH_LATENCY, workers: int = 1):
+        """
+        :param scheme: scheme with the parameters of the clients, evaluating the circuits.
+        :param circuits: circuits that can be evaluated, by name.
+        :param max_batch_size: largest number of requests evaluated in a batch.
+        :param batch_latency: longest time a request waits for other requests, in seconds.
+        :param workers: number of batches evaluated concurrently.
+        """
+        if max_batch_size < 1 or batch_latency < 0 or workers < 1:
+            raise ValueError("The batch size and the number of workers must be positive!")
+        self.scheme = scheme
+        self.circuits = {name: scheme.compile(circuit) for name, circuit in circuits.items()}
+        self.max_batch_size = max_batch_size
+        self.batch_latency = batch_latency
+        self.metrics = ServerMetrics()
+        self._evaluators = {name: batch_evaluator(scheme, compiled) for name, compiled in self.circuits.items()}
+        self._pending: Dict[str, List[Tuple[List[memoryview], asyncio.Future]]] = dict()
+        self._timers: Dict[str, asyncio.TimerHandle] = dict()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._jobs: Set[asyncio.Future] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Listens on a TCP port, a free port being chosen when port is 0 (see address).
+        """
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def start_unix(self, path: str) -> None:
+        """
+        Listens on a Unix socket.
+        """
+        self._server = await asyncio.start_unix_server(self._handle_connection, path)
+
+    @property
+    def address(self):
+        """
+        Returns the address the server listens on: (host, port) for TCP, the path of Unix sockets.
+        """
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for name in list(self._pending):
+            self._flush(name)
+        # Waits for the running batches without blocking the event loop, the executor is then idle
+        if self._jobs:
+            await asyncio.wait(self._jobs)
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> 'FHEServer':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        try:
+            while (body := await read_frame(reader)) is not None:
+                if len(body) < struct.calcsize(REQUEST_FORMAT):
+                    break
+                operation, request_id, name_size = struct.unpack_from(REQUEST_FORMAT, body)
+                offset = struct.calcsize(REQUEST_FORMAT)
+                name = bytes(body[offset:offset + name_size]).decode(errors="replace")
+                payload = memoryview(body)[offset + name_size:]
+                if operation == METRICS_OPERATION:
+                    self._respond(writer, request_id, OK_STATUS, json.dumps(self.metrics.snapshot()).encode())
+                else:
+                    task = asyncio.create_task(self._evaluate_request(writer, request_id, name, payload))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await writer.drain()
+            if tasks:
+                await asyncio.wait(tasks)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _evaluate_request(self, writer: asyncio.StreamWriter, request_id: int, name: str,
+                                payload: memoryview) -> None:
+        received = time.perf_counter()
+        self.metrics.requests += 1
+        self.metrics.queue_depth += 1
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+        try:
+            if name not in self.circuits:
+                raise ValueError(f"Unknown circuit {name}!")
+            cts = decode_cts(payload)
+            if len(cts) != self.circuits[name].inputs:
+                raise ValueError("The amount of inputs does not match the circuit inputs")
+            self._check_inputs(cts)
+            outputs = await self._submit(name, cts)
+            self._respond(writer, request_id, OK_STATUS, encode_cts(outputs))
+        except Exception as error:
+            self.metrics.errors += 1
+            self._respond(writer, request_id, ERROR_STATUS, str(error).encode())
+        finally:
+            self.metrics.queue_depth -= 1
+            self.metrics.latencies.append(time.perf_counter() - received)
+
+    def _check_inputs(self, cts: List[memoryview]) -> None:
+        """
+        Checks that each input is a single cyphered text, so that a request cannot fail the stacking of its batch.
+        """
+        shape = self.scheme._ciphertext_shape()
+        for ct in cts:
+            header = read_header(ct, check_payload=False)
+            if header.kind != CIPHERTEXT_KIND or header.shape != shape:
+                raise ValueError(f"Each input must be a single cyphered text of {' x '.join(map(str, shape))} "
+                                 f"elements (input is {' x '.join(map(str, header.shape))})!")
+
+    def _respond(self, writer: asyncio.StreamWriter, request_id: int, status: int, payload: bytes) -> None:
+        if not writer.is_closing():
+            writer.write(frame(struct.pack(RESPONSE_FORMAT, request_id, status) + payload))
+
+    def _submit(self, name: str, cts: List[memoryview]) -> asyncio.Future:
+        """
+        Adds a request to the batch of its circuit, the future being set to the serialized outputs.
+        """
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(name, [])
+        pending.append((cts, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(name)
+        elif len(pending) == 1:
+            self._timers[name] = asyncio.get_running_loop().call_later(self.batch_latency, self._flush, name)
+        return future
+
+    def _flush(self, name: str) -> None:
+        """
+        Evaluates the waiting requests of a circuit on the thread pool.
+        """
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(name, [])
+        if not batch:
+            return
+        self.metrics.batches += 1
+        self.metrics.batch_sizes.append(len(batch))
+
+        def distribute(job: asyncio.Future) -> None:
+            error = job.exception()
+            for (_, future), result in zip(batch, job.result() if error is None else [error] * len(batch)):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+        job = asyncio.get_running_loop().run_in_executor(self._executor, self._evaluate_batch, name,
+                                                         [cts for cts, _ in batch])
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        job.add_done_callback(distribute)
+
+    def _evaluate_batch(self, name: str, batch: List[List[memoryview]]) -> List[Union[List[bytes], Exception]]:
+        """
+        Deserializes, evaluates and serializes a batch of requests, requests which cannot be deserialized getting an
+        error without failing the others. When the evaluation of the batch fails, its requests are evaluated one by
+        one, so that only the failing ones get the error.
+        """
+        results: List[Union[List[bytes], Exception]] = [None] * len(batch)
+        records, indexes = [], []
+        for i, cts in enumerate(batch):
+            try:
+                records.append([self.scheme.deserialize(ct) for ct in cts])
+                indexes.append(i)
+            except ValueError as error:
+                results[i] = error
+        if not records:
+            return results
+
+        evaluate = self._evaluators[name]
+        try:
+            outputs = evaluate(records)
+        except Exception:
+            outputs = []
+            for record in records:
+                try:
+                    outputs.append(evaluate([record])[0])
+                except Exception as error:
+                    outputs.append(error)
+        for i, record_outputs in zip(indexes, outputs):
+            if isinstance(record_outputs, Exception):
+                results[i] = record_outputs
+            else:
+                results[i] = [self.scheme.serialize(ct) for ct in record_outputs]
+        return results
+
+
+class FHEClient:
+    """
+    Client of an evaluation server, sending requests concurrently over a single connection.
+
+    Methods:
+        connect: Connects to a server listening on a TCP port.
+        connect_unix: Connects to a server listening on a Unix socket.
+        evaluate: Evaluates a registered circuit on cyphered texts.
+        metrics: Returns the metrics of the server.
+        close: Closes the connection.
+    """
+
+    def __init__(self, scheme, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Use FHEClient.connect or FHEClient.connect_unix instead.
+
+        :param scheme: scheme with the parameters of the server.
+        :param reader: stream of the responses.
+        :param writer: stream of the requests.
+        """
+        self.scheme = scheme
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._responses: Dict[int, asyncio.Future] = dict()
+        self._reading = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, scheme, host: str, port: int) -> 'FHEClient':
+        return cls(scheme, *await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, scheme, path: str) -> 'FHEClient':
+        return cls(scheme, *await asyncio.open_unix_connection(path))
+
+    async def evaluate(self, name: str, cts: List) -> List:
+        """
+        Evaluates a circuit registered on the server.
+
+        :param name: name of the circuit.
+        :param cts: cyphered text inputs of the circuit.
+        :return: the cyphered text outputs of the circuit.
+        """
+        payload = await self._request(EVALUATE_OPERATION, name, encode_cts([self.scheme.serialize(ct) for ct in cts]))
+        return [self.scheme.deserialize(ct) for ct in decode_cts(payload)]
+
+    async def metrics(self) -> Dict[str, float]:
+        return json.loads(bytes(await self._request(METRICS_OPERATION, "", b"")))
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._reading
+
+    async def __aenter__(self) -> 'FHEClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _request(self, operation: int, name: str, payload: bytes) -> memoryview:
+        request_id = self._next_id
+        self._next_id += 1
+        response = asyncio.get_running_loop().create_future()
+        self._responses[request_id] = response
+        encoded_name = name.encode()
+        self._writer.write(frame(struct.pack(REQUEST_FORMAT, operation, request_id, len(encoded_name)) +
+                                 encoded_name + payload))
+        await self._writer.drain()
+        return await response
+
+    async def _read_responses(self) -> None:
+        try:
+            while (body := await read_frame(self._reader)) is not None:
+                request_id, status = struct.unpack_from(RESPONSE_FORMAT, body)
+                response = self._responses.pop(request_id, None)
+                if response is None or response.done():
+                    continue
+                payload = memoryview(body)[struct.calcsize(RESPONSE_FORMAT):]
+                if status == OK_STATUS:
+                    response.set_result(payload)
+                else:
+                    response.set_exception(ValueError(f"The server could not evaluate the request: "
+                                                      f"{bytes(payload).decode()}"))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for response in self._responses.values():
+                if not response.done():
+                    response.set_exception(ConnectionError("The connection to the server was closed!"))
+            self._responses.clear()
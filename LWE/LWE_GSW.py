@@ -1,19 +1,31 @@
 import math
-from typing import Tuple, Callable, List, Dict
+from typing import Tuple, Callable, List, Dict, Optional, Union
 
 import numpy as np
 
 from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECompiledCircuit import CircuitType
 from FHEBinaryGate import FHEBinaryGate
+from FHEProfiler import profiled
 from FHEScheme import FHEScheme
+from gadget import DEFAULT_BASE, decryption_row, gadget_digits
+from error_samplers import ErrorSampler, as_sampler
+from seeded import SeededArray, cached_expand_uniform, expand_uniform, generate_seed
+from serialization import CIPHERTEXT_KIND
 
 from LWE.lwe_utils import generate_error_matrix, generate_error_vector, generate_random_matrix, generate_gadget_matrix, \
-    bit_decomp
+    bit_decomp, generate_error_tensor, mod_matmul
+from LWE.lwe_ciphertext import LWECiphertext, as_ciphertext, is_power_of_two, mod_reduce, stack_ciphertexts
 
 PublicKeyType = np.ndarray
 PrivateKeyType = np.ndarray
 CypheredTextType = np.ndarray
-KeyGenType = Tuple[int, int, Callable[[], int]]
+KeyGenType = Union[Tuple[int, int, Union[ErrorSampler, Callable[[], int]]],
+                   Tuple[int, int, Union[ErrorSampler, Callable[[], int]], int]]
+
+# Largest number of coefficients of the bit decompositions multiplied at once: stacks whose decomposition outgrows
+# the cache are slower to multiply in one product than in several smaller ones
+MUL_CHUNK_ELEMENTS = 1 << 16
 
 
 class LWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenType]):
@@ -27,39 +39,55 @@ class LWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenTy
      Attributes:
          q: Modulus for the LWE ring.
          n: Number of columns of the matrices.
-         m: n times the logarithm (base 2) of the modulus q.
-         error_function: Callable function to generate random error terms.
+         base: Base B = 2^k of the gadget matrix and of the decomposition of cyphered texts.
+         digits: Number of digits in base B of the integers modulo q, i.e. ceil(log_q / k).
+         m: n times the number of digits.
+         error_function: Sampler generating random error terms.
          G: Gadget matrix used in encryption.
+         circuit: Gates bound to the gadget matrix and multiplication, used to evaluate compiled circuits.
 
      Methods:
          keygen: Generates a key pair for the LWEGSW scheme.
+         setup: Sets the parameters of the scheme without generating keys.
+         parameters: Returns the parameters given to keygen.
          encrypt: Encrypts a boolean bit into a cyphered text.
+         encrypt_many: Encrypts an array of bits into a stack of cyphered texts.
+         encrypt_sk: Encrypts a boolean bit into a cyphered text with the secret key, optionally seeded.
+         encrypt_many_sk: Encrypts an array of bits into a stack of cyphered texts with the secret key, optionally
+                          seeded.
          decrypt: Decrypts a cyphered text to obtain the original boolean bit.
+         decrypt_many: Decrypts a stack of cyphered texts into an array of bits.
          evaluate: Evaluates a binary circuit for a given set of cyphered text inputs.
          _mul: Internal method for multiplication operation in LWEGSW.
      """
     q: int
     n: int
     m: int
-    error_function: Callable[[], int]
+    error_function: ErrorSampler
     G: np.ndarray
+    circuit: FHEBinaryCircuit
+    # The b column of public keys [b | A] and of seeded cyphered texts is stored, the other columns are expanded
+    seeded_axis = -1
 
     def keygen(self, parameters: KeyGenType) -> (PrivateKeyType, PublicKeyType):
         """
         Generates a key pair.
 
-        :param parameters: A tuple containing q, n and an error function.
-        :return: A tuple containing the public key and the private key.
+        :param parameters: A tuple containing q, n, an error sampler (or a callable returning one error term) and
+                           optionally the decomposition base, a power of two (2 by default). A base B = 2^k divides
+                           the number of rows of the cyphered texts, and the cost of their multiplication, by k, but
+                           the noise added by each multiplication grows with B.
+        :return: A tuple containing the public key and the private key, whose uniform part A is expanded from
+                 public_key_seed (see compress_public_key).
         """
 
-        self.q, self.n, self.error_function = parameters[:3]
-        self.m = self.n * math.ceil(math.log2(self.q))
-        self.G = generate_gadget_matrix(self.q, self.n)
+        self.setup(parameters[:4])
 
-        A = generate_random_matrix(self.m, self.n - 1, self.q)
+        self.public_key_seed = generate_seed()
+        A = cached_expand_uniform(self.public_key_seed, (self.m, self.n - 1), self.q)
         e = generate_error_vector(self.m, self.error_function)
         s = generate_error_vector(self.n - 1, self.error_function)
-        b = (- A @ s) + e  # @ is the matrix multiplication operator in Python
+        b = mod_reduce(e - mod_matmul(A, s, self.q), self.q)
 
         # Concatenates b
         public_key = np.concatenate((b, A), axis=1)
@@ -69,15 +97,43 @@ class LWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenTy
 
         return public_key, private_key
 
+    def setup(self, parameters: KeyGenType, G: Optional[np.ndarray] = None) -> None:
+        """
+        Sets the parameters of the scheme without generating keys, to evaluate circuits or encrypt with keys
+        generated elsewhere, e.g. by another process.
+
+        :param parameters: A tuple containing q, n, an error sampler (or a callable returning one error term), which
+                           may be None if the scheme does not encrypt, and optionally the decomposition base.
+        :param G: Optional gadget matrix to use instead of generating one, e.g. a view of shared memory.
+        """
+        self.q, self.n, error_function = parameters[:3]
+        self.base = parameters[3] if len(parameters) > 3 else DEFAULT_BASE
+        self.error_function = as_sampler(error_function) if error_function is not None else None
+        self.digits = gadget_digits(self.q, self.base)
+        self.m = self.n * self.digits
+        if G is None:
+            G = generate_gadget_matrix(self.q, self.n, self.base)
+        self.G = LWECiphertext(G, self.q, 0, self.base ** (self.digits - 1))
+        self.circuit = FHEBinaryCircuit[CypheredTextType](self.G, lambda ct1, ct2: self._mul(ct1, ct2),
+                                                          stack_ciphertexts)
+
+    def parameters(self) -> KeyGenType:
+        """
+        Returns the parameters given to keygen, the error function being wrapped into a sampler.
+        """
+        return self.q, self.n, self.error_function, self.base
+
     def encrypt(self, public_key: PublicKeyType, bit: bool) -> CypheredTextType:
         """
         Encrypts a boolean bit into a cyphered text.
 
-        :param public_key: Public key used for encryption.
+        :param public_key: Public key used for encryption, or a compressed public key.
         :param bit: The boolean bit to be encrypted (True or False).
         :return: A cyphered text representing the encrypted bit.
         """
 
+        public_key = self.expand(public_key)
+
         # Dimension check for the public_key
         if public_key.shape != (self.m, self.n):
             raise ValueError(
@@ -86,12 +142,12 @@ class LWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenTy
         T = generate_error_matrix(self.m, self.m, self.error_function)
         F = generate_error_matrix(self.m, self.n, self.error_function)
 
-        CT = T @ public_key + F
+        CT = mod_matmul(T, public_key, self.q) + F
 
         if bit:
             CT += self.G
 
-        return CT % self.q
+        return LWECiphertext(mod_reduce(CT, self.q), self.q, 0, self.q - 1)
 
     def decrypt(self, secret_key: PrivateKeyType, CT: CypheredTextType) -> bool:
         """
@@ -112,49 +168,209 @@ class LWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenTy
                 f"Invalid dimensions for the cyphered text: should be a vector of {self.m} x {self.n} elements (input "
                 f"is {CT.shape[0]} x {CT.shape[1]})")
 
-        raw_decrypt = (CT @ secret_key) % self.q
+        # Only the row holding q / 2 (or the power of the base below it) on the gadget diagonal is needed
+        row, scale = decryption_row(math.ceil(math.log2(self.q)) - 1, self.base)
+        raw_decrypt = mod_matmul(CT[row], secret_key * scale, self.q)
 
-        # print(raw_decrypt)
+        return bool((raw_decrypt[0] > self.q / 4) and (raw_decrypt[0] < 3 * self.q / 4))
 
-        log_q = self.m // self.n
+    def encrypt_many(self, public_key: PublicKeyType, bits: np.ndarray) -> CypheredTextType:
+        """
+        Encrypts an array of boolean bits into a stack of cyphered texts.
+
+        All the T @ public_key products are computed in a single matrix multiplication.
+
+        :param public_key: Public key used for encryption, or a compressed public key.
+        :param bits: Array of k bits to be encrypted.
+        :return: A (k, m, n) stack of cyphered texts, the i-th one encrypting the i-th bit.
+        """
+
+        public_key = self.expand(public_key)
+
+        # Dimension check for the public_key
+        if public_key.shape != (self.m, self.n):
+            raise ValueError(
+                f"Invalid dimensions for the public key: should be a matrix of {self.m} x {self.n} elements")
+
+        bits = np.asarray(bits, dtype=bool).reshape(-1)
+        k = bits.shape[0]
+
+        T = generate_error_tensor(k, self.m, self.m, self.error_function)
+        F = generate_error_tensor(k, self.m, self.n, self.error_function)
+
+        CT = mod_matmul(T.reshape(k * self.m, self.m), public_key, self.q).reshape(k, self.m, self.n) + F
+        CT[bits] += self.G
+
+        return LWECiphertext(mod_reduce(CT, self.q), self.q, 0, self.q - 1)
+
+    def encrypt_sk(self, secret_key: PrivateKeyType, bit: bool,
+                   seeded: bool = False) -> Union[CypheredTextType, SeededArray]:
+        """
+        Encrypts a boolean bit into a cyphered text with the secret key.
+
+        Each row of the cyphered text is a fresh LWE sample [b | A] with a uniform A and b = e - A s, to which G is
+        added: this takes O(m * n) operations instead of the O(m^2 * n) of the T @ public_key product, and the noise
+        of a row is a single error term instead of T @ e + F @ secret_key.
+
+        :param secret_key: Secret key used for encryption.
+        :param bit: The boolean bit to be encrypted (True or False).
+        :param seeded: Whether to expand the uniform columns from a seed, returning a compressed cyphered text of a
+                       single column (see expand).
+        :return: A cyphered text representing the encrypted bit.
+        """
 
-        return (raw_decrypt[log_q - 1] > self.q / 4) and (raw_decrypt[log_q - 1] < 3 * self.q / 4)
+        return self._encrypt_sk(secret_key, [bit], (self.m, self.n), seeded)
 
-    def evaluate(self, binary_circuit: List[List[str]], inputs: List[CypheredTextType]) -> CypheredTextType:
+    def encrypt_many_sk(self, secret_key: PrivateKeyType, bits: np.ndarray,
+                        seeded: bool = False) -> Union[CypheredTextType, SeededArray]:
+        """
+        Encrypts an array of boolean bits into a stack of cyphered texts with the secret key (see encrypt_sk).
+
+        :param secret_key: Secret key used for encryption.
+        :param bits: Array of k bits to be encrypted.
+        :param seeded: Whether to expand the uniform columns from a seed, returning a compressed stack.
+        :return: A (k, m, n) stack of cyphered texts, the i-th one encrypting the i-th bit.
+        """
+
+        bits = np.asarray(bits, dtype=bool).reshape(-1)
+        return self._encrypt_sk(secret_key, bits, (bits.shape[0], self.m, self.n), seeded)
+
+    def _encrypt_sk(self, secret_key: PrivateKeyType, bits: np.ndarray, shape: Tuple[int, ...],
+                    seeded: bool) -> Union[CypheredTextType, SeededArray]:
+        """
+        Encrypts bits with the secret key into cyphered texts of the given shape.
+
+        Adding G to [b | A] gives [b + G_b | A + G_A], whose columns A + G_A are uniform as well: the uniform columns
+        are drawn directly, possibly from a seed, and G only changes b into e - A s + G secret_key.
+        """
+
+        # Dimension check for the secret key
+        if secret_key.shape != (self.n, 1):
+            raise ValueError(f"Invalid dimensions for the secret key: should be a vector of {self.n} elements")
+
+        bits = np.asarray(bits, dtype=bool).reshape(-1)
+        k = bits.shape[0]
+        uniform_shape = shape[:-1] + (self.n - 1,)
+
+        seed = generate_seed() if seeded else None
+        if seeded:
+            A = expand_uniform(seed, uniform_shape, self.q).reshape(k * self.m, self.n - 1)
+        else:
+            A = generate_random_matrix(k * self.m, self.n - 1, self.q)
+        e = generate_error_vector(k * self.m, self.error_function)
+        b = (e - mod_matmul(A, secret_key[1:], self.q)).reshape(k, self.m, 1)
+        b[bits] += mod_matmul(self.G, secret_key, self.q)
+        b = mod_reduce(b, self.q)
+
+        if seeded:
+            return SeededArray(seed, b.reshape(shape[:-1] + (1,)), shape, self.seeded_axis, self.q)
+        CT = np.concatenate((b, A.reshape(k, self.m, self.n - 1)), axis=2).reshape(shape)
+        return LWECiphertext(CT, self.q, 0, self.q - 1)
+
+    def decrypt_many(self, secret_key: PrivateKeyType, CT: CypheredTextType) -> np.ndarray:
+        """
+        Decrypts a stack of cyphered texts.
+
+        :param secret_key: Secret key used for decryption.
+        :param CT: A (k, m, n) stack of cyphered texts to be decrypted.
+        :return: An array of the k decrypted boolean bits.
+        """
+
+        # Dimension check for the secret key
+        if secret_key.shape != (self.n, 1):
+            raise ValueError(f"Invalid dimensions for the secret key: should be a vector of {self.m} elements")
+
+        # Dimension check for the cyphered texts
+        if CT.ndim != 3 or CT.shape[1:] != (self.m, self.n):
+            raise ValueError(
+                f"Invalid dimensions for the cyphered texts: should be a stack of {self.m} x {self.n} matrices (input "
+                f"is {' x '.join(str(d) for d in CT.shape)})")
+
+        row, scale = decryption_row(math.ceil(math.log2(self.q)) - 1, self.base)
+        raw_decrypt = mod_matmul(CT[:, row, :], secret_key * scale, self.q)[:, 0]
+
+        return (raw_decrypt > self.q / 4) & (raw_decrypt < 3 * self.q / 4)
+
+    def evaluate(self, binary_circuit: CircuitType, inputs: List[CypheredTextType],
+                 workers: int = 1) -> CypheredTextType:
         """
         Evaluates a binary circuit for a given set of cyphered text inputs.
 
         :param binary_circuit: List of circuit depths where each depth consists of strings with gate names:
-                               AND, NAND, OR, XOR, NOT, or WIRE (no gate).
+                               AND, NAND, OR, XOR, NOT, or WIRE (no gate), a FHECircuitDAG netlist, or a circuit
+                               compiled with compile.
         :param inputs: Cyphered texts for which to evaluate the circuit.
+        :param workers: Number of threads evaluating the independent gates of each level concurrently.
         :return: The cyphered text result after evaluating the circuit.
         """
 
-        circuit = FHEBinaryCircuit[CypheredTextType](self.G, lambda ct1, ct2: self._mul(ct1, ct2))
-
-        for depth in binary_circuit:
-            circuit.add_depth(depth)
-
-        return circuit.evaluate(inputs)
+        return self.circuit.evaluate_compiled(self.compile(binary_circuit), inputs, workers)
 
     def _mul(self, CT1: CypheredTextType, CT2: CypheredTextType) -> CypheredTextType:
         """
         Internal method for multiplication operation.
 
-        :param CT1: First cyphered text for multiplication.
-        :param CT2: Second cyphered text for multiplication.
+        Stacks of k cyphered texts of shape (k, m, n) are multiplied pairwise with a single bit decomposition and a
+        single batched matrix multiplication, split into chunks of at most MUL_CHUNK_ELEMENTS decomposed coefficients.
+        A single cyphered text, e.g. the output of a constant gate, is broadcast against a stack. Operands are only
+        reduced when their tracked interval requires it.
+
+        :param CT1: First cyphered text (or stack of cyphered texts) for multiplication.
+        :param CT2: Second cyphered text (or stack of cyphered texts) for multiplication.
         :return: The result of the multiplication operation.
         """
 
-        if CT1.shape != (self.m, self.n):
+        if CT1.shape[-2:] != (self.m, self.n):
             raise ValueError(
                 f"Invalid dimensions for the cyphered text: should be a vector of {self.m} x {self.n} elements (input "
-                f"is {CT1.shape[0]} x {CT1.shape[1]})")
+                f"is {' x '.join(str(d) for d in CT1.shape)})")
 
-        if CT2.shape != (self.m, self.n):
+        if CT2.shape[-2:] != (self.m, self.n):
             raise ValueError(
                 f"Invalid dimensions for the cyphered text: should be a vector of {self.m} x {self.n} elements (input "
-                f"is {CT2.shape[0]} x {CT2.shape[1]})")
-
-        CT1_bit = bit_decomp(CT1, self.q)
-        return (CT1_bit @ CT2) % self.q
+                f"is {' x '.join(str(d) for d in CT2.shape)})")
+        try:
+            shape = np.broadcast_shapes(CT1.shape, CT2.shape)
+        except ValueError:
+            raise ValueError(f"Cannot multiply stacks of cyphered texts of shapes {CT1.shape} and {CT2.shape}!")
+
+        # The low log_q bits of any integer are its residue modulo a power of two, other moduli and signed digits need
+        # reduced values
+        profiler = self.profiler
+        if self.base != DEFAULT_BASE or not is_power_of_two(self.q):
+            CT1 = profiled(profiler, "reduce", as_ciphertext(CT1, self.q).reduced)
+        if CT1.shape != shape or CT2.shape != shape:
+            # Read-only views keeping the tracked intervals of cyphered texts
+            CT1 = np.broadcast_to(CT1, shape, subok=True)
+            CT2 = np.broadcast_to(CT2, shape, subok=True)
+
+        chunk = max(1, MUL_CHUNK_ELEMENTS // (self.m * self.m))
+        if CT1.ndim > 2 and math.prod(CT1.shape[:-2]) > chunk:
+            CT1_stack = CT1.reshape((-1, self.m, self.n))
+            CT2_stack = CT2.reshape((-1, self.m, self.n))
+            result = np.concatenate([profiled(profiler, "matmul", mod_matmul,
+                                              profiled(profiler, "bit_decomp", bit_decomp, CT1_stack[i:i + chunk],
+                                                       self.q, self.base), CT2_stack[i:i + chunk], self.q)
+                                     for i in range(0, CT1_stack.shape[0], chunk)])
+            return LWECiphertext(result.reshape(CT1.shape), self.q, 0, self.q - 1)
+
+        CT1_bit = profiled(profiler, "bit_decomp", bit_decomp, CT1, self.q, self.base)
+        return LWECiphertext(profiled(profiler, "matmul", mod_matmul, CT1_bit, CT2, self.q), self.q, 0, self.q - 1)
+
+    def _parameters(self) -> Tuple[int, int]:
+        return self.q, self.n
+
+    def _ciphertext_shape(self) -> Tuple[int, ...]:
+        return self.m, self.n
+
+    def _to_array(self, value: np.ndarray) -> np.ndarray:
+        return np.asarray(value)
+
+    def _from_array(self, array: np.ndarray, kind: int) -> np.ndarray:
+        # Serialized coefficients are reduced
+        if kind == CIPHERTEXT_KIND:
+            if array.shape[-2:] != (self.m, self.n):
+                raise ValueError(f"Invalid dimensions for the cyphered text: should be a matrix of {self.m} x {self.n} "
+                                 f"elements (input is {' x '.join(str(d) for d in array.shape)})!")
+            return LWECiphertext(array, self.q, 0, self.q - 1)
+        return array
@@ -0,0 +1,194 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Values whose magnitude reaches this bound are reduced before being added, so that sums cannot overflow int64
+OVERFLOW_BOUND = 1 << 62
+
+
+def is_power_of_two(q: int) -> bool:
+    return q > 0 and q & (q - 1) == 0
+
+
+def mod_reduce(matrix: np.ndarray, q: int) -> np.ndarray:
+    """
+    Reduces integers modulo q, with a bitwise AND instead of a division when q is a power of two.
+
+    :param matrix: integer array, possibly negative.
+    :param q: modulus.
+    :return: the values in [0, q).
+    """
+    if is_power_of_two(q):
+        return np.bitwise_and(matrix, q - 1)
+    return np.remainder(matrix, q)
+
+
+class LWECiphertext(np.ndarray):
+    """
+    Cyphered text (or stack of cyphered texts) of LWEGSW, tracking an interval containing all its coefficients.
+
+    XOR, NOT and OR gates add and subtract cyphered texts without reducing them. The interval of a sum or a
+    difference is computed from the intervals of its operands without reading the coefficients, so that a cyphered
+    text is only reduced when needed: before a sum could overflow int64, or before a bit decomposition which
+    requires coefficients in [0, q). Other operations return plain arrays. In-place operations and assignments widen
+    the interval of the cyphered text they write to, and of the cyphered texts it is a view of, or forget it when it
+    cannot be computed from the operands.
+
+    Attributes:
+        q: Modulus of the scheme.
+        low: Lower bound of the coefficients.
+        high: Upper bound of the coefficients.
+    """
+
+    q: int
+    low: int
+    high: int
+
+    def __new__(cls, matrix: np.ndarray, q: int, low: Optional[int] = None, high: Optional[int] = None):
+        """
+        :param matrix: coefficients of the cyphered text.
+        :param q: modulus of the scheme.
+        :param low: lower bound of the coefficients, computed from them if not given.
+        :param high: upper bound of the coefficients, computed from them if not given.
+        """
+        ct = np.asarray(matrix).view(cls)
+        ct.q = q
+        if low is None or high is None:
+            low, high = value_interval(matrix)
+        ct.low, ct.high = int(low), int(high)
+        return ct
+
+    def __array_finalize__(self, obj):
+        # Views and copies hold a subset of the coefficients of their base
+        self.q = getattr(obj, 'q', None)
+        self.low = getattr(obj, 'low', None)
+        self.high = getattr(obj, 'high', None)
+
+    def __reduce__(self):
+        # Pickles the tracked attributes along with the array, for instance to send cyphered texts to other processes
+        reconstruct, arguments, state = super().__reduce__()
+        return reconstruct, arguments, (state, self.q, self.low, self.high)
+
+    def __setstate__(self, state):
+        state, self.q, self.low, self.high = state
+        super().__setstate__(state)
+
+    def is_reduced(self) -> bool:
+        """
+        Returns True if the coefficients are known to lie in [0, q).
+        """
+        return self.low is not None and self.low >= 0 and self.high < self.q
+
+    def reduced(self) -> 'LWECiphertext':
+        """
+        Returns the cyphered text with its coefficients in [0, q), reducing it only if needed.
+        """
+        if self.is_reduced():
+            return self
+        return LWECiphertext(mod_reduce(self.view(np.ndarray), self.q), self.q, 0, self.q - 1)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        _widen_interval(self, *value_interval(value))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        tracked = method == '__call__' and ufunc in (np.add, np.subtract, np.negative)
+        if tracked:
+            intervals = [value_interval(x) for x in inputs]
+            low, high = _combine_intervals(ufunc, intervals)
+            if max(-low, high) >= OVERFLOW_BOUND:
+                inputs = tuple(x.reduced() if isinstance(x, LWECiphertext) else x for x in inputs)
+                low, high = _combine_intervals(ufunc, [value_interval(x) for x in inputs])
+
+        arrays = [x.view(np.ndarray) if isinstance(x, LWECiphertext) else x for x in inputs]
+        outputs = kwargs.get('out')
+        if outputs is not None:
+            kwargs['out'] = tuple(x.view(np.ndarray) if isinstance(x, LWECiphertext) else x for x in outputs)
+        result = getattr(ufunc, method)(*arrays, **kwargs)
+
+        if outputs is not None:
+            # The coefficients of the outputs were overwritten: their tracked intervals, and those of the cyphered
+            # texts they are views of, must contain the new coefficients
+            for out in outputs:
+                if not isinstance(out, LWECiphertext):
+                    continue
+                if tracked and 'where' not in kwargs:
+                    # All the coefficients of the output were overwritten
+                    out.low, out.high = int(low), int(high)
+                    _widen_interval(out.base, low, high)
+                elif tracked:
+                    _widen_interval(out, low, high)
+                else:
+                    _forget_interval(out)
+            return outputs[0] if len(outputs) == 1 else outputs
+        if not tracked:
+            return result
+        return LWECiphertext(result, self.q, low, high)
+
+
+def as_ciphertext(matrix: np.ndarray, q: int) -> LWECiphertext:
+    """
+    Returns an array as a cyphered text, computing its interval if it is not tracked yet.
+    """
+    if isinstance(matrix, LWECiphertext) and matrix.low is not None:
+        return matrix
+    return LWECiphertext(matrix, q)
+
+
+def value_interval(matrix) -> Tuple[int, int]:
+    """
+    Returns an interval containing the values of an array: the tracked interval of a cyphered text, or the actual
+    minimum and maximum of other arrays.
+    """
+    if isinstance(matrix, LWECiphertext) and matrix.low is not None:
+        return matrix.low, matrix.high
+    matrix = np.asarray(matrix)
+    if matrix.size == 0:
+        return 0, 0
+    return int(matrix.min()), int(matrix.max())
+
+
+def stack_ciphertexts(cts: List[np.ndarray]) -> LWECiphertext:
+    """
+    Stacks cyphered texts, the interval of the stack being the union of their intervals.
+
+    :param cts: cyphered texts of the same shape.
+    :return: the stack of cyphered texts.
+    """
+    intervals = [value_interval(ct) for ct in cts]
+    q = next((ct.q for ct in cts if isinstance(ct, LWECiphertext)), None)
+    return LWECiphertext(np.stack([np.asarray(ct) for ct in cts]), q, min(low for low, _ in intervals),
+                         max(high for _, high in intervals))
+
+
+def _widen_interval(ct: Optional[np.ndarray], low: int, high: int) -> None:
+    """
+    Widens the tracked intervals of a cyphered text and of the cyphered texts it is a view of, after some of its
+    coefficients were overwritten with values in [low, high].
+    """
+    while isinstance(ct, LWECiphertext):
+        if ct.low is not None:
+            ct.low, ct.high = min(ct.low, int(low)), max(ct.high, int(high))
+        ct = ct.base
+
+
+def _forget_interval(ct: Optional[np.ndarray]) -> None:
+    """
+    Forgets the tracked intervals of a cyphered text and of the cyphered texts it is a view of, after some of its
+    coefficients were overwritten by an operation which is not tracked. They are computed again when needed.
+    """
+    while isinstance(ct, LWECiphertext):
+        ct.low = ct.high = None
+        ct = ct.base
+
+
+def _combine_intervals(ufunc, intervals: List[Tuple[int, int]]) -> Tuple[int, int]:
+    """
+    Computes the interval of the result of an addition, a subtraction or a negation.
+    """
+    if ufunc is np.negative:
+        return -intervals[0][1], -intervals[0][0]
+    (low_a, high_a), (low_b, high_b) = intervals
+    if ufunc is np.add:
+        return low_a + low_b, high_a + high_b
+    return low_a - high_b, high_a - low_b
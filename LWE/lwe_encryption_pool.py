@@ -0,0 +1,150 @@
+import queue
+import threading
+from typing import Optional
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW, CypheredTextType, PublicKeyType
+from LWE.lwe_ciphertext import LWECiphertext
+
+# Default number of precomputed encryptions of zero
+DEFAULT_POOL_SIZE = 256
+# Default number of encryptions of zero computed together by the background thread
+DEFAULT_REFILL_BATCH = 16
+
+
+class ZeroEncryptionPool:
+    """
+    Pool of encryptions of zero precomputed ahead of time, splitting LWEGSW encryption into an offline and an online
+    phase.
+
+    A cyphered text T @ public_key + F (+ G) only depends on the bit through G: encryptions of zero are computed by a
+    background thread, in batches, whenever the pool is not full, and encrypting a bit online takes an encryption of
+    zero out of the pool and adds G to it when the bit is 1. Each encryption of zero is used once. When the pool is
+    empty, the bit is encrypted directly.
+
+    Attributes:
+        scheme: The scheme, with generated keys.
+        public_key: Public key used to encrypt.
+        size: Largest number of precomputed encryptions of zero.
+        refill_batch: Number of encryptions of zero computed together.
+        hits: Number of bits encrypted with a precomputed encryption of zero.
+        misses: Number of bits encrypted directly because the pool was empty.
+
+    Methods:
+        start: Starts the background thread refilling the pool.
+        stop: Stops the background thread.
+        refill: Fills the pool in the calling thread.
+        encrypt: Encrypts a bit.
+        encrypt_many: Encrypts an array of bits.
+    """
+
+    def __init__(self, scheme: LWEGSW, public_key: PublicKeyType, size: int = DEFAULT_POOL_SIZE,
+                 refill_batch: int = DEFAULT_REFILL_BATCH, start: bool = True):
+        """
+        :param scheme: scheme with generated keys.
+        :param public_key: public key used to encrypt, or a compressed public key, expanded once.
+        :param size: largest number of precomputed encryptions of zero.
+        :param refill_batch: number of encryptions of zero computed together.
+        :param start: whether to start the background thread right away.
+        """
+        if size < 1 or refill_batch < 1:
+            raise ValueError("The size of the pool and of the refill batches must be positive!")
+        self.scheme = scheme
+        self.public_key = scheme.expand(public_key)
+        self.size = size
+        self.refill_batch = refill_batch
+        self.hits = 0
+        self.misses = 0
+        self._zeros: queue.Queue = queue.Queue(maxsize=size)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if start:
+            self.start()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of precomputed encryptions of zero available.
+        """
+        return self._zeros.qsize()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refill_forever, name="zero-encryption-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> 'ZeroEncryptionPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def refill(self) -> None:
+        """
+        Fills the pool up to its size in the calling thread, e.g. while the traffic is low.
+        """
+        while not self._zeros.full():
+            count = min(self.refill_batch, self.size - self._zeros.qsize())
+            for ct in self._encrypt_zeros(max(count, 1)):
+                try:
+                    self._zeros.put_nowait(ct)
+                except queue.Full:
+                    return
+
+    def encrypt(self, bit: bool) -> CypheredTextType:
+        """
+        Encrypts a bit with a precomputed encryption of zero, or directly when the pool is empty.
+
+        :param bit: the boolean bit to be encrypted.
+        :return: a cyphered text representing the bit.
+        """
+        try:
+            ct = self._zeros.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return self.scheme.encrypt(self.public_key, bit)
+        self.hits += 1
+        return ct + self.scheme.G if bit else ct
+
+    def encrypt_many(self, bits: np.ndarray) -> CypheredTextType:
+        """
+        Encrypts an array of bits into a (k, m, n) stack of cyphered texts, the bits missing precomputed encryptions
+        of zero being encrypted together directly.
+        """
+        bits = np.asarray(bits, dtype=bool).reshape(-1)
+        zeros = []
+        while len(zeros) < bits.shape[0]:
+            try:
+                zeros.append(self._zeros.get_nowait())
+            except queue.Empty:
+                break
+        self.hits += len(zeros)
+        self.misses += bits.shape[0] - len(zeros)
+        if len(zeros) < bits.shape[0]:
+            zeros.extend(self._encrypt_zeros(bits.shape[0] - len(zeros)))
+        cts = np.stack([np.asarray(ct) for ct in zeros])
+        cts[bits] += np.asarray(self.scheme.G)
+        return LWECiphertext(cts, self.scheme.q, 0, self.scheme.q - 1 + self.scheme.G.high)
+
+    def _encrypt_zeros(self, count: int):
+        return list(self.scheme.encrypt_many(self.public_key, np.zeros(count, dtype=bool)))
+
+    def _refill_forever(self) -> None:
+        while not self._stopped.is_set():
+            for ct in self._encrypt_zeros(self.refill_batch):
+                # Waits for room in the pool, checking regularly whether the pool was stopped
+                while not self._stopped.is_set():
+                    try:
+                        self._zeros.put(ct, timeout=0.05)
+                        break
+                    except queue.Full:
+                        continue
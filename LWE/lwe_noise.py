@@ -0,0 +1,223 @@
+import math
+from typing import Callable, List, Tuple, Union
+
+from FHECircuitDAG import NAND_OPCODE, AND_OPCODE, OR_OPCODE, XOR_OPCODE, NOT_OPCODE, WIRE_OPCODE, ZERO_OPCODE, \
+    ONE_OPCODE
+from FHECompiledCircuit import CircuitType, compile_circuit
+from error_samplers import ErrorSampler, as_sampler
+from gadget import DEFAULT_BASE, decryption_row, gadget_digits
+
+# Default probability that an output of the circuit decrypts to the wrong bit
+DEFAULT_FAILURE_PROBABILITY = 2.0 ** -40
+# Largest modulus considered when recommending parameters
+MAX_LOG_Q = 62
+
+
+class NoiseEstimate:
+    """
+    Noise of a cyphered text of LWEGSW, for the row read by decryption.
+
+    Gates do not reduce the plaintext modulo 2: a cyphered text encrypts an integer whose parity is the bit, and the
+    integer scales the noise of multiplications. The estimate therefore also bounds the plaintext integer.
+
+    The noise of a multiplication sums noises weighted by the digits of a decomposition, whose mean is not zero (bits
+    are 1 half of the time, signed digits of a larger base are -1/2 on average): every row of the result shares the
+    mean of the summed noises, so the rows are correlated and the covariance between rows has to be tracked as well.
+
+    Attributes:
+        variance: Variance of the noise of a row, for the average case.
+        covariance: Covariance between the noises of two different rows.
+        bound: Bound of the absolute value of the noise, for the worst case.
+        message: Bound of the absolute value of the encrypted integer.
+    """
+
+    def __init__(self, variance: float, covariance: float, bound: float, message: int):
+        """
+        :param variance: variance of the noise.
+        :param covariance: covariance between the noises of two rows.
+        :param bound: bound of the noise.
+        :param message: bound of the encrypted integer.
+        """
+        self.variance = variance
+        self.covariance = covariance
+        self.bound = bound
+        self.message = message
+
+    def failure_probability(self, q: int, worst_case: bool = False, base: int = DEFAULT_BASE) -> float:
+        """
+        Estimates the probability that the cyphered text decrypts to the wrong bit: decryption fails when the noise,
+        multiplied by the scale of the row read by decryption (see gadget.decryption_row), reaches q / 4.
+
+        :param q: modulus of the scheme.
+        :param worst_case: whether to use the noise bound instead of the noise variance.
+        :param base: decomposition base of the scheme.
+        :return: 0 or 1 in the worst case, otherwise the Gaussian tail probability of the noise.
+        """
+        threshold = q / 4 / decryption_row(math.ceil(math.log2(q)) - 1, base)[1]
+        if worst_case:
+            return float(self.bound >= threshold)
+        if self.variance == 0:
+            return 0.0
+        return math.erfc(threshold / math.sqrt(2 * self.variance))
+
+    def __repr__(self):
+        return f"NoiseEstimate(std={math.sqrt(self.variance):.1f}, bound={self.bound:.0f}, message={self.message})"
+
+
+def fresh_noise(q: int, n: int, error_function: Union[ErrorSampler, Callable[[], int]],
+                base: int = DEFAULT_BASE) -> NoiseEstimate:
+    """
+    Estimates the noise of a fresh encryption CT = T @ public_key + F (+ G), whose noise is T @ e + F @ secret_key,
+    T, F, e and the secret key s all following the error distribution.
+
+    :param q: modulus of the scheme.
+    :param n: number of columns of the matrices.
+    :param error_function: error sampler (or error function) of the scheme.
+    :param base: decomposition base of the scheme.
+    :return: the noise of a fresh cyphered text.
+    """
+    sampler = as_sampler(error_function)
+    m = n * gadget_digits(q, base)
+    variance, bound = sampler.variance(), sampler.bound()
+    # The rows of T are independent and centered, so the rows of a fresh noise are uncorrelated
+    return NoiseEstimate(m * variance ** 2 + variance + (n - 1) * variance ** 2, 0.0,
+                         m * bound ** 2 + bound + (n - 1) * bound ** 2, 1)
+
+
+def estimate_noise(binary_circuit: CircuitType, q: int, n: int,
+                   error_function: Union[ErrorSampler, Callable[[], int]],
+                   base: int = DEFAULT_BASE) -> List[NoiseEstimate]:
+    """
+    Propagates the noise of fresh encryptions through a circuit evaluated by LWEGSW.
+
+    XOR and NOT gates add noises. A multiplication bit_decomp(CT1) @ CT2 has noise mu2 * e1 + bit_decomp(CT1) @ e2:
+    the noise of the first operand is scaled by the integer encrypted by the second, and the noise of the second one
+    is summed over the m digits of a row of the decomposition, weighted by them.
+
+    :param binary_circuit: list of circuit depths where each depth consists of gate names, a FHECircuitDAG netlist,
+                           or a compiled circuit.
+    :param q: modulus of the scheme.
+    :param n: number of columns of the matrices.
+    :param error_function: error sampler (or error function) of the scheme.
+    :param base: decomposition base of the scheme.
+    :return: the noise estimate of each output of the circuit.
+    """
+    compiled = compile_circuit(binary_circuit)
+    m = n * gadget_digits(q, base)
+    fresh = fresh_noise(q, n, error_function, base)
+
+    noises = [fresh] * compiled.inputs + [None] * (compiled.slots - compiled.inputs)
+    for level in compiled.levels:
+        for opcode, input_slots, output_slot in level:
+            noises[output_slot] = gate_noise(opcode, [noises[slot] for slot in input_slots], m, base)
+
+    return [noises[slot] for slot in compiled.output_slots]
+
+
+def gate_noise(opcode: int, inputs: List[NoiseEstimate], m: int, base: int = DEFAULT_BASE) -> NoiseEstimate:
+    """
+    Computes the noise of the output of a gate.
+
+    :param opcode: opcode of the gate.
+    :param inputs: noise of the inputs of the gate.
+    :param m: number of rows of the cyphered texts.
+    :param base: decomposition base of the scheme.
+    :return: the noise of the output.
+    """
+    if opcode == ZERO_OPCODE:
+        return NoiseEstimate(0.0, 0.0, 0.0, 0)
+    if opcode == ONE_OPCODE:
+        return NoiseEstimate(0.0, 0.0, 0.0, 1)
+    if opcode == WIRE_OPCODE:
+        return inputs[0]
+    if opcode == NOT_OPCODE:
+        return NoiseEstimate(inputs[0].variance, inputs[0].covariance, inputs[0].bound, inputs[0].message + 1)
+
+    a, b = inputs
+    if opcode == XOR_OPCODE:
+        return NoiseEstimate(a.variance + b.variance, a.covariance + b.covariance, a.bound + b.bound,
+                             a.message + b.message)
+
+    # OR adds both operands to the product: the first noise is scaled by mu2 + 1 and one more row of the second
+    # noise is summed
+    extra = 1 if opcode == OR_OPCODE else 0
+    mean, square, largest = _digit_moments(base)
+    scale = (b.message + extra) ** 2
+    summed = m * mean + extra
+    squares = m * square + extra
+    shared = m * mean ** 2
+    variance = scale * a.variance + squares * b.variance + (summed ** 2 - squares) * b.covariance
+    covariance = scale * a.covariance + shared * b.variance + (summed ** 2 - shared) * b.covariance
+    bound = (b.message + extra) * a.bound + (m * largest + extra) * b.bound
+    if opcode == AND_OPCODE:
+        message = a.message * b.message
+    elif opcode == NAND_OPCODE:
+        message = a.message * b.message + 1
+    else:
+        message = a.message * b.message + a.message + b.message
+    return NoiseEstimate(variance, covariance, bound, message)
+
+
+def _digit_moments(base: int) -> Tuple[float, float, float]:
+    """
+    Returns the mean, the mean square and the largest absolute value of the digits of a decomposition: bits for the
+    binary gadget, otherwise signed digits uniform in [-B / 2, B / 2).
+    """
+    if base == DEFAULT_BASE:
+        return 0.5, 0.5, 1
+    return -0.5, (base ** 2 + 2) / 12, base / 2 + 1
+
+
+def failure_probability(binary_circuit: CircuitType, q: int, n: int,
+                        error_function: Union[ErrorSampler, Callable[[], int]], worst_case: bool = False,
+                        base: int = DEFAULT_BASE) -> float:
+    """
+    Estimates the probability that at least one output of a circuit decrypts to the wrong bit.
+
+    :param binary_circuit: circuit to evaluate.
+    :param q: modulus of the scheme.
+    :param n: number of columns of the matrices.
+    :param error_function: error sampler (or error function) of the scheme.
+    :param worst_case: whether to use the noise bounds instead of the noise variances.
+    :param base: decomposition base of the scheme.
+    :return: the union bound of the failure probabilities of the outputs.
+    """
+    return min(1.0, sum(noise.failure_probability(q, worst_case, base)
+                        for noise in estimate_noise(binary_circuit, q, n, error_function, base)))
+
+
+def recommend_parameters(binary_circuit: CircuitType, dimensions: Union[int, List[int]],
+                         error_function: Union[ErrorSampler, Callable[[], int]],
+                         target_failure: float = DEFAULT_FAILURE_PROBABILITY,
+                         worst_case: bool = False, base: int = DEFAULT_BASE) -> Tuple[int, int]:
+    """
+    Recommends the smallest parameters evaluating a circuit with a decryption failure probability below a target.
+
+    Decryption reads the row holding q / 2, so only powers of two are considered for q. For each dimension, the
+    smallest modulus meeting the target is found, and the parameters giving the smallest cyphered texts
+    (m x n = n^2 * digits coefficients) are returned.
+
+    :param binary_circuit: circuit to evaluate.
+    :param dimensions: dimension n, or candidate dimensions, allowed by the security requirements.
+    :param error_function: error sampler (or error function) of the scheme.
+    :param target_failure: largest acceptable probability that an output decrypts to the wrong bit.
+    :param worst_case: whether to use the noise bounds, making decryption failures impossible, instead of the noise
+                       variances.
+    :param base: decomposition base of the scheme.
+    :return: the modulus q and the dimension n, in the order expected by LWEGSW.keygen.
+    """
+    sampler = as_sampler(error_function)
+    compiled = compile_circuit(binary_circuit)
+
+    best = None
+    for n in ([dimensions] if isinstance(dimensions, int) else dimensions):
+        for log_q in range(2, MAX_LOG_Q + 1):
+            if failure_probability(compiled, 1 << log_q, n, sampler, worst_case, base) <= target_failure:
+                size = n * n * gadget_digits(1 << log_q, base)
+                if best is None or size < best[0]:
+                    best = (size, 1 << log_q, n)
+                break
+
+    if best is None:
+        raise ValueError(f"No modulus below 2^{MAX_LOG_Q} meets the target failure probability!")
+    return best[1], best[2]
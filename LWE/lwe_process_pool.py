@@ -0,0 +1,266 @@
+import math
+import os
+import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from FHECompiledCircuit import CircuitType, FHECompiledCircuit
+from error_samplers import CallableSampler
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_ciphertext import LWECiphertext, mod_reduce
+
+# Default number of records evaluated together by a worker
+DEFAULT_CHUNK_SIZE = 16
+
+ArraySpecType = Tuple[str, Tuple[int, ...]]
+
+# State of a worker process, set once by _init_worker
+_worker: Dict = dict()
+
+
+class SharedArray:
+    """
+    Int64 array allocated in shared memory, which worker processes map without copying it.
+
+    Attributes:
+        shm: Shared memory block holding the array.
+        array: View of the shared memory block.
+    """
+
+    def __init__(self, shape: Tuple[int, ...]):
+        """
+        :param shape: shape of the array.
+        """
+        self.shm = shared_memory.SharedMemory(create=True, size=max(8 * math.prod(shape), 1))
+        self.array = np.ndarray(shape, dtype=np.int64, buffer=self.shm.buf)
+
+    def spec(self) -> ArraySpecType:
+        """
+        Returns the picklable name and shape of the array, to map it in another process.
+        """
+        return self.shm.name, self.array.shape
+
+    def close(self) -> None:
+        """
+        Frees the shared memory block, views of the array must not be used anymore.
+        """
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+class LWEProcessPool:
+    """
+    Pool of worker processes evaluating circuits (and encrypting bits) of LWEGSW on many records.
+
+    The gadget matrix and the public key are placed in shared memory once, and each worker sets up its scheme from
+    the picklable parameters of the scheme when it starts. Records are given as a (k, inputs, m, n) tensor in shared
+    memory, and the workers write the (k, outputs, m, n) tensor of the outputs in shared memory as well: tasks only
+    carry the names of the blocks and ranges of records, so no cyphered text is pickled. Each worker evaluates its
+    records by chunks, the inputs of a chunk being stacked.
+
+    Attributes:
+        scheme: The scheme, with generated keys.
+        processes: Number of worker processes.
+
+    Methods:
+        allocate: Allocates a tensor in shared memory, to fill the records without copying them.
+        evaluate_many: Evaluates a circuit on each record of a tensor.
+        encrypt_many: Encrypts records of bits across the workers.
+        close: Stops the workers and frees the shared memory.
+    """
+
+    def __init__(self, scheme: LWEGSW, public_key: Optional[np.ndarray] = None, processes: Optional[int] = None):
+        """
+        :param scheme: scheme with generated keys.
+        :param public_key: optional public key, or compressed public key, needed to encrypt in the workers.
+        :param processes: number of worker processes, the number of cores by default.
+        """
+        self.scheme = scheme
+        self.processes = processes or os.cpu_count()
+        if self.processes < 1:
+            raise ValueError("The number of processes must be positive!")
+
+        self._G = SharedArray(scheme.G.shape)
+        self._G.array[:] = scheme.G
+        self._public_key = None
+        if public_key is not None:
+            # The workers share the expanded public key
+            public_key = scheme.expand(public_key)
+            self._public_key = SharedArray(public_key.shape)
+            self._public_key.array[:] = public_key
+
+        self._executor = ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                             initargs=(_picklable_parameters(scheme), self._G.spec(),
+                                                       self._public_key.spec() if public_key is not None else None))
+
+    def allocate(self, records: int, cts: int) -> SharedArray:
+        """
+        Allocates a (records, cts, m, n) tensor in shared memory. Records filled in place (reduced modulo q) are not
+        copied by evaluate_many, and the tensor must be freed with close once used.
+        """
+        return SharedArray((records, cts, self.scheme.m, self.scheme.n))
+
+    def evaluate_many(self, binary_circuit: CircuitType, inputs, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Evaluates a circuit on each record of a tensor.
+
+        :param binary_circuit: circuit to evaluate.
+        :param inputs: (k, inputs, m, n) tensor of cyphered texts, as an array (copied to shared memory) or a
+                       SharedArray returned by allocate or encrypt_many.
+        :param chunk_size: number of records evaluated together by a worker.
+        :return: the (k, outputs, m, n) tensor of the cyphered texts of the outputs, reduced modulo q.
+        """
+        if chunk_size < 1:
+            raise ValueError("The size of the chunks must be positive!")
+        compiled = self.scheme.compile(binary_circuit)
+        shared_inputs = inputs if isinstance(inputs, SharedArray) else None
+        if shared_inputs is None:
+            inputs = np.asarray(inputs)
+            if inputs.ndim != 4:
+                raise ValueError("The records must be a (k, inputs, m, n) tensor!")
+            shared_inputs = SharedArray(inputs.shape)
+            shared_inputs.array[:] = mod_reduce(inputs, self.scheme.q)
+
+        k, count, m, n = shared_inputs.array.shape
+        try:
+            if count != compiled.inputs or (m, n) != (self.scheme.m, self.scheme.n):
+                raise ValueError(f"The records must be a (k, {compiled.inputs}, {self.scheme.m}, {self.scheme.n}) "
+                                 f"tensor (input is {k} x {count} x {m} x {n})")
+            outputs = SharedArray((k, compiled.outputs, m, n))
+            try:
+                futures = [self._executor.submit(_evaluate_records, start, min(start + chunk_size, k), compiled,
+                                                 shared_inputs.spec(), outputs.spec())
+                           for start in range(0, k, chunk_size)]
+                for future in futures:
+                    future.result()
+                return outputs.array.copy()
+            finally:
+                outputs.close()
+        finally:
+            if shared_inputs is not inputs:
+                shared_inputs.close()
+
+    def encrypt_many(self, bits: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SharedArray:
+        """
+        Encrypts records of bits across the workers, with the public key given to the pool.
+
+        :param bits: (k, inputs) array of the bits of k records, or array of k bits.
+        :param chunk_size: number of records encrypted together by a worker.
+        :return: the (k, inputs, m, n) tensor of the cyphered texts in shared memory, which can be given to
+                 evaluate_many without being copied, and must be freed with close.
+        """
+        if self._public_key is None:
+            raise ValueError("The pool needs a public key to encrypt!")
+        if chunk_size < 1:
+            raise ValueError("The size of the chunks must be positive!")
+        bits = np.asarray(bits, dtype=bool)
+        bits = bits.reshape((bits.shape[0], -1))
+        cts = self.allocate(*bits.shape)
+        try:
+            futures = [self._executor.submit(_encrypt_bits, start, bits[start:start + chunk_size], cts.spec())
+                       for start in range(0, bits.shape[0], chunk_size)]
+            for future in futures:
+                future.result()
+        except BaseException:
+            cts.close()
+            raise
+        return cts
+
+    def close(self) -> None:
+        """
+        Stops the workers and frees the gadget matrix and the public key.
+        """
+        self._executor.shutdown()
+        self._G.close()
+        if self._public_key is not None:
+            self._public_key.close()
+
+    def __enter__(self) -> 'LWEProcessPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _picklable_parameters(scheme: LWEGSW) -> Tuple:
+    """
+    Returns the parameters of a scheme to send to the workers, without the error sampler if it cannot be pickled:
+    such workers can only evaluate circuits.
+    """
+    q, n, sampler, base = scheme.parameters()
+    if isinstance(sampler, CallableSampler):
+        try:
+            pickle.dumps(sampler)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            sampler = None
+    return q, n, sampler, base
+
+
+def _attach(spec: ArraySpecType) -> np.ndarray:
+    """
+    Maps an array allocated in shared memory by the parent process.
+    """
+    name, shape = spec
+    # Workers share the resource tracker of the parent process, which unlinks the block
+    shm = shared_memory.SharedMemory(name=name)
+    _worker.setdefault('blocks', dict())[name] = shm
+    return np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+
+
+def _detach(spec: ArraySpecType) -> None:
+    try:
+        _worker['blocks'].pop(spec[0]).close()
+    except BufferError:
+        # Views are still held by the traceback of an error, the block is closed when the worker exits
+        pass
+
+
+def _init_worker(parameters: Tuple, G_spec: ArraySpecType, public_key_spec: Optional[ArraySpecType]) -> None:
+    q, n, sampler, base = parameters
+    # Workers would otherwise draw the same errors and masks from copies of the same generators: the generator of the
+    # sampler, and the global generators used by uniform matrices and by error functions (see CallableSampler)
+    np.random.seed()
+    random.seed()
+    if sampler is not None:
+        sampler.rng = np.random.default_rng()
+    scheme = LWEGSW()
+    scheme.setup((q, n, sampler, base), _attach(G_spec))
+    _worker['scheme'] = scheme
+    _worker['public_key'] = _attach(public_key_spec) if public_key_spec is not None else None
+
+
+def _evaluate_records(start: int, stop: int, compiled: FHECompiledCircuit, inputs_spec: ArraySpecType,
+                      outputs_spec: ArraySpecType) -> None:
+    scheme = _worker['scheme']
+    inputs, outputs = _attach(inputs_spec), _attach(outputs_spec)
+    try:
+        cts = [LWECiphertext(inputs[start:stop, i], scheme.q, 0, scheme.q - 1) for i in range(compiled.inputs)]
+        results: List[np.ndarray] = scheme.evaluate(compiled, cts)
+        for i, result in enumerate(results):
+            # Outputs which do not depend on the inputs are single cyphered texts and are broadcast
+            outputs[start:stop, i] = mod_reduce(np.asarray(result), scheme.q)
+        # Views of the blocks must be dropped before closing them
+        del cts, results
+    finally:
+        del inputs, outputs
+        _detach(inputs_spec)
+        _detach(outputs_spec)
+
+
+def _encrypt_bits(start: int, bits: np.ndarray, cts_spec: ArraySpecType) -> None:
+    scheme = _worker['scheme']
+    if scheme.error_function is None:
+        raise ValueError("The error sampler of the scheme cannot be sent to worker processes!")
+    cts = _attach(cts_spec)
+    try:
+        cts[start:start + bits.shape[0]] = scheme.encrypt_many(_worker['public_key'], bits).reshape(
+            bits.shape + (scheme.m, scheme.n))
+    finally:
+        del cts
+        _detach(cts_spec)
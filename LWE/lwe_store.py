@@ -0,0 +1,200 @@
+import os
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from FHECompiledCircuit import CircuitType
+from serialization import CIPHERTEXT_KIND, FORMAT_VERSION, SerializationHeader, coefficient_bits, read_header, \
+    scheme_id
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_ciphertext import LWECiphertext, as_ciphertext
+
+# Suffix of the sidecar file holding the header of a store
+HEADER_SUFFIX = ".header"
+# Number of cyphered texts per chunk when iterating over stores
+DEFAULT_CHUNK_SIZE = 256
+
+
+class LWECiphertextStore:
+    """
+    On-disk array of cyphered texts of LWEGSW, for datasets larger than the memory.
+
+    The cyphered texts are stored reduced modulo q as a (k, m, n) tensor of little-endian int64 in a raw file mapped
+    with np.memmap, and the parameters of the scheme are stored in a sidecar header (see serialization.py). Indexing
+    the store returns cyphered texts viewing the mapped file, which can be given to LWEGSW.evaluate without being
+    loaded: only the pages read by the gates are brought into memory.
+
+    Attributes:
+        path: Path of the file holding the cyphered texts.
+        q: Modulus of the scheme.
+        n: Number of columns of the cyphered texts.
+        m: Number of rows of the cyphered texts.
+        writable: Whether cyphered texts can be appended.
+
+    Methods:
+        create: Creates an empty store for the cyphered texts of a scheme.
+        open: Opens an existing store.
+        append: Appends a cyphered text or a stack of cyphered texts.
+        chunks: Iterates over the store by stacks of cyphered texts.
+        flush: Writes the header of the store to disk.
+    """
+
+    def __init__(self, path: str, header: SerializationHeader, writable: bool):
+        """
+        Use LWECiphertextStore.create or LWECiphertextStore.open instead.
+
+        :param path: path of the file holding the cyphered texts.
+        :param header: header of the store.
+        :param writable: whether cyphered texts can be appended.
+        """
+        self.path = path
+        self.q = header.q
+        self.n = header.n
+        self.m = header.shape[1]
+        self.writable = writable
+        self._header = header
+        self._count = header.shape[0]
+        self._memmap: Optional[np.memmap] = None
+
+    @classmethod
+    def create(cls, path: str, scheme: LWEGSW) -> 'LWECiphertextStore':
+        """
+        Creates an empty store, replacing any existing one.
+
+        :param path: path of the file holding the cyphered texts.
+        :param scheme: scheme with generated keys whose cyphered texts are stored.
+        :return: the writable store.
+        """
+        header = SerializationHeader(FORMAT_VERSION, scheme_id(scheme), CIPHERTEXT_KIND, False, scheme.q, scheme.n,
+                                     coefficient_bits(scheme.q), (0, scheme.m, scheme.n))
+        open(path, 'wb').close()
+        store = cls(path, header, True)
+        store.flush()
+        return store
+
+    @classmethod
+    def open(cls, path: str, scheme: Optional[LWEGSW] = None, writable: bool = False) -> 'LWECiphertextStore':
+        """
+        Opens an existing store.
+
+        :param path: path of the file holding the cyphered texts.
+        :param scheme: optional scheme whose parameters must match the ones of the store.
+        :param writable: whether cyphered texts can be appended.
+        :return: the store.
+        """
+        with open(path + HEADER_SUFFIX, 'rb') as f:
+            header = read_header(f.read(), check_payload=False)
+        if header.kind != CIPHERTEXT_KIND or header.packed or header.seed is not None or len(header.shape) != 3:
+            raise ValueError(f"{path} is not a store of cyphered texts!")
+        if scheme is not None and (header.scheme_id, header.q, header.n) != (scheme_id(scheme), scheme.q, scheme.n):
+            raise ValueError(f"The store was created with parameters (q: {header.q}, n: {header.n}), the scheme uses "
+                             f"(q: {scheme.q}, n: {scheme.n})!")
+        if scheme is not None and header.shape[1:] != (scheme.m, scheme.n):
+            # The number of rows depends on the decomposition base of the scheme
+            raise ValueError(f"The store holds cyphered texts of {header.shape[1]} x {header.shape[2]} elements, the "
+                             f"scheme uses {scheme.m} x {scheme.n} (decomposition base {scheme.base})!")
+        if os.path.getsize(path) < header.payload_size():
+            raise ValueError(f"{path} is truncated!")
+        return cls(path, header, writable)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self._count, self.m, self.n
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> LWECiphertext:
+        """
+        Returns a cyphered text, or a stack of cyphered texts for slices and arrays of indexes. Integers and slices
+        give views of the mapped file, arrays of indexes give copies.
+        """
+        return LWECiphertext(self._tensor()[index], self.q, 0, self.q - 1)
+
+    def __iter__(self) -> Iterator[LWECiphertext]:
+        for i in range(self._count):
+            yield self[i]
+
+    def chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[LWECiphertext]:
+        """
+        Iterates over the store by stacks of at most chunk_size cyphered texts viewing the mapped file.
+        """
+        if chunk_size < 1:
+            raise ValueError("The size of the chunks must be positive!")
+        for start in range(0, self._count, chunk_size):
+            yield self[start:start + chunk_size]
+
+    def append(self, cts: Union[np.ndarray, List[np.ndarray]]) -> None:
+        """
+        Appends cyphered texts at the end of the store, reducing them modulo q. Views returned before keep viewing
+        the cyphered texts they were created from.
+
+        :param cts: cyphered text of shape (m, n), stack of cyphered texts of shape (k, m, n), or list of cyphered
+                    texts.
+        """
+        if not self.writable:
+            raise ValueError("The store is opened read-only!")
+        if isinstance(cts, list):
+            cts = np.stack([np.asarray(ct) for ct in cts]) if len(cts) > 0 else np.empty((0, self.m, self.n))
+        if cts.shape[-2:] != (self.m, self.n) or cts.ndim not in (2, 3):
+            raise ValueError(
+                f"Invalid dimensions for the cyphered texts: should be {self.m} x {self.n} matrices (input is "
+                f"{' x '.join(str(d) for d in cts.shape)})")
+
+        cts = as_ciphertext(cts.reshape((-1, self.m, self.n)), self.q).reduced()
+        with open(self.path, 'ab') as f:
+            np.ascontiguousarray(cts, dtype='<i8').tofile(f)
+        self._count += cts.shape[0]
+        self._memmap = None
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the header, holding the number of cyphered texts, to disk.
+        """
+        if not self.writable:
+            return
+        self._header.shape = self.shape
+        with open(self.path + HEADER_SUFFIX, 'wb') as f:
+            f.write(self._header.to_bytes())
+
+    def _tensor(self) -> np.ndarray:
+        """
+        Returns the (k, m, n) tensor of the cyphered texts, mapping the file when needed.
+        """
+        if self._count == 0:
+            # Empty files cannot be mapped
+            return np.empty(self.shape, dtype='<i8')
+        if self._memmap is None:
+            self._memmap = np.memmap(self.path, dtype='<i8', mode='r', shape=self.shape)
+        return self._memmap
+
+    def __repr__(self):
+        return f"LWECiphertextStore(path={self.path!r}, shape={self.shape}, q={self.q})"
+
+
+def evaluate_store(scheme: LWEGSW, binary_circuit: CircuitType, inputs: List[LWECiphertextStore],
+                   outputs: List[LWECiphertextStore], chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> None:
+    """
+    Evaluates a circuit on every row of stores: the i-th cyphered texts of the input stores are the inputs of the
+    i-th evaluation, whose outputs are appended to the output stores. The rows are evaluated by chunks, each input
+    of the circuit being a stack of chunk_size cyphered texts, so that only a chunk is held in memory.
+
+    :param scheme: scheme with generated keys.
+    :param binary_circuit: circuit to evaluate, compiled once for all the chunks.
+    :param inputs: one store for each input of the circuit, of the same length.
+    :param outputs: one writable store for each output of the circuit.
+    :param chunk_size: number of rows evaluated together.
+    :param workers: number of threads evaluating the gates of a level.
+    """
+    compiled = scheme.compile(binary_circuit)
+    if len(inputs) != compiled.inputs or len(outputs) != len(compiled.output_slots):
+        raise ValueError("The amount of stores does not match the circuit inputs and outputs!")
+    if len({len(store) for store in inputs}) > 1:
+        raise ValueError("The input stores must have the same length!")
+
+    for chunk in zip(*[store.chunks(chunk_size) for store in inputs]):
+        for store, result in zip(outputs, scheme.evaluate(compiled, list(chunk), workers)):
+            # Outputs which do not depend on the inputs are single cyphered texts
+            store.append(np.broadcast_to(result, chunk[0].shape))
@@ -1,51 +1,164 @@
 import math
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, Union
 
 import numpy as np
 
+from error_samplers import ErrorSampler, as_sampler
+from gadget import DEFAULT_BASE, balanced_digits, gadget_powers
+from LWE.lwe_ciphertext import mod_reduce, value_interval
 
-def generate_gadget_matrix(q: int, n: int) -> np.ndarray:
+
+# Integers up to 2^53 are exactly represented by float64, one bit being kept for the sign of the sums
+FLOAT_EXACT_BITS = 52
+# Largest supported modulus size, so that a reduced value shifted by one bit still fits in int64
+MAX_MODULUS_BITS = 62
+# Number of gadget matrices kept by parameters
+GADGET_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=GADGET_CACHE_SIZE)
+def generate_gadget_matrix(q: int, n: int, base: int = DEFAULT_BASE) -> np.ndarray:
     """
-    Generates the G gadget matrix of size m x n
+    Generates the G gadget matrix of size m x n, each column holding the powers 1, B, ..., B^(digits - 1) of the
+    decomposition base. Gadget matrices are cached by parameters and shared by the schemes using them, so they are
+    read-only.
     """
-    log_q = math.ceil(math.log2(q))
-    g = np.array([1 << i for i in range(log_q)], dtype=np.int32).reshape(-1, 1)
-    return np.kron(np.eye(n, dtype=np.int32), g)
+    g = np.array(gadget_powers(q, base), dtype=np.int64).reshape(-1, 1)
+    G = np.kron(np.eye(n, dtype=np.int64), g)
+    G.setflags(write=False)
+    return G
 
 
-def bit_decomp(matrix: np.ndarray, q: int) -> np.ndarray:
+def bit_decomp(matrix: np.ndarray, q: int, base: int = DEFAULT_BASE) -> np.ndarray:
     """
-    Generates the bit decomposition matrix of a given matrix.
-    :param matrix: matrix for which to make the bit decomposition.
+    Generates the bit decomposition matrix of a given matrix, or its decomposition in signed digits of a larger
+    base B = 2^k (see gadget.balanced_digits).
+
+    The decomposition is applied on the last axis, so a stack of matrices of shape (k, m, n) is decomposed in a
+    single call into a stack of shape (k, m, n * digits).
+
+    :param matrix: matrix (or stack of matrices) for which to make the bit decomposition, reduced modulo q unless
+                   q is a power of two and the base is 2.
     :param q: modulus of the matrix items
-    :return:
+    :param base: decomposition base, a power of two.
+    :return: the decomposition, digit i of item j being stored at column j * digits + i.
     """
+    matrix = np.asarray(matrix)
+    if base != DEFAULT_BASE:
+        digits = balanced_digits(matrix, q, base)
+        return digits.reshape(matrix.shape[:-1] + (-1,)).astype(np.int32)
     decomp = math.ceil(math.log2(q))
-    new_shape = (matrix.shape[0], decomp * matrix.shape[1])
-    result = np.zeros(new_shape, dtype=np.int32)
-    for i in range(matrix.shape[0]):
-        for j in range(matrix.shape[1]):
-            for k in range(decomp):
-                result[i, j * decomp + k] = (matrix[i, j] >> k) & 1
-    return result
+    shifts = np.arange(decomp, dtype=matrix.dtype)
+    bits = (matrix[..., np.newaxis] >> shifts) & 1
+    return bits.reshape(matrix.shape[:-1] + (decomp * matrix.shape[-1],)).astype(np.int32)
 
 
 def generate_random_matrix(m: int, n: int, q: int) -> np.ndarray:
     """
     Generates a random matrix of size m x n with integers modulus q.
     """
-    return np.random.randint(0, q, size=(m, n), dtype=np.int32)
+    return np.random.randint(0, q, size=(m, n), dtype=np.int64)
+
+
+def generate_error_vector(m: int, error_function: Union[ErrorSampler, Callable[[], int]]) -> np.ndarray:
+    """
+    Generates a vector of size m using an error sampler or function.
+    """
+    return as_sampler(error_function).sample(m).astype(np.int32).reshape(-1, 1)
+
+
+def generate_error_matrix(m: int, n: int, error_function: Union[ErrorSampler, Callable[[], int]]) -> np.ndarray:
+    """
+    Generates a matrix of size m x n using an error sampler or function.
+    """
+    return as_sampler(error_function).sample((m, n)).astype(np.int32)
+
+
+def generate_error_tensor(k: int, m: int, n: int, error_function: Union[ErrorSampler, Callable[[], int]]) -> np.ndarray:
+    """
+    Generates a stack of k matrices of size m x n using an error sampler or function.
+    """
+    return as_sampler(error_function).sample((k, m, n)).astype(np.int32)
+
+
+def mod_matmul(a: np.ndarray, b: np.ndarray, q: int) -> np.ndarray:
+    """
+    Computes the exact matrix product a @ b modulo q with float64 BLAS.
+
+    NumPy integer matrix products do not use BLAS and silently overflow. Here the operands are split into limbs of a
+    few bits, small enough for the products of limbs summed over the inner dimension to stay below 2^52, so that each
+    limb product is an exact float64 matrix product. The limb products are then reduced and recombined modulo q.
+    Operands may be signed and unreduced, and stacks of matrices are multiplied as with the @ operator.
+
+    :param a: integer matrix (or stack of matrices) of shape (..., r, k).
+    :param b: integer matrix (or stack of matrices) of shape (..., k, c).
+    :param q: modulus, below 2^62.
+    :return: the int64 product reduced modulo q, of shape (..., r, c).
+    """
+    if q.bit_length() > MAX_MODULUS_BITS:
+        raise ValueError(f"The modulus must be below 2^{MAX_MODULUS_BITS}!")
+
+    bits_a = _magnitude_bits(a)
+    bits_b = _magnitude_bits(b)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    budget = FLOAT_EXACT_BITS - max(a.shape[-1] - 1, 1).bit_length()
+    if budget < 2:
+        raise ValueError("The inner dimension is too large for an exact float64 product!")
+
+    if bits_a + bits_b <= budget:
+        return mod_reduce(_float_matmul(a, b), q)
+
+    # Chooses the limb widths minimizing the number of limb products
+    width_a, width_b = min(((wa, min(bits_b, budget - wa)) for wa in range(1, min(bits_a, budget - 1) + 1)),
+                           key=lambda widths: -(-bits_a // widths[0]) * -(-bits_b // widths[1]))
+    limbs_a = _split_limbs(a, width_a, bits_a)
+    limbs_b = _split_limbs(b, width_b, bits_b)
+
+    # Horner evaluation from the most significant limbs, keeping the accumulators reduced
+    result = 0
+    for limb_b in reversed(limbs_b):
+        partial_sum = 0
+        for limb_a in reversed(limbs_a):
+            product = mod_reduce(_float_matmul(limb_a, limb_b), q)
+            partial_sum = mod_reduce(_shift_mod(partial_sum, width_a, q) + product, q)
+        result = mod_reduce(_shift_mod(result, width_b, q) + partial_sum, q)
+    return result
+
+
+def _magnitude_bits(matrix: np.ndarray) -> int:
+    """
+    Returns the number of bits of the largest absolute value of a matrix, plus one for the sign of negative values.
+    The tracked interval of a cyphered text is used instead of reading its coefficients.
+    """
+    low, high = value_interval(matrix)
+    return max(high.bit_length(), (-low).bit_length() + (1 if low < 0 else 0), 1)
+
+
+def _split_limbs(matrix: np.ndarray, width: int, bits: int) -> list:
+    """
+    Splits a matrix into limbs of width bits, from the least significant one: the lower limbs are non-negative and
+    the top limb carries the sign, so that the matrix is the sum of limb i times 2^(i * width).
+    """
+    count = -(-bits // width)
+    mask = (1 << width) - 1
+    return [(matrix >> (i * width)) & mask for i in range(count - 1)] + [matrix >> ((count - 1) * width)]
 
 
-def generate_error_vector(m: int, error_function: Callable[[], int]) -> np.ndarray:
+def _float_matmul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
     """
-    Generates a vector of size m using an error function.
+    Multiplies integer matrices whose product is known to stay exactly representable in float64.
     """
-    return np.array([error_function() for _ in range(m)], dtype=np.int32).reshape(-1, 1)
+    return np.rint(a.astype(np.float64) @ b.astype(np.float64)).astype(np.int64)
 
 
-def generate_error_matrix(m: int, n: int, error_function: Callable[[], int]) -> np.ndarray:
+def _shift_mod(matrix, shift: int, q: int):
     """
-    Generates a matrix of size m x n using an error function.
+    Multiplies reduced values by 2^shift modulo q, in steps small enough not to overflow int64.
     """
-    return np.array([[error_function() for _ in range(n)] for _ in range(m)], dtype=np.int32)
+    step = MAX_MODULUS_BITS + 1 - q.bit_length()
+    while shift > 0:
+        matrix = mod_reduce(matrix << min(step, shift), q)
+        shift -= step
+    return matrix
@@ -0,0 +1,104 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_ciphertext import LWECiphertext, OVERFLOW_BOUND, mod_reduce, stack_ciphertexts
+from error_samplers import DiscreteGaussianSampler
+from tests_utils import generic_test
+
+
+class TestLWECiphertext(unittest.TestCase):
+
+    def test_mod_reduce(self):
+        values = np.array([-4097, -1, 0, 5, 4095, 4096, 1 << 40], dtype=np.int64)
+        for q in [4096, 4093]:
+            generic_test(mod_reduce, (values, q), values % q, f"Reduction modulo {q}")
+
+    def test_interval_tracking(self):
+        q = 16
+        a = LWECiphertext(np.array([[0, 15], [3, 7]]), q)
+        b = LWECiphertext(np.array([[2, 2], [8, 1]]), q, 0, q - 1)
+        self.assertEqual((a.low, a.high), (0, 15))
+
+        total = a + b
+        self.assertIsInstance(total, LWECiphertext)
+        self.assertEqual((total.low, total.high), (0, 30))
+        difference = b - total
+        self.assertEqual((difference.low, difference.high), (-30, 15))
+        self.assertEqual((difference[0].low, difference[0].high), (-30, 15))
+        self.assertFalse(difference.is_reduced())
+
+        reduced = difference.reduced()
+        self.assertTrue(np.array_equal(reduced, (b - a - b) % q))
+        self.assertIs(reduced.reduced(), reduced)
+        self.assertNotIsInstance(a % q, LWECiphertext)
+
+    def test_in_place_operations(self):
+        q = 16
+        ct = LWECiphertext(np.array([[0, 15], [3, 7]]), q, 0, q - 1)
+        alias = ct
+        alias += 16
+        self.assertIsInstance(alias, LWECiphertext)
+        self.assertIs(alias, ct)
+        self.assertEqual((ct.low, ct.high), (16, 31))
+        self.assertFalse(ct.is_reduced())
+
+        # Writing through a view widens the interval of the viewed cyphered text
+        ct[0] -= 40
+        self.assertEqual((ct.low, ct.high), (-24, 31))
+        row = ct[1]
+        row += 100
+        self.assertEqual((ct.low, ct.high), (-24, 131))
+        ct[1] = np.array([200, 3])
+        self.assertEqual((ct.low, ct.high), (-24, 200))
+        self.assertTrue(ct.min() >= ct.low and ct.max() <= ct.high)
+
+        # Operations which are not tracked forget the interval, which is computed again when needed
+        np.remainder(ct, q, out=ct)
+        self.assertIsNone(ct.low)
+        self.assertFalse(ct.is_reduced())
+        self.assertTrue(np.array_equal(ct.reduced(), ct))
+
+    def test_overflow_guard(self):
+        q = 1 << 20
+        big = LWECiphertext(np.array([3, 5]), q, -OVERFLOW_BOUND + 1, OVERFLOW_BOUND - 1)
+        result = big + big
+        self.assertTrue(np.array_equal(result, [6, 10]))
+        self.assertEqual((result.low, result.high), (0, 2 * q - 2))
+
+    def test_stack(self):
+        q = 16
+        stack = stack_ciphertexts([LWECiphertext(np.array([1, 2]), q), LWECiphertext(np.array([-3, 20]), q)])
+        self.assertEqual((stack.low, stack.high, stack.q), (-3, 20, q))
+
+    def test_gates_on_non_power_of_two_modulus(self):
+        # NOT and XOR leave coefficients outside [0, q), which the bit decomposition of AND needs reduced
+        q, n = 4093, 5
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        compiled = scheme.compile([["not", "xor"], ["and"]])
+        for bits in [(False, True, False), (False, False, True), (True, True, False), (False, True, True)]:
+            cts = list(scheme.encrypt_many(pk, bits))
+            expected_result = (not bits[0]) and (bits[1] != bits[2])
+            generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, cts)[0]), (), expected_result,
+                         f"GSW-LWE NOT and XOR before AND with q = {q} on {bits}")
+
+    def test_evaluation_tracks_intervals(self):
+        q, n = 4096, 5
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        cts = list(scheme.encrypt_many(pk, [True, False, True]))
+        xor_ct, not_ct = scheme.evaluate([["xor", "not"]], cts)
+        self.assertEqual((xor_ct.low, xor_ct.high), (0, 2 * q - 2))
+        self.assertEqual((not_ct.low, not_ct.high), (-(q - 1), q // 2))
+        and_ct, = scheme.evaluate([["and"]], [xor_ct, not_ct])
+        self.assertTrue(and_ct.is_reduced())
+
+    def test_pickling(self):
+        ct = LWECiphertext(np.array([[3, -2], [7, 40]]), 16, -2, 40)
+        loaded = pickle.loads(pickle.dumps(ct))
+        self.assertIsInstance(loaded, LWECiphertext)
+        self.assertEqual((loaded.q, loaded.low, loaded.high), (16, -2, 40))
+        self.assertTrue(np.array_equal(loaded, ct))
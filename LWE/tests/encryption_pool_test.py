@@ -0,0 +1,58 @@
+import time
+import unittest
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_encryption_pool import ZeroEncryptionPool
+from error_samplers import DiscreteGaussianSampler
+
+n = 5
+q = 2 ** 20
+
+
+class TestZeroEncryptionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = LWEGSW()
+        self.pk, self.sk = self.scheme.keygen((q, n, DiscreteGaussianSampler(1.0, seed=13)))
+
+    def test_refill_and_encrypt(self):
+        pool = ZeroEncryptionPool(self.scheme, self.pk, size=10, refill_batch=4, start=False)
+        self.assertEqual(len(pool), 0)
+        pool.refill()
+        self.assertEqual(len(pool), 10)
+
+        bits = [True, False, True, True]
+        cts = [pool.encrypt(bit) for bit in bits]
+        self.assertEqual([self.scheme.decrypt(self.sk, ct) for ct in cts], bits)
+        self.assertEqual((pool.hits, pool.misses, len(pool)), (4, 0, 6))
+        # Each encryption of zero is used once
+        self.assertFalse(np.array_equal(cts[0], cts[2]))
+
+    def test_empty_pool(self):
+        pool = ZeroEncryptionPool(self.scheme, self.pk, size=4, start=False)
+        self.assertTrue(self.scheme.decrypt(self.sk, pool.encrypt(True)))
+        self.assertEqual((pool.hits, pool.misses), (0, 1))
+
+    def test_encrypt_many(self):
+        pool = ZeroEncryptionPool(self.scheme, self.pk, size=5, refill_batch=2, start=False)
+        pool.refill()
+        bits = np.random.randint(0, 2, size=8).astype(bool)
+        cts = pool.encrypt_many(bits)
+        self.assertEqual(cts.shape, (8, self.scheme.m, n))
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, cts), bits)
+        self.assertEqual((pool.hits, pool.misses), (5, 3))
+        # Pooled cyphered texts are evaluated like fresh ones
+        result = self.scheme.evaluate([["nand"]], [cts[0], cts[1]])[0]
+        self.assertEqual(self.scheme.decrypt(self.sk, result), not (bits[0] and bits[1]))
+
+    def test_background_refill(self):
+        with ZeroEncryptionPool(self.scheme, self.pk, size=8, refill_batch=3) as pool:
+            deadline = time.monotonic() + 10
+            while len(pool) < 8 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(pool), 8)
+            self.assertFalse(self.scheme.decrypt(self.sk, pool.encrypt(False)))
+            self.assertEqual(pool.hits, 1)
+        self.assertRaises(ValueError, ZeroEncryptionPool, self.scheme, self.pk, 0)
@@ -1,7 +1,12 @@
 import unittest
 
+import numpy as np
+
+from FHEBinaryCircuit import FHEBinaryCircuit
 from LWE.LWE_GSW import LWEGSW
-from tests_utils import multiple_generic_tests, lwe_sample
+from error_samplers import DiscreteGaussianSampler
+from serialization import CIPHERTEXT_KIND
+from tests_utils import generic_test, multiple_generic_tests, lwe_sample
 
 n = 5
 q = 4096
@@ -14,6 +19,16 @@ def test_encrypt_decrypt(scheme, pk, sk, bit) -> bool:
     return scheme.decrypt(sk, ct)
 
 
+def encrypt_decrypt_many(scheme, pk, sk, bits) -> np.ndarray:
+    cts = scheme.encrypt_many(pk, bits)
+    return scheme.decrypt_many(sk, cts)
+
+
+def encrypt_sk_decrypt_many(scheme, sk, bits) -> np.ndarray:
+    cts = scheme.encrypt_many_sk(sk, bits)
+    return scheme.decrypt_many(sk, cts)
+
+
 def test_single_binary_gate(scheme, pk, sk, bit1, bit2, gate) -> bool:
     ct1 = scheme.encrypt(pk, bit1)
     ct2 = scheme.encrypt(pk, bit2)
@@ -98,3 +113,138 @@ class TestLWE(unittest.TestCase):
         scheme = LWEGSW()
         pk, sk = scheme.keygen((q, n, error_distribution))
         multiple_generic_tests(test_not_gate, (scheme, pk, sk, False), True, nb_tests, f"GSW-LWE Test: NOT 1 (n: {n}, q: {q})")
+
+    def test_encrypt_decrypt_many(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        bits = np.random.randint(0, 2, size=nb_tests).astype(bool)
+        generic_test(encrypt_decrypt_many, (scheme, pk, sk, bits), bits,
+                     f"GSW-LWE Encrypt and decrypt {nb_tests} bits at once (n: {n}, q: {q})")
+
+    def test_decrypt_many_matches_decrypt(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        cts = np.stack([scheme.encrypt(pk, bit) for bit in [True, False, True, True, False]])
+        expected_result = np.array([scheme.decrypt(sk, ct) for ct in cts])
+        generic_test(scheme.decrypt_many, (sk, cts), expected_result, "GSW-LWE decrypt_many against decrypt")
+
+    def test_encrypt_decrypt_with_sampler(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        bits = np.random.randint(0, 2, size=nb_tests).astype(bool)
+        generic_test(encrypt_decrypt_many, (scheme, pk, sk, bits), bits,
+                     f"GSW-LWE Encrypt and decrypt with a discrete Gaussian sampler (n: {n}, q: {q})")
+
+    def test_batched_gates_match_single_gates(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        compiled = scheme.compile([["and", "and", "nand", "nand", "or", "or", "xor"], ["and", "or", "wire", "not", "wire"]])
+        cts = list(scheme.encrypt_many(pk, np.random.randint(0, 2, size=14).astype(bool)))
+        single_gates = FHEBinaryCircuit[np.ndarray](scheme.G, scheme._mul)
+        expected_result = single_gates.evaluate_compiled(compiled, cts)
+        for ct, expected_ct in zip(scheme.evaluate(compiled, cts), expected_result):
+            self.assertTrue(np.array_equal(ct, expected_ct))
+
+    def test_setup_without_keys(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        evaluator = LWEGSW()
+        evaluator.setup(scheme.parameters()[:2] + (None,), scheme.G.copy())
+        cts = list(scheme.encrypt_many(pk, [True, False]))
+        self.assertTrue(np.array_equal(evaluator.evaluate([["xor"]], cts)[0], scheme.evaluate([["xor"]], cts)[0]))
+
+    def test_chunked_stack_multiplication(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        # 2 x 12 stacks of 60 x 5 cyphered texts exceed MUL_CHUNK_ELEMENTS and are multiplied by chunks
+        cts1 = scheme.encrypt_many(pk, np.random.randint(0, 2, size=24).astype(bool)).reshape((2, 12, scheme.m, n))
+        cts2 = scheme.encrypt_many(pk, np.random.randint(0, 2, size=24).astype(bool)).reshape((2, 12, scheme.m, n))
+        product = scheme._mul(cts1, cts2)
+        self.assertEqual(product.shape, cts1.shape)
+        for i in range(2):
+            for j in range(12):
+                self.assertTrue(np.array_equal(product[i, j], scheme._mul(cts1[i, j], cts2[i, j])))
+
+    def test_single_cyphered_text_broadcast_against_stack(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        single = scheme.encrypt(pk, True)
+        # 24 cyphered texts exceed MUL_CHUNK_ELEMENTS and are multiplied by chunks, 3 are not
+        for count in [3, 24]:
+            stack = scheme.encrypt_many(pk, np.random.randint(0, 2, size=count).astype(bool))
+            for product, expected in [(scheme._mul(single, stack), lambda ct: scheme._mul(single, ct)),
+                                      (scheme._mul(stack, single), lambda ct: scheme._mul(ct, single))]:
+                self.assertEqual(product.shape, stack.shape)
+                for i in range(count):
+                    self.assertTrue(np.array_equal(product[i], expected(stack[i])))
+        self.assertRaises(ValueError, scheme._mul, stack[:2], stack[:3])
+
+    def test_large_modulus(self):
+        large_q = 1 << 40
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((large_q, n, DiscreteGaussianSampler(3.0)))
+        compiled = scheme.compile([["and", "nand", "or"], ["xor", "wire"], ["and"]])
+        for _ in range(10):
+            bits = np.random.randint(0, 2, size=6).astype(bool)
+            cts = scheme.encrypt_many(pk, bits)
+            expected_result = ((bits[0] and bits[1]) != (not (bits[2] and bits[3]))) and (bits[4] or bits[5])
+            generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, list(cts))[0]), (), expected_result,
+                         f"GSW-LWE circuit with a 40 bits modulus on {bits}")
+            generic_test(scheme.decrypt_many, (sk, cts), bits, "GSW-LWE decrypt_many with a 40 bits modulus")
+
+    def test_encrypt_sk_decrypt(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        bits = np.random.randint(0, 2, size=nb_tests).astype(bool)
+        generic_test(encrypt_sk_decrypt_many, (scheme, sk, bits), bits,
+                     f"GSW-LWE Encrypt with the secret key and decrypt {nb_tests} bits (n: {n}, q: {q})")
+        generic_test(lambda: [scheme.decrypt(sk, scheme.encrypt_sk(sk, bit)) for bit in bits[:10]], (),
+                     list(bits[:10]), f"GSW-LWE Encrypt single bits with the secret key (n: {n}, q: {q})")
+        self.assertRaises(ValueError, scheme.encrypt_sk, pk, True)
+
+    def test_secret_key_and_public_key_cyphered_texts_mix(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        compiled = scheme.compile([["and", "xor", "or", "nand"]])
+        for _ in range(10):
+            bits = np.random.randint(0, 2, size=8).astype(bool)
+            cts = [scheme.encrypt_sk(sk, bit) if i % 2 else scheme.encrypt(pk, bit) for i, bit in enumerate(bits)]
+            expected_result = np.array([bits[0] and bits[1], bits[2] != bits[3], bits[4] or bits[5],
+                                        not (bits[6] and bits[7])])
+            generic_test(lambda: scheme.decrypt_many(sk, np.stack(scheme.evaluate(compiled, cts))), (),
+                         expected_result, f"GSW-LWE gates on secret key and public key cyphered texts {bits}")
+
+    def test_seeded_encryptions(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        bits = np.random.randint(0, 2, size=nb_tests).astype(bool)
+        seeded = scheme.encrypt_many_sk(sk, bits, seeded=True)
+        self.assertEqual(seeded.stored.shape, (nb_tests, scheme.m, 1))
+        generic_test(scheme.decrypt_many, (sk, scheme.expand(seeded, CIPHERTEXT_KIND)), bits,
+                     f"GSW-LWE Encrypt seeded cyphered texts with the secret key (n: {n}, q: {q})")
+        generic_test(lambda: scheme.decrypt(sk, scheme.encrypt(scheme.compress_public_key(pk), True)), (), True,
+                     f"GSW-LWE Encrypt with a compressed public key (n: {n}, q: {q})")
+        cts = [scheme.expand(scheme.encrypt_sk(sk, bit, seeded=True), CIPHERTEXT_KIND) for bit in bits[:2]]
+        generic_test(lambda: scheme.decrypt(sk, scheme.evaluate([["and"]], cts)[0]), (), bits[0] and bits[1],
+                     f"GSW-LWE AND of seeded cyphered texts {bits[:2]}")
+
+    def test_decomposition_bases(self):
+        large_q = 1 << 20
+        compiled_circuit = [["and", "nand", "or"], ["xor", "wire"], ["and"]]
+        for base, digits in [(4, 10), (16, 5), (64, 4)]:
+            scheme = LWEGSW()
+            pk, sk = scheme.keygen((large_q, n, DiscreteGaussianSampler(1.0), base))
+            self.assertEqual((scheme.m, scheme.G.shape), (n * digits, (n * digits, n)))
+            self.assertEqual(scheme.parameters()[3], base)
+            compiled = scheme.compile(compiled_circuit)
+            for _ in range(5):
+                bits = np.random.randint(0, 2, size=6).astype(bool)
+                cts = scheme.encrypt_many(pk, bits)
+                expected_result = ((bits[0] and bits[1]) != (not (bits[2] and bits[3]))) and (bits[4] or bits[5])
+                generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, list(cts))[0]), (),
+                             expected_result, f"GSW-LWE circuit with a base {base} gadget on {bits}")
+                generic_test(encrypt_sk_decrypt_many, (scheme, sk, bits), bits,
+                             f"GSW-LWE Encrypt with the secret key and a base {base} gadget")
+
+    def test_decomposition_base_must_be_a_power_of_two(self):
+        self.assertRaises(ValueError, LWEGSW().keygen, (q, n, error_distribution, 10))
@@ -0,0 +1,103 @@
+import math
+import unittest
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_noise import estimate_noise, fresh_noise, failure_probability, recommend_parameters
+from error_samplers import DiscreteGaussianSampler, CenteredBinomialSampler
+from gadget import decryption_row
+
+sampler = DiscreteGaussianSampler(1.0)
+and_tree = [["and"] * 4, ["and"] * 2, ["and"]]
+
+
+def measured_noise(scheme, sk, cts, bits) -> np.ndarray:
+    """
+    Computes the centered noise of the row read by decryption.
+    """
+    log_q = scheme.m // scheme.n
+    raw = (cts[:, log_q - 1, :] @ sk)[:, 0] - np.asarray(bits, dtype=np.int64) * (1 << (log_q - 1))
+    return (raw + scheme.q // 2) % scheme.q - scheme.q // 2
+
+
+class TestNoiseEstimator(unittest.TestCase):
+
+    def test_sampler_statistics(self):
+        self.assertAlmostEqual(sampler.variance(), 1.0, places=3)
+        self.assertEqual(sampler.bound(), 12)
+        self.assertEqual(CenteredBinomialSampler(4).variance(), 2)
+
+    def test_fresh_noise_matches_encryption(self):
+        q, n = 1 << 16, 5
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, sampler))
+        bits = np.random.randint(0, 2, size=400).astype(bool)
+        noise = measured_noise(scheme, sk, scheme.encrypt_many(pk, bits), bits)
+        # The estimate averages over the secret key, so a single key is only expected within a broad factor
+        ratio = np.var(noise) / fresh_noise(q, n, sampler).variance
+        self.assertTrue(0.3 < ratio < 3, f"Measured variance is {ratio:.2f} times the estimate")
+
+    def test_noise_growth(self):
+        q, n = 1 << 20, 8
+        xor_noise, = estimate_noise([["xor"]], q, n, sampler)
+        and_noise, = estimate_noise([["and"]], q, n, sampler)
+        deep_noise, = estimate_noise(and_tree, q, n, sampler)
+        fresh = fresh_noise(q, n, sampler)
+        self.assertEqual(xor_noise.variance, 2 * fresh.variance)
+        self.assertEqual(xor_noise.message, 2)
+        self.assertGreater(and_noise.variance, xor_noise.variance)
+        self.assertGreater(deep_noise.variance, and_noise.variance)
+        self.assertGreater(deep_noise.bound, math.sqrt(deep_noise.variance))
+
+    def test_recommended_parameters_are_minimal(self):
+        target = 2.0 ** -30
+        q, n = recommend_parameters(and_tree, 6, sampler, target)
+        self.assertEqual(n, 6)
+        self.assertLessEqual(failure_probability(and_tree, q, n, sampler), target)
+        self.assertGreater(failure_probability(and_tree, q // 2, n, sampler), target)
+        self.assertLess(recommend_parameters([["and"]], 6, sampler, target)[0], q)
+        self.assertGreaterEqual(recommend_parameters(and_tree, 6, sampler, target, worst_case=True)[0], q)
+
+    def test_recommended_parameters_decrypt(self):
+        q, n = recommend_parameters(and_tree, [4, 6, 8], sampler, 2.0 ** -20)
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, sampler))
+        compiled = scheme.compile(and_tree)
+        for _ in range(20):
+            bits = np.random.randint(0, 2, size=8).astype(bool)
+            result = scheme.evaluate(compiled, list(scheme.encrypt_many(pk, bits)))[0]
+            self.assertEqual(scheme.decrypt(sk, result), bool(np.all(bits)))
+
+    def test_decomposition_base_noise(self):
+        q, n = 1 << 20, 8
+        binary_noise, = estimate_noise([["and"]], q, n, sampler)
+        self.assertEqual(estimate_noise(and_tree, q, n, sampler, base=2)[0].variance,
+                         estimate_noise(and_tree, q, n, sampler)[0].variance)
+        variances = [estimate_noise([["and"]], q, n, sampler, base=base)[0].variance for base in (4, 16, 64)]
+        # Fewer but larger signed digits, the noise of a multiplication grows with the base
+        self.assertEqual(sorted(variances), variances)
+        self.assertGreater(variances[-1], binary_noise.variance)
+        self.assertLess(fresh_noise(q, n, sampler, base=16).variance, fresh_noise(q, n, sampler).variance)
+
+    def test_base_multiplication_noise_matches_evaluation(self):
+        q, n, base = 1 << 20, 8, 16
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, sampler, base))
+        row, _ = decryption_row(19, base)
+        product = np.asarray(scheme._mul(scheme.encrypt_many(pk, [True] * 300), scheme.encrypt_many(pk, [True] * 300)))
+        raw = (product[:, row, :] @ sk)[:, 0] - base ** row
+        noise = (raw + q // 2) % q - q // 2
+        ratio = np.var(noise) / estimate_noise([["and"]], q, n, sampler, base=base)[0].variance
+        self.assertTrue(0.3 < ratio < 3, f"Measured variance is {ratio:.2f} times the estimate")
+
+    def test_recommended_parameters_with_base_decrypt(self):
+        q, n = recommend_parameters(and_tree, 6, sampler, 2.0 ** -20, base=16)
+        self.assertGreaterEqual(q, recommend_parameters(and_tree, 6, sampler, 2.0 ** -20)[0])
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, sampler, 16))
+        compiled = scheme.compile(and_tree)
+        for _ in range(20):
+            bits = np.random.randint(0, 2, size=8).astype(bool)
+            result = scheme.evaluate(compiled, list(scheme.encrypt_many(pk, bits)))[0]
+            self.assertEqual(scheme.decrypt(sk, result), bool(np.all(bits)))
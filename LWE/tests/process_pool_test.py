@@ -0,0 +1,91 @@
+import unittest
+from functools import partial
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_process_pool import LWEProcessPool
+from error_samplers import DiscreteGaussianSampler
+from tests_utils import lwe_sample
+
+n = 5
+q = 2 ** 20
+
+
+class TestLWEProcessPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scheme = LWEGSW()
+        cls.pk, cls.sk = cls.scheme.keygen((q, n, DiscreteGaussianSampler(1.0, seed=7)))
+        cls.pool = LWEProcessPool(cls.scheme, cls.pk, processes=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_evaluate_many(self):
+        bits = np.random.randint(0, 2, size=(19, 4)).astype(bool)
+        records = self.scheme.encrypt_many(self.pk, bits.reshape(-1)).reshape((19, 4, self.scheme.m, n))
+        outputs = self.pool.evaluate_many([["and", "xor", "one"]], records, chunk_size=5)
+        self.assertEqual(outputs.shape, (19, 3, self.scheme.m, n))
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[:, 0]), bits[:, 0] & bits[:, 1])
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[:, 1]), bits[:, 2] ^ bits[:, 3])
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[:, 2]), np.ones(19, dtype=bool))
+
+    def test_constant_operand(self):
+        bits = np.random.randint(0, 2, size=(7, 1)).astype(bool)
+        records = self.scheme.encrypt_many(self.pk, bits.reshape(-1)).reshape((7, 1, self.scheme.m, n))
+        # The single cyphered text of the constant gate is multiplied by the stacked records of each chunk
+        outputs = self.pool.evaluate_many([["one", "not"], ["and"]], records, chunk_size=3)
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[:, 0]), ~bits[:, 0])
+
+    def test_matches_single_process(self):
+        records = self.scheme.encrypt_many(self.pk, np.random.randint(0, 2, size=12).astype(bool))
+        records = records.reshape((3, 4, self.scheme.m, n))
+        circuit = [["nand", "or"], ["and"]]
+        outputs = self.pool.evaluate_many(circuit, records, chunk_size=2)
+        for record, output in zip(records, outputs):
+            expected = self.scheme.evaluate(circuit, list(record))[0] % q
+            np.testing.assert_array_equal(output[0], expected)
+
+    def test_encrypt_many(self):
+        bits = np.random.randint(0, 2, size=(9, 2)).astype(bool)
+        cts = self.pool.encrypt_many(bits, chunk_size=4)
+        try:
+            np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, cts.array.reshape((18, self.scheme.m, n))),
+                                          bits.reshape(-1))
+            # Encrypted records are evaluated in place
+            outputs = self.pool.evaluate_many([["xor"]], cts)
+            np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[:, 0]), bits[:, 0] ^ bits[:, 1])
+        finally:
+            cts.close()
+
+    def test_workers_draw_different_randomness(self):
+        # The module-level error function draws from the global NumPy generator, which the workers copy when forked
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, partial(lwe_sample, n, q)))
+        with LWEProcessPool(scheme, pk, processes=2) as pool:
+            cts = pool.encrypt_many(np.ones((8, 1), dtype=bool), chunk_size=1)
+            try:
+                rows = cts.array.reshape((8, -1))
+                self.assertEqual(len({row.tobytes() for row in rows}), 8)
+                np.testing.assert_array_equal(scheme.decrypt_many(sk, cts.array.reshape((8, scheme.m, n))),
+                                              np.ones(8, dtype=bool))
+            finally:
+                cts.close()
+
+    def test_unpicklable_error_function(self):
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, lambda: 0))
+        with LWEProcessPool(scheme, pk, processes=1) as pool:
+            records = scheme.encrypt_many(pk, [True, True]).reshape((1, 2, scheme.m, n))
+            self.assertTrue(scheme.decrypt(sk, pool.evaluate_many([["and"]], records)[0, 0]))
+            self.assertRaises(ValueError, pool.encrypt_many, [True])
+
+    def test_invalid_records(self):
+        records = np.zeros((2, 3, self.scheme.m, n), dtype=np.int64)
+        self.assertRaises(ValueError, self.pool.evaluate_many, [["and"]], records)
+        self.assertRaises(ValueError, self.pool.evaluate_many, [["and"]], records[0])
+        with LWEProcessPool(self.scheme, processes=1) as pool:
+            self.assertRaises(ValueError, pool.encrypt_many, [True])
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_ciphertext import LWECiphertext
+from LWE.lwe_store import LWECiphertextStore, evaluate_store, HEADER_SUFFIX
+from error_samplers import DiscreteGaussianSampler
+
+n = 5
+q = 2 ** 20
+
+
+class TestLWECiphertextStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.scheme = LWEGSW()
+        self.pk, self.sk = self.scheme.keygen((q, n, DiscreteGaussianSampler(1.0, seed=3)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_append_and_read(self):
+        store = LWECiphertextStore.create(self.path("cts"), self.scheme)
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store[:].shape, (0, self.scheme.m, n))
+
+        bits = np.array([True, False, False, True, True])
+        store.append(self.scheme.encrypt_many(self.pk, bits[:3]))
+        store.append(self.scheme.encrypt(self.pk, bits[3]))
+        store.append([self.scheme.encrypt(self.pk, bits[4])])
+        self.assertEqual(store.shape, (5, self.scheme.m, n))
+
+        reopened = LWECiphertextStore.open(self.path("cts"), self.scheme)
+        self.assertEqual(len(reopened), 5)
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, reopened[:]), bits)
+        self.assertEqual(self.scheme.decrypt(self.sk, reopened[3]), True)
+        self.assertEqual([self.scheme.decrypt(self.sk, ct) for ct in reopened], list(bits))
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, reopened[np.array([4, 1])]), [True, False])
+
+    def test_slices_view_the_file(self):
+        store = LWECiphertextStore.create(self.path("cts"), self.scheme)
+        store.append(self.scheme.encrypt_many(self.pk, np.ones(4, dtype=bool)))
+        chunk = store[1:3]
+        self.assertIsInstance(chunk, LWECiphertext)
+        self.assertTrue(chunk.is_reduced())
+        base = chunk
+        while base.base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        self.assertIsInstance(base, np.memmap)
+        self.assertFalse(chunk.flags.writeable)
+
+    def test_unreduced_cts_are_reduced(self):
+        ct = self.scheme.evaluate([["not"]], [self.scheme.encrypt(self.pk, False)])[0]
+        store = LWECiphertextStore.create(self.path("cts"), self.scheme)
+        store.append(ct)
+        np.testing.assert_array_equal(store[0], np.asarray(ct) % q)
+
+    def test_evaluate_slices(self):
+        store = LWECiphertextStore.create(self.path("cts"), self.scheme)
+        a = np.array([True, True, False, False])
+        b = np.array([True, False, True, False])
+        store.append(self.scheme.encrypt_many(self.pk, np.concatenate((a, b))))
+
+        # Each input is a stack: the circuit is evaluated on the 4 pairs of bits at once
+        result = self.scheme.evaluate([["nand", "xor"]], [store[:4], store[4:], store[:4], store[4:]])
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, result[0]), ~(a & b))
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, result[1]), a ^ b)
+
+    def test_evaluate_store(self):
+        a = np.random.randint(0, 2, size=7).astype(bool)
+        b = np.random.randint(0, 2, size=7).astype(bool)
+        inputs = [LWECiphertextStore.create(self.path(name), self.scheme) for name in ["a", "b"]]
+        inputs[0].append(self.scheme.encrypt_many(self.pk, a))
+        inputs[1].append(self.scheme.encrypt_many(self.pk, b))
+        outputs = [LWECiphertextStore.create(self.path(name), self.scheme) for name in ["and", "or", "one"]]
+
+        evaluate_store(self.scheme, [["and", "or", "one"]], inputs * 2, outputs, chunk_size=3)
+        self.assertEqual([len(store) for store in outputs], [7, 7, 7])
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[0][:]), a & b)
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[1][:]), a | b)
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, outputs[2][:]), np.ones(7, dtype=bool))
+
+    def test_evaluate_store_with_constant_operand(self):
+        a = np.random.randint(0, 2, size=7).astype(bool)
+        inputs = LWECiphertextStore.create(self.path("a"), self.scheme)
+        inputs.append(self.scheme.encrypt_many(self.pk, a))
+        output = LWECiphertextStore.create(self.path("not"), self.scheme)
+
+        # The single cyphered text of the constant gate is multiplied by chunks of cyphered texts
+        evaluate_store(self.scheme, [["one", "not"], ["and"]], [inputs], [output], chunk_size=3)
+        np.testing.assert_array_equal(self.scheme.decrypt_many(self.sk, output[:]), ~a)
+
+    def test_invalid_stores(self):
+        store = LWECiphertextStore.create(self.path("cts"), self.scheme)
+        store.append(self.scheme.encrypt(self.pk, True))
+        self.assertRaises(ValueError, store.append, np.zeros((2, n)))
+
+        read_only = LWECiphertextStore.open(self.path("cts"))
+        self.assertRaises(ValueError, read_only.append, self.scheme.encrypt(self.pk, True))
+
+        other = LWEGSW()
+        other.keygen((2 ** 16, n, DiscreteGaussianSampler(1.0)))
+        self.assertRaises(ValueError, LWECiphertextStore.open, self.path("cts"), other)
+
+        # Same modulus and dimension, but the cyphered texts of a base 16 gadget have fewer rows
+        base_16 = LWEGSW()
+        base_16.keygen((q, n, DiscreteGaussianSampler(1.0), 16))
+        self.assertRaises(ValueError, LWECiphertextStore.open, self.path("cts"), base_16)
+
+        with open(self.path("cts") + HEADER_SUFFIX, 'r+b') as f:
+            f.write(b"XXXX")
+        self.assertRaises(ValueError, LWECiphertextStore.open, self.path("cts"))
@@ -1,8 +1,9 @@
+import math
 import unittest
 
 import numpy as np
 
-from LWE.lwe_utils import generate_random_matrix, generate_gadget_matrix, bit_decomp
+from LWE.lwe_utils import generate_random_matrix, generate_gadget_matrix, bit_decomp, mod_matmul
 from tests_utils import generic_test
 
 
@@ -16,6 +17,26 @@ class TestLWEUtils(unittest.TestCase):
              [0, 0, 2], [0, 0, 4], [0, 0, 8]], dtype=np.int32)
         generic_test(generate_gadget_matrix, (q, n), expected_result, "G Gadget Matrix")
 
+    def test_gadget_matrix_cache(self):
+        G = generate_gadget_matrix(4096, 5)
+        self.assertIs(generate_gadget_matrix(4096, 5), G)
+        self.assertIsNot(generate_gadget_matrix(4096, 6), G)
+        # The cached matrix is shared, so it cannot be modified in place
+        with self.assertRaises(ValueError):
+            G += 1
+
+    def test_generate_gadget_matrix_base(self):
+        expected_result = np.array([[1, 0], [16, 0], [0, 1], [0, 16]])
+        generic_test(generate_gadget_matrix, (256, 2, 16), expected_result, "Base 16 G Gadget Matrix")
+
+    def test_base_decomp_mul_G(self):
+        for q in [45, 4096, (1 << 31) - 1]:
+            for base in [4, 16, 64]:
+                matrix = generate_random_matrix(20, 7, q)
+                func = lambda: mod_matmul(bit_decomp(matrix, q, base), generate_gadget_matrix(q, 7, base), q)
+                generic_test(func, (), matrix, f"20x7 matrix base {base} decomposition (q: {q})")
+        self.assertEqual(bit_decomp(generate_random_matrix(3, 4, 4096), 4096, 64).shape, (3, 8))
+
     def test_bit_decomp_1(self):
         matrix = np.array([[1, 2],
                            [3, 4]])
@@ -48,3 +69,59 @@ class TestLWEUtils(unittest.TestCase):
 
         generic_test(func, (), matrix, "100x100 bit decomposition ")
 
+    def test_bit_decomp_matches_reference(self):
+        for q in [2, 11, 128, 4096, 1 << 20]:
+            matrix = generate_random_matrix(17, 9, q)
+            generic_test(bit_decomp, (matrix, q), reference_bit_decomp(matrix, q),
+                         f"17x9 matrix bit decomposition against reference (q: {q})")
+
+    def test_bit_decomp_batch(self):
+        q = 4096
+        n = 4
+        m = n * 12
+        matrices = np.stack([generate_random_matrix(m, n, q) for _ in range(5)])
+        expected_result = np.stack([reference_bit_decomp(matrix, q) for matrix in matrices])
+
+        self.assertEqual(bit_decomp(matrices, q).shape, (5, m, m))
+        generic_test(bit_decomp, (matrices, q), expected_result, "5x48x4 stacked bit decomposition")
+
+    def test_mod_matmul_large_modulus(self):
+        rng = np.random.default_rng(0)
+        for q in [4096, (1 << 31) - 1, (1 << 40) + 15, (1 << 61) - 1]:
+            for r, k, c in [(1, 1, 1), (3, 5, 4), (64, 300, 17), (2, 2000, 3)]:
+                a = rng.integers(-q, q, size=(r, k))
+                b = rng.integers(-q, q, size=(k, c))
+                generic_test(mod_matmul, (a, b, q), reference_mod_matmul(a, b, q),
+                             f"{r}x{k} by {k}x{c} modular product (q: {q})")
+
+    def test_mod_matmul_batch(self):
+        rng = np.random.default_rng(1)
+        q = 1 << 40
+        bits = rng.integers(0, 2, size=(4, 120, 120))
+        matrices = rng.integers(0, q, size=(4, 120, 3))
+        expected_result = np.stack([reference_mod_matmul(a, b, q) for a, b in zip(bits, matrices)])
+        generic_test(mod_matmul, (bits, matrices, q), expected_result, "Stacked modular product (q: 2^40)")
+
+    def test_mod_matmul_modulus_too_large(self):
+        with self.assertRaises(ValueError):
+            mod_matmul(np.ones((2, 2)), np.ones((2, 2)), 1 << 62)
+
+
+def reference_mod_matmul(a: np.ndarray, b: np.ndarray, q: int) -> np.ndarray:
+    """
+    Modular matrix product on Python integers used as a reference for the float64 implementation.
+    """
+    return ((a.astype(object) @ b.astype(object)) % q).astype(np.int64)
+
+
+def reference_bit_decomp(matrix: np.ndarray, q: int) -> np.ndarray:
+    """
+    Element by element bit decomposition used as a reference for the vectorized implementation.
+    """
+    decomp = math.ceil(math.log2(q))
+    result = np.zeros((matrix.shape[0], decomp * matrix.shape[1]), dtype=np.int32)
+    for i in range(matrix.shape[0]):
+        for j in range(matrix.shape[1]):
+            for k in range(decomp):
+                result[i, j * decomp + k] = (matrix[i, j] >> k) & 1
+    return result
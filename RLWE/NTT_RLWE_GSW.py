@@ -0,0 +1,274 @@
+import math
+from typing import List, Tuple, Callable, Union
+
+import numpy as np
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECompiledCircuit import CircuitType
+from FHEProfiler import profiled
+from FHEScheme import FHEScheme
+from error_samplers import ErrorSampler, as_sampler
+from gadget import DEFAULT_BASE, decryption_row, gadget_digits
+from seeded import SeededArray, cached_expand_uniform, expand_uniform, generate_seed
+from serialization import CIPHERTEXT_KIND
+from RLWE.ntt_utils import NegacyclicNTT, generate_gadget_matrix, is_ntt_friendly, negacyclic_ntt, poly_bit_decomp
+
+PublicKeyType = np.ndarray
+PrivateKeyType = np.ndarray
+CypheredTextType = np.ndarray
+# Decryption reads 2^r, the largest power of two not above q / 2, so even plaintexts (e.g. XOR 1 1) are multiples of
+# 2^(r + 1) = q - gap: the gap must be below 2^(r + 1 - MODULUS_GAP_BITS) to keep them close to 0
+MODULUS_GAP_BITS = 5
+KeyGenType = Union[Tuple[int, int, Union[ErrorSampler, Callable[[], int]]],
+                   Tuple[int, int, Union[ErrorSampler, Callable[[], int]], int]]
+
+
+class NTTRLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenType]):
+    """
+    NTTRLWEGSW is a Sage-free implementation of the Ring-LWE-based GSW scheme.
+
+    Polynomials of Z_q[X]/(X^N + 1) are int64 arrays of N values kept in the NTT domain, where the product of two
+    polynomials is a coefficient-wise product. Keys and cyphered texts stay in the NTT domain between gates, the
+    coefficient domain only being needed for the bit decomposition of a multiplication and for decryption.
+    A cyphered text is an array of shape (2 * digits, 2, N).
+
+    Attributes:
+        q: Modulus for the RLWE ring, a prime equal to 1 mod 2N slightly above a power of two (see
+           RLWE.ntt_utils.find_ntt_prime).
+        N: Ring dimension (degree of the polynomial ring).
+        log_q: Logarithm (base 2) of the modulus q.
+        base: Base B = 2^k of the gadget matrix and of the decomposition of cyphered texts.
+        digits: Number of digits in base B of the coefficients, i.e. ceil(log_q / k).
+        error_distribution: Sampler generating random error terms.
+        ntt: Negacyclic NTT over Z_q[X]/(X^N + 1).
+        G: Gadget matrix used in encryption, in the NTT domain.
+        circuit: Gates bound to the gadget matrix and multiplication, used to evaluate compiled circuits.
+
+    Methods:
+        keygen: Generates a key pair for NTTRLWEGSW.
+        encrypt: Encrypts a boolean bit into a cyphered text.
+        encrypt_sk: Encrypts a boolean bit into a cyphered text with the secret key, optionally seeded.
+        decrypt: Decrypts a cyphered text to obtain the original boolean bit.
+        evaluate: Evaluates a binary circuit for a given set of cyphered text inputs.
+        _mul: Internal method for multiplication operation in NTTRLWEGSW.
+    """
+
+    q: int
+    N: int
+    log_q: int
+    base: int
+    digits: int
+    error_distribution: ErrorSampler
+    ntt: NegacyclicNTT
+    G: np.ndarray
+    circuit: FHEBinaryCircuit
+    # The polynomial b of public keys (b, a) and of the rows of seeded cyphered texts is stored, a is expanded
+    seeded_axis = -2
+
+    def keygen(self, parameters: KeyGenType) -> (PublicKeyType, PrivateKeyType):
+        """
+        Generates a key pair.
+
+        :param parameters: Tuple containing modulus q (an NTT-friendly prime slightly above a power of two, see
+                           MODULUS_GAP_BITS), n such that 2**n is the ring dimension, error sampler (or
+                           error distribution function) and optionally the decomposition base, a power of two (2 by
+                           default). A base B = 2^k divides the number of rows of the cyphered texts, and the cost of
+                           their multiplication, by k, but the noise added by each multiplication grows with B.
+        :return: A tuple containing the public key and the private key, whose uniform polynomial a is expanded from
+                 public_key_seed (see compress_public_key).
+        """
+
+        self.q, n, error_distribution = parameters[:3]
+        self.base = parameters[3] if len(parameters) > 3 else DEFAULT_BASE
+        self.error_distribution = as_sampler(error_distribution)
+        self.N = 2 ** n
+        self.log_q = math.ceil(math.log2(self.q))
+        self.digits = gadget_digits(self.q, self.base)
+
+        if not is_ntt_friendly(self.q, self.N):
+            raise ValueError(f"The modulus must be a prime equal to 1 mod {2 * self.N} (see find_ntt_prime)!")
+        power = 1 << (self.q // 2).bit_length()
+        if self.q - power >= power >> MODULUS_GAP_BITS:
+            raise ValueError(f"The modulus must be above a power of two 2^k by less than 2^(k - {MODULUS_GAP_BITS}) "
+                             f"(see find_ntt_prime), {self.q} is {self.q - power} above 2^{power.bit_length() - 1}!")
+
+        # The transform tables and the gadget matrix are shared by the schemes with the same parameters
+        self.ntt = negacyclic_ntt(self.q, self.N)
+        self.G = generate_gadget_matrix(self.q, self.N, self.base)
+        self.circuit = FHEBinaryCircuit[CypheredTextType](self.G, lambda ct1, ct2: self._mul(ct1, ct2), np.stack)
+
+        # A uniform polynomial is uniform in the NTT domain as well
+        self.public_key_seed = generate_seed()
+        a = cached_expand_uniform(self.public_key_seed, (1, self.N), self.q)[0]
+        s = self.ntt.forward(self.error_distribution.sample(self.N))
+        e = self.ntt.forward(self.error_distribution.sample(self.N))
+        b = (-a * s + e) % self.q
+
+        pk = np.stack((b, a))
+        sk = np.stack((np.ones(self.N, dtype=np.int64), s))
+
+        return pk, sk
+
+    def encrypt(self, public_key: PublicKeyType, bit: bool) -> CypheredTextType:
+        """
+        Encrypts a boolean bit into a cyphered text.
+
+        :param public_key: Public key used for encryption, or a compressed public key.
+        :param bit: The boolean bit to be encrypted (True or False).
+        :return: A cyphered text representing the encrypted bit.
+        """
+
+        public_key = self.expand(public_key)
+        if public_key.shape != (2, self.N):
+            raise ValueError(f"Invalid dimensions for the public key: should be 2 polynomials of {self.N} elements")
+
+        t = self.ntt.forward(np.random.randint(0, 2, size=(2 * self.digits, self.N), dtype=np.int64))
+        f = self.ntt.forward(self.error_distribution.sample((2 * self.digits, 2, self.N)))
+
+        result = t[:, np.newaxis, :] * public_key % self.q + f
+
+        if bit:
+            result += self.G
+
+        return result % self.q
+
+    def encrypt_sk(self, secret_key: PrivateKeyType, bit: bool,
+                   seeded: bool = False) -> Union[CypheredTextType, SeededArray]:
+        """
+        Encrypts a boolean bit into a cyphered text with the secret key.
+
+        Each row is a fresh RLWE sample (-a * s + e, a) with a uniform a, to which G is added: this skips the products
+        of the public key by the random polynomials t, and the noise of a row is a single error polynomial. Since
+        a + G_a is uniform as well, a is drawn directly and G only changes the first polynomial of each row into
+        -a * s + e + G_b + G_a * s.
+
+        :param secret_key: Secret key used for encryption.
+        :param bit: The boolean bit to be encrypted (True or False).
+        :param seeded: Whether to expand the polynomials a from a seed, returning a compressed cyphered text of a
+                       single column (see expand).
+        :return: A cyphered text representing the encrypted bit.
+        """
+
+        if secret_key.shape != (2, self.N):
+            raise ValueError(f"Invalid dimensions for the secret key: should be 2 polynomials of {self.N} elements")
+
+        # A uniform polynomial is uniform in the NTT domain as well
+        shape = (2 * self.digits, 2, self.N)
+        seed = generate_seed() if seeded else None
+        if seeded:
+            a = expand_uniform(seed, (2 * self.digits, 1, self.N), self.q)
+        else:
+            a = np.random.randint(0, self.q, size=(2 * self.digits, 1, self.N), dtype=np.int64)
+        e = self.ntt.forward(self.error_distribution.sample((2 * self.digits, 1, self.N)))
+
+        b = (e - a * secret_key[1] % self.q) % self.q
+        if bit:
+            b += np.sum(self.G * secret_key % self.q, axis=1, keepdims=True)
+        b %= self.q
+
+        if seeded:
+            return SeededArray(seed, b, shape, self.seeded_axis, self.q)
+        return np.concatenate((b, a), axis=1)
+
+    def decrypt(self, secret_key: PrivateKeyType, ct: CypheredTextType) -> bool:
+        """
+        Decrypts a cyphered text.
+
+        :param secret_key: Secret key used for decryption.
+        :param ct: Cyphered text to be decrypted.
+        :return: The decrypted boolean bit.
+        """
+
+        if secret_key.shape != (2, self.N):
+            raise ValueError(f"Invalid dimensions for the secret key: should be 2 polynomials of {self.N} elements")
+
+        self._check_dimensions(ct)
+        if ct.ndim != 3:
+            raise ValueError("Cannot decrypt a stack of cyphered texts!")
+
+        # Decryption looks for 2^r, the largest power of two not above q / 2, read from the row holding the largest
+        # power of the base below it on the gadget diagonal
+        r = (self.q // 2).bit_length() - 1
+        index, scale = decryption_row(r, self.base)
+        row = ct[index] % self.q
+        poly = self.ntt.inverse(np.sum(row * secret_key % self.q, axis=0))
+        coeff = poly[0] * scale % self.q
+
+        # The bit is 1 if the constant coefficient is closer to 2^r than to 0
+        return bool(abs((coeff - (1 << r) + self.q // 2) % self.q - self.q // 2) <
+                    abs((coeff + self.q // 2) % self.q - self.q // 2))
+
+    def evaluate(self, binary_circuit: CircuitType, inputs: List[CypheredTextType],
+                 workers: int = 1) -> CypheredTextType:
+        """
+        Evaluates a binary circuit for a given set of cyphered text inputs.
+
+        :param binary_circuit: List of circuit depths where each depth consists of strings with gate names:
+                               AND, NAND, OR, XOR, NOT, or WIRE (no gate), a FHECircuitDAG netlist, or a circuit
+                               compiled with compile.
+        :param inputs: Cyphered texts for which to evaluate the circuit.
+        :param workers: Number of threads evaluating the independent gates of each level concurrently.
+        :return: The cyphered text result after evaluating the circuit.
+        """
+
+        return self.circuit.evaluate_compiled(self.compile(binary_circuit), inputs, workers)
+
+    def _mul(self, CT1: CypheredTextType, CT2: CypheredTextType) -> CypheredTextType:
+        """
+        Internal method for multiplication operation.
+
+        Stacks of k cyphered texts of shape (k, 2 * digits, 2, N) are multiplied pairwise in a single call. A single
+        cyphered text, e.g. the output of a constant gate, is broadcast against a stack.
+
+        :param CT1: First cyphered text (or stack of cyphered texts) for multiplication.
+        :param CT2: Second cyphered text (or stack of cyphered texts) for multiplication.
+        :return: The result of the multiplication operation.
+        """
+
+        self._check_dimensions(CT1)
+        self._check_dimensions(CT2)
+        try:
+            np.broadcast_shapes(CT1.shape, CT2.shape)
+        except ValueError:
+            raise ValueError("Cannot multiply stacks of different numbers of cyphered texts!")
+
+        # Only the decomposition needs the coefficients, the product is computed slot by slot in the NTT domain
+        profiler = self.profiler
+        coefficients = profiled(profiler, "inverse_ntt", self.ntt.inverse, CT2)
+        decomposed = profiled(profiler, "bit_decomp", poly_bit_decomp, coefficients, self.digits,
+                              self.base, self.q)
+        decomposed = profiled(profiler, "forward_ntt", self.ntt.forward, decomposed)
+        return profiled(profiler, "product", self._ntt_product, decomposed, CT1)
+
+    def _ntt_product(self, decomposed: np.ndarray, CT1: CypheredTextType) -> CypheredTextType:
+        """
+        Multiplies the decomposition of the second operand by the first one, slot by slot in the NTT domain.
+        """
+        products = decomposed[..., np.newaxis, :] * (CT1[..., np.newaxis, :, :, :] % self.q) % self.q
+        return np.sum(products, axis=-3) % self.q
+
+    def _check_dimensions(self, ct: CypheredTextType) -> None:
+        """
+        Checks that a cyphered text is a matrix of 2 * digits x 2 polynomials, or a stack of such matrices.
+
+        :param ct: Cyphered text to check.
+        """
+
+        if ct.shape[-3:] != (2 * self.digits, 2, self.N):
+            raise ValueError(
+                f"Invalid dimensions for the cyphered text: should be a matrix of {2 * self.digits} x 2 polynomials of "
+                f"{self.N} elements (input is {' x '.join(str(d) for d in ct.shape)})")
+
+    def _parameters(self) -> Tuple[int, int]:
+        return self.q, self.N.bit_length() - 1
+
+    def _ciphertext_shape(self) -> Tuple[int, ...]:
+        return 2 * self.digits, 2, self.N
+
+    def _to_array(self, value: np.ndarray) -> np.ndarray:
+        return np.asarray(value)
+
+    def _from_array(self, array: np.ndarray, kind: int) -> np.ndarray:
+        if kind == CIPHERTEXT_KIND:
+            self._check_dimensions(array)
+        return array
@@ -1,17 +1,26 @@
 from sage.all import *
 from sage.structure.element import Vector
 
-from typing import List, Tuple, Callable
+import operator
+from typing import List, Tuple, Callable, Union
+
+import numpy as np
 
 from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECompiledCircuit import CircuitType
+from FHEProfiler import profiled
 from FHEScheme import FHEScheme
+from error_samplers import ErrorSampler, as_sampler
+from gadget import DEFAULT_BASE, decryption_row, gadget_digits
+from seeded import cached_expand_uniform, generate_seed
 from RLWE.rlwe_utils import generate_error_poly, generate_random_poly_vector, generate_error_poly_matrix, \
-    generate_gadget_matrix, matrix_poly_bit_decomp
+    generate_gadget_matrix, matrix_poly_bit_decomp, poly_coefficients, quotient_rings
 
 PublicKeyType = Matrix
 PrivateKeyType = Vector
 CypheredTextType = Matrix
-KeyGenType = Tuple[int, int, Callable[[], int]]
+KeyGenType = Union[Tuple[int, int, Union[ErrorSampler, Callable[[], int]]],
+                   Tuple[int, int, Union[ErrorSampler, Callable[[], int]], int]]
 
 
 class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenType]):
@@ -26,14 +35,18 @@ class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenT
         q: Modulus for the RLWE ring.
         N: Ring dimension (degree of the polynomial ring).
         log_q: Logarithm (base 2) of the modulus q.
-        error_distribution: Callable function to generate random error terms.
+        base: Base B = 2^k of the gadget matrix and of the decomposition of cyphered texts.
+        digits: Number of digits in base B of the coefficients, i.e. ceil(log_q / k).
+        error_distribution: Sampler generating random error terms.
         RQ: Quotient ring Z_q[X]/(X^N + 1) for RLWE.
         R2: Quotient ring Z_2[X]/(X^N + 1) for RLWE.
         G: Gadget matrix used in encryption.
+        circuit: Gates bound to the gadget matrix and multiplication, used to evaluate compiled circuits.
 
     Methods:
         keygen: Generates a key pair for RLWEGSW.
         encrypt: Encrypts a boolean bit into a cyphered text.
+        encrypt_sk: Encrypts a boolean bit into a cyphered text with the secret key.
         decrypt: Decrypts a cyphered text to obtain the original boolean bit.
         evaluate: Evaluates a binary circuit for a given set of cyphered text inputs.
         _mul: Internal method for multiplication operation in RLWEGSW.
@@ -42,37 +55,46 @@ class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenT
     q: int
     N: int
     log_q: int
-    error_distribution: Callable[[], int]
+    base: int
+    digits: int
+    error_distribution: ErrorSampler
     RQ: QuotientRing
     R2: QuotientRing
     G: Matrix
+    circuit: FHEBinaryCircuit
+    # The polynomial b of public keys (b, a) is stored, a is expanded from a seed
+    seeded_axis = -2
 
     def keygen(self, parameters: KeyGenType) -> (PrivateKeyType, PublicKeyType):
 
         """
         Generates a key pair.
 
-        :param parameters: Tuple containing modulus q, n such that 2**N is the ring dimension, and error distribution
-                           function.
-        :return: A tuple containing the private key and the public key.
+        :param parameters: Tuple containing modulus q, n such that 2**N is the ring dimension, error sampler (or
+                           error distribution function) and optionally the decomposition base, a power of two (2 by
+                           default), dividing the number of rows of the cyphered texts by log2(base) at the cost of a
+                           larger noise growth.
+        :return: A tuple containing the private key and the public key, whose uniform polynomial a is expanded from
+                 public_key_seed (see compress_public_key).
         """
 
-        self.q, self.N, self.error_distribution = parameters[:3]
+        self.q, self.N, error_distribution = parameters[:3]
+        self.base = parameters[3] if len(parameters) > 3 else DEFAULT_BASE
+        self.error_distribution = as_sampler(error_distribution)
         self.log_q = math.ceil(math.log2(self.q))
+        self.digits = gadget_digits(self.q, self.base)
 
         self.N = 2 ** self.N
 
-        # Creates the polynomial ring Z_q[X]/(X^N + 1)
-        R = PolynomialRing(IntegerModRing(self.q), 'X')
-        self.RQ = QuotientRing(R, R.gen() ** self.N + 1)
-
-        # Creates the polynomial ring Z_2[X]/(X^N +1)
-        R2_temp = PolynomialRing(GF(2), 'X')
-        self.R2 = QuotientRing(R2_temp, R2_temp.gen() ** self.N + 1)
+        # The polynomial rings Z_q[X]/(X^N + 1) and Z_2[X]/(X^N + 1) and the gadget matrix are only created once for
+        # each set of parameters
+        self.RQ, self.R2 = quotient_rings(self.q, self.N)
 
-        self.G = generate_gadget_matrix(self.RQ, 2 * self.log_q)
+        self.G = generate_gadget_matrix(self.RQ, 2 * self.digits, self.base)
+        self.circuit = FHEBinaryCircuit[CypheredTextType](self.G, lambda ct1, ct2: self._mul(ct1, ct2))
 
-        a = self.RQ.random_element()
+        self.public_key_seed = generate_seed()
+        a = self.RQ(cached_expand_uniform(self.public_key_seed, (1, self.N), self.q)[0].tolist())
         s = generate_error_poly(self.RQ, self.N, self.error_distribution)
         e = generate_error_poly(self.RQ, self.N, self.error_distribution)
         b = -a * s + e
@@ -86,13 +108,14 @@ class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenT
         """
         Encrypts a boolean bit into a cyphered text.
 
-        :param public_key: Public key used for encryption.
+        :param public_key: Public key used for encryption, or a compressed public key.
         :param bit: The boolean bit to be encrypted (True or False).
         :return: A cyphered text representing the encrypted bit.
         """
 
-        t = generate_random_poly_vector(self.RQ, 2 * self.log_q)
-        f = generate_error_poly_matrix(self.RQ, self.N, 2 * self.log_q, 2, self.error_distribution)
+        public_key = self.expand(public_key)
+        t = generate_random_poly_vector(self.RQ, 2 * self.digits)
+        f = generate_error_poly_matrix(self.RQ, self.N, 2 * self.digits, 2, self.error_distribution)
 
         result = t * public_key.T + f
 
@@ -101,6 +124,32 @@ class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenT
 
         return result
 
+    def encrypt_sk(self, secret_key: PrivateKeyType, bit: bool) -> CypheredTextType:
+        """
+        Encrypts a boolean bit into a cyphered text with the secret key.
+
+        Each row is a fresh RLWE sample (-a * s + e, a) with a uniform a, to which G is added: this skips the product
+        of the public key by the random polynomials t, and the noise of a row is a single error polynomial.
+
+        :param secret_key: Secret key used for encryption.
+        :param bit: The boolean bit to be encrypted (True or False).
+        :return: A cyphered text representing the encrypted bit.
+        """
+
+        s = secret_key[1, 0]
+        rows = []
+        for _ in range(2 * self.digits):
+            a = self.RQ.random_element()
+            e = generate_error_poly(self.RQ, self.N, self.error_distribution)
+            rows.append([-a * s + e, a])
+
+        result = matrix(self.RQ, rows)
+
+        if bit:
+            result += self.G
+
+        return result
+
     def decrypt(self, secret_key: PrivateKeyType, ct: CypheredTextType) -> bool:
         """
         Decrypts a cyphered text.
@@ -110,27 +159,27 @@ class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenT
         :return: The decrypted boolean bit.
         """
 
+        # The row holding 2^(log_q - 1), or the largest power of the base below it, on the gadget diagonal
+        row, scale = decryption_row(self.log_q - 1, self.base)
         raw_decrypt = ct * secret_key
-        poly = raw_decrypt[self.log_q - 1]
-        coeff = poly.list()[0]
+        poly = raw_decrypt[row]
+        coeff = poly.list()[0] * scale
         return self.q // 4 <= coeff <= 3 * self.q // 4
 
-    def evaluate(self, binary_circuit: List[List[str]], inputs: List[CypheredTextType]) -> CypheredTextType:
+    def evaluate(self, binary_circuit: CircuitType, inputs: List[CypheredTextType],
+                 workers: int = 1) -> CypheredTextType:
         """
         Evaluates a binary circuit for a given set of cyphered text inputs.
 
         :param binary_circuit: List of circuit depths where each depth consists of strings with gate names:
-                               AND, NAND, OR, XOR, NOT, or WIRE (no gate).
+                               AND, NAND, OR, XOR, NOT, or WIRE (no gate), a FHECircuitDAG netlist, or a circuit
+                               compiled with compile.
         :param inputs: Cyphered texts for which to evaluate the circuit.
+        :param workers: Number of threads evaluating the independent gates of each level concurrently.
         :return: The cyphered text result after evaluating the circuit.
         """
 
-        circuit = FHEBinaryCircuit[CypheredTextType](self.G, lambda ct1, ct2: self._mul(ct1, ct2))
-
-        for depth in binary_circuit:
-            circuit.add_depth(depth)
-
-        return circuit.evaluate(inputs)
+        return self.circuit.evaluate_compiled(self.compile(binary_circuit), inputs, workers)
 
     def _mul(self, CT1: CypheredTextType, CT2: CypheredTextType) -> CypheredTextType:
         """
@@ -141,14 +190,34 @@ class RLWEGSW(FHEScheme[PublicKeyType, PrivateKeyType, CypheredTextType, KeyGenT
         :return: The result of the multiplication operation.
         """
 
-        if CT1.nrows() != 2 * self.log_q or CT1.ncols() != 2:
+        if CT1.nrows() != 2 * self.digits or CT1.ncols() != 2:
             raise ValueError(
-                f"Invalid dimensions for the first cyphered text: should be a vector of {2 * self.log_q} x {2} elements (input "
+                f"Invalid dimensions for the first cyphered text: should be a vector of {2 * self.digits} x {2} elements (input "
                 f"is {CT1.nrows()} x {CT1.ncols()})")
 
-        if CT2.nrows() != 2 * self.log_q or CT2.ncols() != 2:
+        if CT2.nrows() != 2 * self.digits or CT2.ncols() != 2:
             raise ValueError(
-                f"Invalid dimensions for the second cyphered text: should be a vector of {2 * self.log_q} x {2} elements (input "
+                f"Invalid dimensions for the second cyphered text: should be a vector of {2 * self.digits} x {2} elements (input "
                 f"is {CT2.nrows()} x {CT2.ncols()})")
 
-        return matrix_poly_bit_decomp(self.RQ, CT2, self.log_q) * CT1
+        decomposed = profiled(self.profiler, "bit_decomp", matrix_poly_bit_decomp, self.RQ, CT2, self.digits,
+                              self.base)
+        return profiled(self.profiler, "matmul", operator.mul, decomposed, CT1)
+
+    def _parameters(self) -> Tuple[int, int]:
+        return self.q, self.N.bit_length() - 1
+
+    def _ciphertext_shape(self) -> Tuple[int, ...]:
+        return 2 * self.digits, 2, self.N
+
+    def _to_array(self, value: Union[Matrix, Vector]) -> np.ndarray:
+        # Vectors become (length, N) arrays and matrices (rows, columns, N) arrays
+        if isinstance(value, Vector):
+            return np.stack([poly_coefficients(self.RQ, poly) for poly in value])
+        return np.stack([np.stack([poly_coefficients(self.RQ, poly) for poly in row]) for row in value.rows()])
+
+    def _from_array(self, array: np.ndarray, kind: int) -> Union[Matrix, Vector]:
+        if array.ndim == 2:
+            return vector(self.RQ, [self.RQ(coeffs.tolist()) for coeffs in array])
+        return Matrix(self.RQ, array.shape[0], array.shape[1],
+                      [self.RQ(coeffs.tolist()) for row in array for coeffs in row])
@@ -0,0 +1,259 @@
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from gadget import DEFAULT_BASE, balanced_digits, gadget_powers
+
+# Number of transforms and gadget matrices kept by parameters
+NTT_CACHE_SIZE = 32
+
+
+def is_prime(p: int) -> bool:
+    """
+    Deterministic Miller-Rabin primality test for integers below 2^64.
+
+    :param p: integer to test.
+    :return: True if p is prime.
+    """
+    if p < 2:
+        return False
+    small_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+    for prime in small_primes:
+        if p % prime == 0:
+            return p == prime
+
+    d, s = p - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for a in small_primes:
+        x = pow(a, d, p)
+        if x in (1, p - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % p
+            if x == p - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_ntt_friendly(q: int, N: int) -> bool:
+    """
+    Checks whether q is a prime supporting a negacyclic NTT of size N, i.e. q = 1 mod 2N.
+
+    :param q: modulus to check.
+    :param N: ring dimension, a power of two.
+    :return: True if Z_q contains a primitive 2N-th root of unity.
+    """
+    return q % (2 * N) == 1 and is_prime(q)
+
+
+def find_ntt_prime(N: int, lower_bound: int) -> int:
+    """
+    Finds the smallest NTT-friendly prime greater than or equal to a lower bound.
+
+    NTTRLWEGSW needs a modulus slightly above a power of two (see NTT_RLWE_GSW.MODULUS_GAP_BITS), which the smallest
+    prime above a power of two lower bound is.
+
+    :param N: ring dimension, a power of two.
+    :param lower_bound: smallest acceptable modulus, a power of two for NTTRLWEGSW.
+    :return: the smallest prime q >= lower_bound such that q = 1 mod 2N.
+    """
+    q = lower_bound + (1 - lower_bound) % (2 * N)
+    while not is_prime(q):
+        q += 2 * N
+    return q
+
+
+def primitive_root_of_unity(order: int, q: int) -> int:
+    """
+    Finds a primitive root of unity of a given power of two order in Z_q.
+
+    :param order: order of the root, a power of two dividing q - 1.
+    :param q: prime modulus.
+    :return: an element psi of Z_q such that psi^(order / 2) = -1.
+    """
+    for g in range(2, q):
+        psi = pow(g, (q - 1) // order, q)
+        if pow(psi, order // 2, q) == q - 1:
+            return psi
+    raise ValueError(f"Z_{q} has no primitive root of unity of order {order}!")
+
+
+def bit_reverse_permutation(N: int) -> np.ndarray:
+    """
+    Generates the bit reversal permutation of the indexes 0 to N - 1.
+    """
+    log_n = N.bit_length() - 1
+    indexes = np.arange(N)
+    result = np.zeros(N, dtype=np.int64)
+    for bit in range(log_n):
+        result |= ((indexes >> bit) & 1) << (log_n - 1 - bit)
+    return result
+
+
+class NegacyclicNTT:
+    """
+    Vectorized number theoretic transform over Z_q[X]/(X^N + 1).
+
+    Polynomials are int64 arrays whose last axis holds the N coefficients, any leading axes being transformed at once.
+    The product of two polynomials is the inverse transform of the coefficient-wise product of their transforms.
+
+    Attributes:
+        q: Prime modulus, equal to 1 mod 2N and below 2^31 so that products of residues fit in int64.
+        N: Ring dimension, a power of two.
+        twist: Powers psi^i of a primitive 2N-th root of unity, turning the negacyclic transform into a cyclic one.
+        untwist: Powers psi^-i multiplied by N^-1, undoing the twist after the inverse cyclic transform.
+        forward_twiddles: Twiddle factors of each butterfly stage of the forward transform.
+        inverse_twiddles: Twiddle factors of each butterfly stage of the inverse transform.
+        bit_reverse: Bit reversal permutation of the coefficient indexes.
+    """
+
+    def __init__(self, q: int, N: int):
+        """
+        :param q: prime modulus, equal to 1 mod 2N.
+        :param N: ring dimension, a power of two.
+        """
+        if N < 2 or N & (N - 1) != 0:
+            raise ValueError("The ring dimension must be a power of two!")
+        if not is_ntt_friendly(q, N):
+            raise ValueError(f"{q} is not a prime equal to 1 mod {2 * N}!")
+        if q >= 1 << 31:
+            raise ValueError("The modulus must be below 2^31!")
+
+        self.q = q
+        self.N = N
+
+        psi = primitive_root_of_unity(2 * N, q)
+        psi_inv = pow(psi, q - 2, q)
+        n_inv = pow(N, q - 2, q)
+
+        self.twist = self._powers(psi, N)
+        self.untwist = self._powers(psi_inv, N) * n_inv % q
+        self.forward_twiddles = self._stage_twiddles(psi * psi % q)
+        self.inverse_twiddles = self._stage_twiddles(psi_inv * psi_inv % q)
+        self.bit_reverse = bit_reverse_permutation(N)
+
+    def forward(self, coeffs: np.ndarray) -> np.ndarray:
+        """
+        Transforms polynomials from the coefficient domain to the NTT domain.
+
+        :param coeffs: array of polynomial coefficients, the last axis being of size N.
+        :return: the reduced transforms, of the same shape.
+        """
+        return self._cyclic_ntt(np.asarray(coeffs, dtype=np.int64) % self.q * self.twist % self.q,
+                                self.forward_twiddles)
+
+    def inverse(self, values: np.ndarray) -> np.ndarray:
+        """
+        Transforms polynomials from the NTT domain back to the coefficient domain.
+
+        :param values: array of transforms, the last axis being of size N.
+        :return: the reduced coefficients, of the same shape.
+        """
+        return self._cyclic_ntt(np.asarray(values, dtype=np.int64) % self.q, self.inverse_twiddles) \
+            * self.untwist % self.q
+
+    def multiply(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Multiplies polynomials given in the coefficient domain.
+
+        :param a: coefficients of the first polynomials.
+        :param b: coefficients of the second polynomials.
+        :return: coefficients of the products in Z_q[X]/(X^N + 1).
+        """
+        return self.inverse(self.forward(a) * self.forward(b) % self.q)
+
+    def _cyclic_ntt(self, values: np.ndarray, stage_twiddles: List[np.ndarray]) -> np.ndarray:
+        """
+        Iterative radix-2 Cooley-Tukey transform applied on the last axis, each stage being a single vectorized
+        butterfly over all the blocks.
+
+        :param values: reduced values, the last axis being of size N.
+        :param stage_twiddles: twiddle factors of each stage, of size 1, 2, ..., N / 2.
+        :return: the reduced cyclic transform.
+        """
+        leading_shape = values.shape[:-1]
+        values = values[..., self.bit_reverse]
+
+        for twiddles in stage_twiddles:
+            half = twiddles.shape[0]
+            blocks = values.reshape(leading_shape + (self.N // (2 * half), 2 * half))
+            even = blocks[..., :half]
+            odd = blocks[..., half:] * twiddles % self.q
+            values = np.concatenate(((even + odd) % self.q, (even - odd) % self.q), axis=-1)
+
+        return values.reshape(leading_shape + (self.N,))
+
+    def _stage_twiddles(self, omega: int) -> List[np.ndarray]:
+        """
+        Computes the twiddle factors of each stage for a primitive N-th root of unity omega.
+        """
+        twiddles = []
+        half = 1
+        while half < self.N:
+            twiddles.append(self._powers(pow(omega, self.N // (2 * half), self.q), half))
+            half *= 2
+        return twiddles
+
+    def _powers(self, base: int, count: int) -> np.ndarray:
+        """
+        Computes the first powers base^0, ..., base^(count - 1) modulo q.
+        """
+        powers = np.ones(count, dtype=np.int64)
+        for i in range(1, count):
+            powers[i] = powers[i - 1] * base % self.q
+        return powers
+
+
+@lru_cache(maxsize=NTT_CACHE_SIZE)
+def negacyclic_ntt(q: int, N: int) -> NegacyclicNTT:
+    """
+    Returns the transform over Z_q[X]/(X^N + 1), whose tables are computed once for each q and N.
+    """
+    return NegacyclicNTT(q, N)
+
+
+@lru_cache(maxsize=NTT_CACHE_SIZE)
+def generate_gadget_matrix(q: int, N: int, base: int = DEFAULT_BASE) -> np.ndarray:
+    """
+    Generates the read-only gadget matrix of shape (2 * digits, 2, N) in the NTT domain, cached for each q, N and
+    decomposition base.
+
+    :param q: modulus.
+    :param N: ring dimension.
+    :param base: decomposition base, a power of two.
+    :return: the gadget matrix, the powers of the base of each column being transforms of constant polynomials.
+    """
+    powers = gadget_powers(q, base)
+    digits = len(powers)
+    # The transform of a constant polynomial is the constant itself on every slot
+    G = np.zeros((2 * digits, 2, N), dtype=np.int64)
+    for i, power in enumerate(powers):
+        G[i, 0, :] = power % q
+        G[digits + i, 1, :] = power % q
+    G.setflags(write=False)
+    return G
+
+
+def poly_bit_decomp(coeffs: np.ndarray, n: int, base: int = DEFAULT_BASE, q: Optional[int] = None) -> np.ndarray:
+    """
+    Generates the bit decomposition of a matrix of polynomials given by their coefficients, or their decomposition
+    in signed digits of a larger base B = 2^k (see gadget.balanced_digits).
+
+    :param coeffs: reduced coefficients of shape (..., c, N), for a matrix of c columns of polynomials.
+    :param n: number of digits of the decomposition.
+    :param base: decomposition base, a power of two.
+    :param q: modulus of the coefficients, needed by bases larger than 2 to center them.
+    :return: polynomials of shape (..., c * n, N), digit k of column j being stored at column j * n + k.
+    """
+    if base != DEFAULT_BASE:
+        digits = np.moveaxis(balanced_digits(coeffs, q, base), -1, -2)
+        return digits.reshape(coeffs.shape[:-2] + (coeffs.shape[-2] * n, coeffs.shape[-1]))
+    shifts = np.arange(n, dtype=np.int64).reshape(-1, 1)
+    bits = (coeffs[..., np.newaxis, :] >> shifts) & 1
+    return bits.reshape(coeffs.shape[:-2] + (coeffs.shape[-2] * n, coeffs.shape[-1]))
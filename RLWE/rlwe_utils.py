@@ -1,74 +1,110 @@
 from sage.all import *
 
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, Tuple, Union
 
+import numpy as np
 
-def generate_gadget_matrix(RQ: QuotientRing, n: int) -> Matrix:
+from error_samplers import ErrorSampler, as_sampler
+from gadget import DEFAULT_BASE
+from RLWE.ntt_utils import poly_bit_decomp as coeff_bit_decomp
+
+# Number of rings and gadget matrices kept by parameters
+RING_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=RING_CACHE_SIZE)
+def quotient_rings(q: int, N: int) -> Tuple[QuotientRing, QuotientRing]:
+    """
+    Creates the quotient rings Z_q[X]/(X^N + 1) and Z_2[X]/(X^N + 1), once for each q and N.
+
+    :param q: The modulus.
+    :param N: The ring dimension.
+    :return: The two quotient rings.
     """
-    Generates the G gadget matrix of size n x 2.
+    R = PolynomialRing(IntegerModRing(q), 'X')
+    R2 = PolynomialRing(GF(2), 'X')
+    return QuotientRing(R, R.gen() ** N + 1), QuotientRing(R2, R2.gen() ** N + 1)
+
+
+@lru_cache(maxsize=RING_CACHE_SIZE)
+def generate_gadget_matrix(RQ: QuotientRing, n: int, base: int = DEFAULT_BASE) -> Matrix:
+    """
+    Generates the G gadget matrix of size n x 2, cached for each ring, number of rows and decomposition base, hence
+    immutable. The first n / 2 rows hold the powers of the base in the first column, the last n / 2 rows in the
+    second one.
 
     :param RQ: The quotient ring Z_q[X]/(X^N + 1).
-    :param n: Number of rows of the matrix.
+    :param n: Number of rows of the matrix, twice the number of digits of the decomposition.
+    :param base: Decomposition base, a power of two.
     :return: The G gadget matrix of size n x 2.
     """
-    g = vector([2 ** i for i in range(n)])
-    return matrix(RQ, n, 2, lambda i, j: g[i - n] if (j == 0 and i < n) or (j == 1 and i >= n) else 0)
+    digits = n // 2
+    g = vector([base ** i for i in range(digits)])
+    G = matrix(RQ, n, 2, lambda i, j: g[i % digits] if (j == 0 and i < digits) or (j == 1 and i >= digits) else 0)
+    G.set_immutable()
+    return G
 
 
-def poly_bit_decomp(RQ: QuotientRing, poly, n: int) -> vector:
+def poly_coefficients(RQ: QuotientRing, poly) -> np.ndarray:
     """
-    Generates the bit decomposition for a polynomial.
+    Lifts the coefficients of a polynomial of RQ to integers.
+
+    :param RQ: The quotient ring Z_q[X]/(X^N + 1).
+    :param poly: The polynomial to lift.
+    :return: An int64 array of the N coefficients, between 0 and q - 1.
+    """
+    coeffs = np.zeros(RQ.degree(), dtype=np.int64)
+    lifted = [int(c) for c in poly.list()]
+    coeffs[:len(lifted)] = lifted
+    return coeffs
+
+
+def poly_bit_decomp(RQ: QuotientRing, poly, n: int, base: int = DEFAULT_BASE) -> vector:
+    """
+    Generates the bit decomposition for a polynomial, or its decomposition in signed digits of a larger base.
 
     :param RQ: The quotient ring Z_q[X]/(X^N + 1).
     :param poly: The input polynomial for bit decomposition.
     :param n:number of bits of the decomposition.
+    :param base: Decomposition base, a power of two.
     :return: A vector representing the result of polynomial bit decomposition.
     """
-    result = zero_vector(RQ, n)
-    coeffs = poly.list()
-
-    for k in range(len(coeffs)):
-        for l in range(n):
-            new_coeff = RQ((coeffs[k] >> l) % 2)
-            result[l] += new_coeff * RQ.gen() ** k
+    bits = coeff_bit_decomp(poly_coefficients(RQ, poly)[np.newaxis, :], n, base, int(RQ.characteristic()))
+    return vector(RQ, [RQ(row.tolist()) for row in bits])
 
-    return result
 
-
-def matrix_poly_bit_decomp(RQ: QuotientRing, matrix: Matrix, n: int) -> Matrix:
+def matrix_poly_bit_decomp(RQ: QuotientRing, matrix: Matrix, n: int, base: int = DEFAULT_BASE) -> Matrix:
     """
     Generates the polynomial bit decomposition matrix of a given polynomial matrix.
 
+    All the bits (or digits) of all the coefficients are extracted at once on the lifted coefficient array, then
+    converted back to polynomials of RQ.
+
     :param RQ: The quotient ring Z_q[X]/(X^N + 1).
     :param matrix: Polynomial matrix for which to perform the polynomial bit decomposition.
     :param n: number of bits of the decomposition
+    :param base: Decomposition base, a power of two.
     :return: The resulting polynomial bit decomposition matrix.
     """
-    new_rows = matrix.nrows()
-    new_cols = n * matrix.ncols()
-
-    result_matrix = Matrix(RQ, new_rows, new_cols)
-
-    for i in range(matrix.nrows()):
-        for j in range(matrix.ncols()):
-            poly = matrix[i, j]
-            bit_decomp = poly_bit_decomp(RQ, poly, n)
-            for k in range(n):
-                result_matrix[i, j*n + k] = bit_decomp[k]
+    coeffs = np.array([[poly_coefficients(RQ, matrix[i, j]) for j in range(matrix.ncols())]
+                       for i in range(matrix.nrows())], dtype=np.int64).reshape(matrix.nrows(), matrix.ncols(), -1)
+    bits = coeff_bit_decomp(coeffs, n, base, int(RQ.characteristic()))
 
-    return result_matrix
+    return Matrix(RQ, bits.shape[0], bits.shape[1], [RQ(row.tolist()) for row in bits.reshape(-1, bits.shape[-1])])
 
 
-def generate_error_poly(RQ: QuotientRing, d: int, error_distribution: Callable[[], int]):
+def generate_error_poly(RQ: QuotientRing, d: int, error_distribution: Union[ErrorSampler, Callable[[], int]]):
     """
     Generates a polynomial in the quotient ring RQ with coefficients determined by the error distribution.
 
     :param RQ: The quotient ring Z_q[X]/(X^N + 1).
     :param d: The degree of the polynomial.
-    :param error_distribution: A callable function returning an integer representing the error term.
+    :param error_distribution: An error sampler or a callable function returning an integer representing the error
+                               term.
     :return: A polynomial in the quotient ring RQ.
     """
-    return RQ.sum([error_distribution() * RQ.gen() ** i for i in range(d)])
+    return RQ([int(c) for c in as_sampler(error_distribution).sample(d)])
 
 
 def generate_random_poly_vector(RQ: QuotientRing, n: int):
@@ -83,7 +119,8 @@ def generate_random_poly_vector(RQ: QuotientRing, n: int):
     return column_matrix([RQ(Z2_X.random_element()) for _ in range(n)])
 
 
-def generate_error_poly_matrix(RQ: QuotientRing, d: int, m: int, n: int, error_distribution: Callable[[], int]):
+def generate_error_poly_matrix(RQ: QuotientRing, d: int, m: int, n: int,
+                               error_distribution: Union[ErrorSampler, Callable[[], int]]):
     """
     Generates a matrix of polynomials in the quotient ring RQ with coefficients determined by the error distribution.
 
@@ -91,7 +128,9 @@ def generate_error_poly_matrix(RQ: QuotientRing, d: int, m: int, n: int, error_d
     :param d: The degree of the polynomials.
     :param m: The number of rows in the matrix.
     :param n: The number of columns in the matrix.
-    :param error_distribution: A callable function returning an integer representing the error term.
+    :param error_distribution: An error sampler or a callable function returning an integer representing the error
+                               term.
     :return: A matrix of polynomials in the quotient ring RQ.
     """
-    return matrix(RQ, m, n, lambda i, j: generate_error_poly(RQ, d, error_distribution))
+    coeffs = as_sampler(error_distribution).sample((m, n, d))
+    return matrix(RQ, m, n, lambda i, j: RQ([int(c) for c in coeffs[i, j]]))
@@ -0,0 +1,256 @@
+import unittest
+
+import numpy as np
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import NegacyclicNTT, find_ntt_prime, generate_gadget_matrix, negacyclic_ntt, poly_bit_decomp
+from serialization import CIPHERTEXT_KIND
+from tests_utils import generic_test, multiple_generic_tests, lwe_sample
+
+n = 5
+q = find_ntt_prime(2 ** n, 2 ** 20)
+# Circuits with several multiplicative depths need a larger noise budget
+deep_q = find_ntt_prime(2 ** n, 2 ** 30)
+error_distribution = lambda: lwe_sample(n, q)
+nb_tests = 100
+
+
+def encrypt_decrypt(scheme, pk, sk, bit) -> bool:
+    ct = scheme.encrypt(pk, bit)
+    return scheme.decrypt(sk, ct)
+
+
+def encrypt_sk_decrypt(scheme, sk, bit) -> bool:
+    ct = scheme.encrypt_sk(sk, bit)
+    return scheme.decrypt(sk, ct)
+
+
+def single_binary_gate(scheme, pk, sk, bit1, bit2, gate) -> bool:
+    ct1 = scheme.encrypt(pk, bit1)
+    ct2 = scheme.encrypt(pk, bit2)
+    ct_gate = scheme.evaluate([[gate]], [ct1, ct2])[0]
+    return scheme.decrypt(sk, ct_gate)
+
+
+def not_gate(scheme, pk, sk, bit) -> bool:
+    ct = scheme.encrypt(pk, bit)
+    ct_gate = scheme.evaluate([["not"]], [ct])[0]
+    return scheme.decrypt(sk, ct_gate)
+
+
+def negacyclic_schoolbook(a: np.ndarray, b: np.ndarray, q: int) -> np.ndarray:
+    """
+    Schoolbook product in Z_q[X]/(X^N + 1), used as a reference for the NTT.
+    """
+    N = len(a)
+    result = [0] * N
+    for i in range(N):
+        for j in range(N):
+            sign = 1 if i + j < N else -1
+            result[(i + j) % N] += sign * int(a[i]) * int(b[j])
+    return np.array(result) % q
+
+
+class TestNTTRLWE(unittest.TestCase):
+
+    def test_ntt_multiplication(self):
+        for N in [2, 16, 128]:
+            ntt_q = find_ntt_prime(N, 2 ** 30)
+            ntt = NegacyclicNTT(ntt_q, N)
+            a = np.random.randint(0, ntt_q, size=N)
+            b = np.random.randint(0, ntt_q, size=N)
+            generic_test(ntt.multiply, (a, b), negacyclic_schoolbook(a, b, ntt_q),
+                         f"Negacyclic NTT product (N: {N}, q: {ntt_q})")
+
+    def test_ntt_round_trip(self):
+        ntt = NegacyclicNTT(q, 2 ** n)
+        coeffs = np.random.randint(0, q, size=(3, 2, 2 ** n))
+        generic_test(lambda: ntt.inverse(ntt.forward(coeffs)), (), coeffs, "NTT round trip")
+
+    def test_cached_transform_and_gadget_matrix(self):
+        self.assertIs(negacyclic_ntt(q, 2 ** n), negacyclic_ntt(q, 2 ** n))
+        scheme1, scheme2 = NTTRLWEGSW(), NTTRLWEGSW()
+        scheme1.keygen((q, n, error_distribution))
+        scheme2.keygen((q, n, error_distribution))
+        self.assertIs(scheme1.ntt, scheme2.ntt)
+        self.assertIs(scheme1.G, scheme2.G)
+        self.assertFalse(scheme1.G.flags.writeable)
+
+    def test_poly_bit_decomp(self):
+        coeffs = np.array([[[5, 2], [7, 0]]])
+        expected_result = np.array([[[1, 0], [0, 1], [1, 0], [1, 0], [1, 0], [1, 0]]])
+        generic_test(poly_bit_decomp, (coeffs, 3), expected_result, "1x2 polynomial matrix bit decomposition")
+
+    def test_poly_base_decomp(self):
+        coeffs = np.random.randint(0, deep_q, size=(3, 2, 2 ** n))
+        decomposed = poly_bit_decomp(coeffs, 6, 64, deep_q)
+        G = generate_gadget_matrix(deep_q, 2 ** n, 64)
+        self.assertEqual((decomposed.shape, G.shape), ((3, 12, 2 ** n), (12, 2, 2 ** n)))
+        # Constant gadget polynomials multiply the digits coefficient-wise
+        generic_test(lambda: np.einsum('kin,ijn->kjn', decomposed, G) % deep_q, (), coeffs,
+                     "Base 64 polynomial matrix decomposition")
+
+    def test_non_ntt_friendly_modulus(self):
+        scheme = NTTRLWEGSW()
+        with self.assertRaises(ValueError):
+            scheme.keygen((4096, n, error_distribution))
+
+    def test_modulus_far_above_a_power_of_two(self):
+        # 2 * 2^r is far from 0 modulo q = 1.5 * 2^(r + 1), so XOR 1 1 and OR 1 1 would decrypt to 1
+        for k in [20, 25]:
+            with self.assertRaises(ValueError):
+                NTTRLWEGSW().keygen((find_ntt_prime(2 ** n, 3 << (k - 1)), n, error_distribution))
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        for gate, expected in [("xor", False), ("or", True), ("and", True)]:
+            multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, True, gate), expected, 10,
+                                   f"NTT RLWE-GSW {gate.upper()} 1 1 with a modulus just above 2^20")
+
+    def test_encrypt_decrypt_0(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(encrypt_decrypt, (scheme, pk, sk, False), False, nb_tests,
+                               f"NTT RLWE-GSW: Encrypt and decrypt 0 (n: {n}, q: {q})")
+
+    def test_encrypt_decrypt_1(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(encrypt_decrypt, (scheme, pk, sk, True), True, nb_tests,
+                               f"NTT RLWE-GSW: Encrypt and decrypt 1 (n: {n}, q: {q})")
+
+    def test_nand_true(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, False, "nand"), True, nb_tests,
+                               f"NTT RLWE-GSW Test: NAND 1 0 (n: {n}, q: {q})")
+
+    def test_nand_false(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, True, "nand"), False, nb_tests,
+                               f"NTT RLWE-GSW Test: NAND 1 1 (n: {n}, q: {q})")
+
+    def test_and_true(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, True, "and"), True, nb_tests,
+                               f"NTT RLWE-GSW Test: AND 1 1 (n: {n}, q: {q})")
+
+    def test_and_false(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, False, "and"), False, nb_tests,
+                               f"NTT RLWE-GSW Test: AND 1 0 (n: {n}, q: {q})")
+
+    def test_or_true(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, False, "or"), True, nb_tests,
+                               f"NTT RLWE-GSW Test: OR 1 0 (n: {n}, q: {q})")
+
+    def test_or_false(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, False, False, "or"), False, nb_tests,
+                               f"NTT RLWE-GSW Test: OR 0 0 (n: {n}, q: {q})")
+
+    def test_xor_true(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, False, "xor"), True, nb_tests,
+                               f"NTT RLWE-GSW Test: XOR 1 0 (n: {n}, q: {q})")
+
+    def test_xor_false(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(single_binary_gate, (scheme, pk, sk, True, True, "xor"), False, nb_tests,
+                               f"NTT RLWE-GSW Test: XOR 1 1 (n: {n}, q: {q})")
+
+    def test_not_gate_true(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(not_gate, (scheme, pk, sk, False), True, nb_tests,
+                               f"NTT RLWE-GSW Test: NOT 0 (n: {n}, q: {q})")
+
+    def test_not_gate_false(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(not_gate, (scheme, pk, sk, True), False, nb_tests,
+                               f"NTT RLWE-GSW Test: NOT 1 (n: {n}, q: {q})")
+
+    def test_compiled_circuit(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((deep_q, n, lambda: lwe_sample(n, deep_q)))
+        compiled = scheme.compile([["and", "xor"], ["or"]])
+        for bits in [(True, True, False, True), (False, True, True, True), (False, False, False, False)]:
+            cts = [scheme.encrypt(pk, bit) for bit in bits]
+            expected_result = (bits[0] and bits[1]) or (bits[2] != bits[3])
+            generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, cts)[0]), (), expected_result,
+                         f"NTT RLWE-GSW compiled circuit on {bits}")
+
+    def test_parallel_evaluation(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((deep_q, n, lambda: lwe_sample(n, deep_q)))
+        binary_circuit = [["and", "nand", "or", "xor"], ["and", "or"]]
+        cts = [scheme.encrypt(pk, bit) for bit in (True, True, False, True, True, False, False, False)]
+        sequential = scheme.evaluate(binary_circuit, cts)
+        parallel = scheme.evaluate(binary_circuit, cts, workers=4)
+        self.assertEqual(len(parallel), len(sequential))
+        for ct_parallel, ct_sequential in zip(parallel, sequential):
+            self.assertTrue(np.array_equal(ct_parallel, ct_sequential))
+
+    def test_batched_gates_match_single_gates(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((deep_q, n, lambda: lwe_sample(n, deep_q)))
+        compiled = scheme.compile([["and", "and", "nand", "nand", "or", "or"], ["and", "or", "wire", "not"]])
+        cts = [scheme.encrypt(pk, bit) for bit in (True, False, True, True, False, False, True, False, True, True,
+                                                   False, True)]
+        single_gates = FHEBinaryCircuit[np.ndarray](scheme.G, scheme._mul)
+        expected_result = single_gates.evaluate_compiled(compiled, cts)
+        for ct, expected_ct in zip(scheme.evaluate(compiled, cts), expected_result):
+            self.assertTrue(np.array_equal(ct, expected_ct))
+
+    def test_encrypt_sk_decrypt(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        for bit in [False, True]:
+            multiple_generic_tests(encrypt_sk_decrypt, (scheme, sk, bit), bit, nb_tests,
+                                   f"NTT RLWE-GSW Encrypt {int(bit)} with the secret key and decrypt (n: {n}, q: {q})")
+        self.assertRaises(ValueError, scheme.encrypt_sk, sk[:1], True)
+
+    def test_secret_key_and_public_key_cyphered_texts_mix(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((deep_q, n, lambda: lwe_sample(n, deep_q)))
+        compiled = scheme.compile([["and", "xor"], ["or"]])
+        for bits in [(True, True, False, True), (False, True, True, True), (False, False, False, False)]:
+            cts = [scheme.encrypt_sk(sk, bit) if i % 2 else scheme.encrypt(pk, bit) for i, bit in enumerate(bits)]
+            expected_result = (bits[0] and bits[1]) or (bits[2] != bits[3])
+            generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, cts)[0]), (), expected_result,
+                         f"NTT RLWE-GSW circuit on secret key and public key cyphered texts {bits}")
+
+    def test_decomposition_bases(self):
+        for base, digits in [(4, 16), (16, 8), (64, 6)]:
+            scheme = NTTRLWEGSW()
+            pk, sk = scheme.keygen((deep_q, n, lambda: lwe_sample(n, deep_q), base))
+            self.assertEqual(scheme.G.shape, (2 * digits, 2, 2 ** n))
+            compiled = scheme.compile([["and", "xor"], ["or"]])
+            for bits in [(True, True, False, True), (False, True, True, True), (False, False, False, False)]:
+                cts = [scheme.encrypt_sk(sk, bit) if i % 2 else scheme.encrypt(pk, bit) for i, bit in enumerate(bits)]
+                self.assertEqual(cts[0].shape, (2 * digits, 2, 2 ** n))
+                expected_result = (bits[0] and bits[1]) or (bits[2] != bits[3])
+                generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, cts)[0]), (), expected_result,
+                             f"NTT RLWE-GSW compiled circuit with a base {base} gadget on {bits}")
+
+    def test_seeded_encryptions(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((deep_q, n, lambda: lwe_sample(n, deep_q)))
+        compressed = scheme.compress_public_key(pk)
+        self.assertEqual(compressed.stored.shape, (1, 2 ** n))
+        compiled = scheme.compile([["and", "xor"], ["or"]])
+        for bits in [(True, True, False, True), (False, True, True, True), (False, False, False, False)]:
+            cts = [scheme.expand(scheme.encrypt_sk(sk, bit, seeded=True), CIPHERTEXT_KIND) if i % 2
+                   else scheme.encrypt(compressed, bit) for i, bit in enumerate(bits)]
+            expected_result = (bits[0] and bits[1]) or (bits[2] != bits[3])
+            generic_test(lambda: scheme.decrypt(sk, scheme.evaluate(compiled, cts)[0]), (), expected_result,
+                         f"NTT RLWE-GSW circuit on seeded cyphered texts and a compressed public key {bits}")
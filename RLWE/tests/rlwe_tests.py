@@ -1,6 +1,7 @@
 import unittest
 
 from RLWE.RLWE_GSW import RLWEGSW
+from serialization import PUBLIC_KEY_KIND, SECRET_KEY_KIND
 from tests_utils import multiple_generic_tests, lwe_sample
 
 n = 5
@@ -14,6 +15,18 @@ def test_encrypt_decrypt(scheme, pk, sk, bit) -> bool:
     return scheme.decrypt(sk, ct)
 
 
+def test_encrypt_sk_decrypt(scheme, sk, bit) -> bool:
+    ct = scheme.encrypt_sk(sk, bit)
+    return scheme.decrypt(sk.column(0), ct)
+
+
+def test_secret_key_gate(scheme, sk, bit1, bit2, gate) -> bool:
+    ct1 = scheme.encrypt_sk(sk, bit1)
+    ct2 = scheme.encrypt_sk(sk, bit2)
+    ct_gate = scheme.evaluate([[gate]], [ct1, ct2])[0]
+    return scheme.decrypt(sk.column(0), ct_gate)
+
+
 def test_single_binary_gate(scheme, pk, sk, bit1, bit2, gate) -> bool:
     ct1 = scheme.encrypt(pk, bit1)
     ct2 = scheme.encrypt(pk, bit2)
@@ -21,6 +34,18 @@ def test_single_binary_gate(scheme, pk, sk, bit1, bit2, gate) -> bool:
     return scheme.decrypt(sk, ct_gate)
 
 
+def test_serialization(scheme, pk, sk, bit) -> bool:
+    pk = scheme.deserialize(scheme.serialize(pk, PUBLIC_KEY_KIND))
+    sk = scheme.deserialize(scheme.serialize(sk, SECRET_KEY_KIND, packed=False))
+    ct = scheme.deserialize(scheme.serialize(scheme.encrypt(pk, bit)))
+    return scheme.decrypt(sk, ct)
+
+
+def test_compressed_public_key(scheme, sk, pk, bit) -> bool:
+    pk = scheme.deserialize(scheme.serialize(scheme.compress_public_key(pk), PUBLIC_KEY_KIND), expand=False)
+    return scheme.decrypt(sk.column(0), scheme.encrypt(pk, bit))
+
+
 def test_not_gate(scheme, pk, sk, bit) -> bool:
     ct = scheme.encrypt(pk, bit)
     ct_gate = scheme.evaluate([["not"]], [ct])[0]
@@ -97,4 +122,35 @@ class TestRLWE(unittest.TestCase):
     def test_not_gate_false(self):
         scheme = RLWEGSW()
         pk, sk = scheme.keygen((q, n, error_distribution))
-        multiple_generic_tests(test_not_gate, (scheme, pk, sk, False), True, nb_tests, f"RLWE-GSW Test: NOT 1 (n: {n}, q: {q})")
\ No newline at end of file
+        multiple_generic_tests(test_not_gate, (scheme, pk, sk, False), True, nb_tests, f"RLWE-GSW Test: NOT 1 (n: {n}, q: {q})")
+
+    def test_serialization(self):
+        scheme = RLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(test_serialization, (scheme, pk, sk, True), True, 10,
+                               f"RLWE-GSW Test: Serialization round trip (n: {n}, q: {q})")
+
+    def test_compressed_public_key(self):
+        scheme = RLWEGSW()
+        # keygen returns the secret key (the column [1, s]) first, the compressed key is the vector (b, a)
+        sk, pk = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(test_compressed_public_key, (scheme, sk, pk, True), True, 10,
+                               f"RLWE-GSW Test: Encrypt with a compressed public key (n: {n}, q: {q})")
+
+    def test_encrypt_sk_decrypt(self):
+        scheme = RLWEGSW()
+        # keygen returns the secret key (the column [1, s]) first
+        sk, _ = scheme.keygen((q, n, error_distribution))
+        multiple_generic_tests(test_encrypt_sk_decrypt, (scheme, sk, True), True, 10,
+                               f"RLWE-GSW Test: Encrypt 1 with the secret key and decrypt (n: {n}, q: {q})")
+        multiple_generic_tests(test_secret_key_gate, (scheme, sk, True, False, "xor"), True, 10,
+                               f"RLWE-GSW Test: XOR of cyphered texts encrypted with the secret key (n: {n}, q: {q})")
+
+    def test_decomposition_base(self):
+        scheme = RLWEGSW()
+        pk, sk = scheme.keygen((q, n, error_distribution, 16))
+        self.assertEqual((scheme.G.nrows(), scheme.G.ncols()), (6, 2))
+        multiple_generic_tests(test_encrypt_decrypt, (scheme, pk, sk, True), True, 10,
+                               f"RLWE-GSW Test: Encrypt and decrypt 1 with a base 16 gadget (n: {n}, q: {q})")
+        multiple_generic_tests(test_single_binary_gate, (scheme, pk, sk, True, True, "and"), True, 10,
+                               f"RLWE-GSW Test: AND 1 1 with a base 16 gadget (n: {n}, q: {q})")
@@ -0,0 +1,61 @@
+from sage.all import *
+
+import unittest
+
+from RLWE.rlwe_utils import generate_gadget_matrix, poly_bit_decomp, matrix_poly_bit_decomp
+from tests_utils import generic_test
+
+q = 4096
+N = 32
+log_q = 12
+
+
+def quotient_ring():
+    R = PolynomialRing(IntegerModRing(q), 'X')
+    return QuotientRing(R, R.gen() ** N + 1)
+
+
+def recompose(RQ, bits) -> list:
+    """
+    Recomposes polynomials from consecutive groups of log_q binary polynomials.
+    """
+    return [RQ.sum([2 ** k * bits[j * log_q + k] for k in range(log_q)]) for j in range(len(bits) // log_q)]
+
+
+class TestRLWEUtils(unittest.TestCase):
+
+    def test_poly_bit_decomp(self):
+        RQ = quotient_ring()
+        poly = RQ([5, 0, 3])
+        expected_result = [RQ([1, 0, 1]), RQ([0, 0, 1]), RQ([1])] + [RQ(0)] * (log_q - 3)
+        generic_test(lambda: list(poly_bit_decomp(RQ, poly, log_q)), (), expected_result,
+                     "Polynomial bit decomposition")
+
+    def test_poly_bit_decomp_recomposition(self):
+        RQ = quotient_ring()
+        poly = RQ.random_element()
+        generic_test(lambda: recompose(RQ, list(poly_bit_decomp(RQ, poly, log_q))), (), [poly],
+                     "Random polynomial bit decomposition")
+
+    def test_matrix_poly_bit_decomp_recomposition(self):
+        RQ = quotient_ring()
+        polys = matrix(RQ, 3, 2, lambda i, j: RQ.random_element())
+        decomposition = matrix_poly_bit_decomp(RQ, polys, log_q)
+
+        self.assertEqual((decomposition.nrows(), decomposition.ncols()), (3, 2 * log_q))
+        generic_test(lambda: [recompose(RQ, list(decomposition.row(i))) for i in range(3)], (),
+                     [list(polys.row(i)) for i in range(3)], "3x2 polynomial matrix bit decomposition")
+
+    def test_generate_gadget_matrix(self):
+        RQ = quotient_ring()
+        expected_result = matrix(RQ, [[1, 0], [16, 0], [256, 0], [0, 1], [0, 16], [0, 256]])
+        generic_test(generate_gadget_matrix, (RQ, 6, 16), expected_result, "Base 16 polynomial gadget matrix")
+
+    def test_matrix_poly_base_decomp_recomposition(self):
+        RQ = quotient_ring()
+        polys = matrix(RQ, 3, 2, lambda i, j: RQ.random_element())
+        decomposition = matrix_poly_bit_decomp(RQ, polys, 3, 16)
+
+        self.assertEqual((decomposition.nrows(), decomposition.ncols()), (3, 6))
+        generic_test(lambda: decomposition * generate_gadget_matrix(RQ, 6, 16), (), polys,
+                     "3x2 polynomial matrix base 16 decomposition")
@@ -0,0 +1,34 @@
+import math
+import timeit
+
+import numpy as np
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from LWE.LWE_GSW import LWEGSW
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, width: int, repeat: int = 3):
+    """
+    Times a level of width AND gates evaluated gate by gate and in stacked batches.
+
+    :return: the gate by gate and batched evaluation times, in seconds.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    compiled = scheme.compile([["and"] * width])
+    cts = list(scheme.encrypt_many(pk, np.random.randint(0, 2, size=2 * width).astype(bool)))
+    single_gates = FHEBinaryCircuit[np.ndarray](scheme.G, scheme._mul)
+
+    single = min(timeit.repeat(lambda: single_gates.evaluate_compiled(compiled, cts), number=1, repeat=repeat))
+    batched = min(timeit.repeat(lambda: scheme.evaluate(compiled, cts), number=1, repeat=repeat))
+    return single, batched
+
+
+if __name__ == '__main__':
+    q = 4096
+    print(f"{'n':>4} {'gates':>6} {'gate by gate (s)':>17} {'batched (s)':>12} {'speedup':>8}")
+    for n in [5, 10, 20]:
+        for width in [16, 64]:
+            single, batched = benchmark(n, q, width)
+            print(f"{n:>4} {width:>6} {single:>17.4f} {batched:>12.4f} {single / batched:>8.2f}")
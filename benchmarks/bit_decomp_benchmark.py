@@ -0,0 +1,45 @@
+import math
+import timeit
+
+import numpy as np
+
+from LWE.lwe_utils import bit_decomp, generate_random_matrix
+
+
+def loop_bit_decomp(matrix: np.ndarray, q: int) -> np.ndarray:
+    """
+    Element by element bit decomposition, as it was implemented before vectorization.
+    """
+    decomp = math.ceil(math.log2(q))
+    result = np.zeros((matrix.shape[0], decomp * matrix.shape[1]), dtype=np.int32)
+    for i in range(matrix.shape[0]):
+        for j in range(matrix.shape[1]):
+            for k in range(decomp):
+                result[i, j * decomp + k] = (matrix[i, j] >> k) & 1
+    return result
+
+
+def benchmark(n: int, q: int, batch: int = 16, repeat: int = 3):
+    """
+    Times the decomposition of a m x n ciphertext, looped and vectorized, and of a stack of `batch` ciphertexts.
+
+    :return: looped time, vectorized time and per-ciphertext time of the stacked decomposition, in seconds.
+    """
+    m = n * math.ceil(math.log2(q))
+    matrix = generate_random_matrix(m, n, q)
+    stack = np.stack([generate_random_matrix(m, n, q) for _ in range(batch)])
+
+    loop_time = min(timeit.repeat(lambda: loop_bit_decomp(matrix, q), number=1, repeat=repeat))
+    vector_time = min(timeit.repeat(lambda: bit_decomp(matrix, q), number=1, repeat=repeat))
+    batch_time = min(timeit.repeat(lambda: bit_decomp(stack, q), number=1, repeat=repeat)) / batch
+
+    return loop_time, vector_time, batch_time
+
+
+if __name__ == '__main__':
+    print(f"{'n':>5} {'q':>10} {'loop (s)':>12} {'vectorized (s)':>15} {'batched (s/ct)':>15} {'speedup':>9}")
+    for n in [5, 10, 20, 40]:
+        for q in [2 ** 12, 2 ** 16, 2 ** 24]:
+            loop_time, vector_time, batch_time = benchmark(n, q)
+            print(f"{n:>5} {q:>10} {loop_time:>12.6f} {vector_time:>15.6f} {batch_time:>15.6f} "
+                  f"{loop_time / vector_time:>8.1f}x")
@@ -0,0 +1,31 @@
+import timeit
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECompiledCircuit import compile_circuit
+
+
+def legacy_evaluate(binary_circuit, inputs):
+    """
+    Evaluation as done before compilation: gates, parsing and validation are redone on every call.
+    """
+    circuit = FHEBinaryCircuit[int](1, lambda a, b: a * b)
+    for depth in binary_circuit:
+        circuit.add_depth(depth)
+    return circuit.evaluate(inputs)
+
+
+if __name__ == '__main__':
+    # Plain integers isolate the circuit overhead from the cost of the homomorphic operations
+    circuit = FHEBinaryCircuit[int](1, lambda a, b: a * b)
+    number = 10000
+    print(f"{'gates':>6} {'rebuilt (us/call)':>18} {'list, cached (us/call)':>23} {'compiled (us/call)':>19}")
+    for width in [4, 16, 64]:
+        binary_circuit = [["and", "xor"] * width, ["or"] * width, ["wire"] * width]
+        inputs = [1] * (4 * width)
+        compiled = compile_circuit(binary_circuit)
+
+        rebuilt = timeit.timeit(lambda: legacy_evaluate(binary_circuit, inputs), number=number) / number
+        cached = timeit.timeit(lambda: circuit.evaluate_compiled(compile_circuit(binary_circuit), inputs),
+                               number=number) / number
+        precompiled = timeit.timeit(lambda: circuit.evaluate_compiled(compiled, inputs), number=number) / number
+        print(f"{4 * width:>6} {rebuilt * 1e6:>18.2f} {cached * 1e6:>23.2f} {precompiled * 1e6:>19.2f}")
@@ -0,0 +1,64 @@
+import math
+import timeit
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_noise import estimate_noise
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+BASES = [2, 4, 16, 64]
+
+
+def benchmark_lwe(n: int, q: int, base: int, count: int = 20):
+    """
+    Times an AND gate and a multiplication of stacks in LWEGSW with a given decomposition base.
+
+    :return: the number of rows of a cyphered text, its size in bytes, the AND and stacked multiplication latencies in
+             seconds and the estimated standard deviation of the noise after an AND gate.
+    """
+    sampler = DiscreteGaussianSampler(1.0)
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, sampler, base))
+    cts = list(scheme.encrypt_many(pk, [True, False]))
+    stacks = scheme.encrypt_many(pk, np.random.randint(0, 2, size=64).astype(bool)).reshape(2, 32, scheme.m, n)
+    compiled = scheme.compile([["and"]])
+    gate = timeit.timeit(lambda: scheme.evaluate(compiled, cts), number=count) / count
+    mul = timeit.timeit(lambda: scheme._mul(stacks[0], stacks[1]), number=count) / count
+    noise, = estimate_noise([["and"]], q, n, sampler, base)
+    return scheme.m, cts[0].nbytes, gate, mul, math.sqrt(noise.variance)
+
+
+def benchmark_ntt(log_N: int, q: int, base: int, count: int = 10):
+    """
+    Times an AND gate in NTTRLWEGSW with a given decomposition base.
+
+    :return: the number of rows of a cyphered text, its size in bytes and the AND latency in seconds.
+    """
+    scheme = NTTRLWEGSW()
+    pk, sk = scheme.keygen((q, log_N, DiscreteGaussianSampler(3.2), base))
+    cts = [scheme.encrypt(pk, True), scheme.encrypt(pk, False)]
+    compiled = scheme.compile([["and"]])
+    gate = timeit.timeit(lambda: scheme.evaluate(compiled, cts), number=count) / count
+    return cts[0].shape[0], cts[0].nbytes, gate
+
+
+if __name__ == '__main__':
+    print("LWE-GSW")
+    print(f"{'n':>4} {'log_q':>6} {'base':>5} {'rows':>6} {'size (KiB)':>11} {'and (ms)':>9} {'mul x32 (ms)':>13} "
+          f"{'noise std':>10}")
+    for n, q in [(10, 1 << 20), (20, 1 << 30), (40, 1 << 40)]:
+        for base in BASES:
+            rows, size, gate, mul, std = benchmark_lwe(n, q, base)
+            print(f"{n:>4} {q.bit_length() - 1:>6} {base:>5} {rows:>6} {size / 1024:>11.1f} {gate * 1e3:>9.3f} "
+                  f"{mul * 1e3:>13.3f} {std:>10.1f}")
+
+    print("NTT RLWE-GSW")
+    print(f"{'N':>6} {'base':>5} {'rows':>6} {'size (KiB)':>11} {'and (ms)':>9}")
+    for log_N in [6, 8, 10]:
+        q = find_ntt_prime(2 ** log_N, 2 ** 30)
+        for base in BASES:
+            rows, size, gate = benchmark_ntt(log_N, q, base)
+            print(f"{2 ** log_N:>6} {base:>5} {rows:>6} {size / 1024:>11.1f} {gate * 1e3:>9.3f}")
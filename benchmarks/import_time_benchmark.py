@@ -0,0 +1,70 @@
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+from LWE.lwe_utils import generate_gadget_matrix
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime, generate_gadget_matrix as generate_ntt_gadget_matrix, negacyclic_ntt
+from error_samplers import DiscreteGaussianSampler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run by a fresh interpreter for each way of starting a LWE-only process
+STARTUPS = {
+    "interpreter only": "pass",
+    "LWE scheme (registry)": "from FHEBackends import create_scheme\ncreate_scheme('lwe')",
+    "LWE scheme (direct)": "from LWE.LWE_GSW import LWEGSW\nLWEGSW()",
+    "test runner (main.py)": "import main",
+}
+if importlib.util.find_spec("sage") is not None:
+    # What every process paid before the backends were loaded lazily
+    STARTUPS["LWE scheme after Sage"] = "from sage.all import *\nfrom LWE.LWE_GSW import LWEGSW\nLWEGSW()"
+
+
+def startup_time(code: str, repeat: int) -> float:
+    """
+    Times a fresh interpreter running some code.
+
+    :return: the median wall time, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(timeit.default_timer() - start)
+    return statistics.median(times)
+
+
+def keygen_time(log_N: int, q: int, cached: bool, repeat: int = 5) -> float:
+    """
+    Times NTTRLWEGSW keygen with the transform and gadget caches filled, or cleared before each keygen.
+
+    :return: the smallest keygen time, in seconds.
+    """
+    scheme = NTTRLWEGSW()
+    parameters = (q, log_N, DiscreteGaussianSampler(3.2))
+
+    def keygen():
+        if not cached:
+            negacyclic_ntt.cache_clear()
+            generate_ntt_gadget_matrix.cache_clear()
+            generate_gadget_matrix.cache_clear()
+        scheme.keygen(parameters)
+
+    scheme.keygen(parameters)
+    return min(timeit.repeat(keygen, number=1, repeat=repeat))
+
+
+if __name__ == '__main__':
+    print(f"{'startup':<24} {'time (ms)':>10}")
+    for name, code in STARTUPS.items():
+        print(f"{name:<24} {startup_time(code, 5) * 1e3:>10.1f}")
+
+    print()
+    print(f"{'N':>6} {'uncached keygen (ms)':>21} {'cached keygen (ms)':>19}")
+    for log_N in [8, 10, 12]:
+        q = find_ntt_prime(2 ** log_N, 2 ** 25)
+        print(f"{2 ** log_N:>6} {keygen_time(log_N, q, False) * 1e3:>21.3f} {keygen_time(log_N, q, True) * 1e3:>19.3f}")
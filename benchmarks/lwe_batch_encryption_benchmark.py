@@ -0,0 +1,36 @@
+import math
+import timeit
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, k: int, repeat: int = 3):
+    """
+    Times the encryption and decryption of k bits, one call per bit and through the batched API.
+
+    :return: per-bit loop and batch encryption times, per-bit loop and batch decryption times, in seconds.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    bits = np.random.randint(0, 2, size=k).astype(bool)
+    cts = scheme.encrypt_many(pk, bits)
+
+    encrypt_loop = min(timeit.repeat(lambda: [scheme.encrypt(pk, bit) for bit in bits], number=1, repeat=repeat))
+    encrypt_batch = min(timeit.repeat(lambda: scheme.encrypt_many(pk, bits), number=1, repeat=repeat))
+    decrypt_loop = min(timeit.repeat(lambda: [scheme.decrypt(sk, ct) for ct in cts], number=1, repeat=repeat))
+    decrypt_batch = min(timeit.repeat(lambda: scheme.decrypt_many(sk, cts), number=1, repeat=repeat))
+
+    return encrypt_loop / k, encrypt_batch / k, decrypt_loop / k, decrypt_batch / k
+
+
+if __name__ == '__main__':
+    q = 4096
+    k = 64
+    print(f"{'n':>4} {'encrypt (s/bit)':>16} {'encrypt_many (s/bit)':>21} {'decrypt (s/bit)':>16} "
+          f"{'decrypt_many (s/bit)':>21}")
+    for n in [5, 10, 20]:
+        encrypt_loop, encrypt_batch, decrypt_loop, decrypt_batch = benchmark(n, q, k)
+        print(f"{n:>4} {encrypt_loop:>16.6f} {encrypt_batch:>21.6f} {decrypt_loop:>16.6f} {decrypt_batch:>21.6f}")
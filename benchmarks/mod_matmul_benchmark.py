@@ -0,0 +1,33 @@
+import math
+import timeit
+
+import numpy as np
+
+from LWE.lwe_utils import bit_decomp, mod_matmul
+
+
+def benchmark(n: int, q: int, repeat: int = 5):
+    """
+    Times the product of a multiplication bit_decomp(CT1) @ CT2 with the int64 path and with mod_matmul.
+
+    :return: the int64 and float64 BLAS times in seconds, and whether the int64 product is exact.
+    """
+    m = n * math.ceil(math.log2(q))
+    rng = np.random.default_rng(0)
+    bits = bit_decomp(rng.integers(0, q, size=(m, n)), q)
+    ct = rng.integers(0, q, size=(m, n))
+
+    int_time = min(timeit.repeat(lambda: (bits.astype(np.int64) @ ct) % q, number=1, repeat=repeat))
+    blas_time = min(timeit.repeat(lambda: mod_matmul(bits, ct, q), number=1, repeat=repeat))
+    exact = np.array_equal((bits.astype(np.int64) @ ct) % q, mod_matmul(bits, ct, q))
+    return int_time, blas_time, exact
+
+
+if __name__ == '__main__':
+    print(f"{'n':>4} {'log q':>6} {'m':>6} {'int64 (s)':>10} {'float64 BLAS (s)':>17} {'speedup':>8}")
+    for log_q in [12, 30, 50]:
+        for n in [10, 20, 40]:
+            int_time, blas_time, exact = benchmark(n, 1 << log_q)
+            m = n * log_q
+            print(f"{n:>4} {log_q:>6} {m:>6} {int_time:>10.4f} {blas_time:>17.4f} {int_time / blas_time:>8.2f}"
+                  + ("" if exact else "  (int64 product overflowed)"))
@@ -0,0 +1,17 @@
+import timeit
+
+import numpy as np
+
+from LWE.lwe_ciphertext import mod_reduce
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    number = 200
+    print(f"{'coefficients':>12} {'% q (ms)':>9} {'mask (ms)':>10} {'speedup':>8}")
+    for size in [1 << 12, 1 << 16, 1 << 20]:
+        values = rng.integers(-(1 << 40), 1 << 40, size=size)
+        q = 4096
+        remainder = timeit.timeit(lambda: values % q, number=number) / number
+        mask = timeit.timeit(lambda: mod_reduce(values, q), number=number) / number
+        print(f"{size:>12} {remainder * 1e3:>9.3f} {mask * 1e3:>10.3f} {remainder / mask:>8.2f}")
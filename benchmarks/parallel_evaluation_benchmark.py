@@ -0,0 +1,32 @@
+import math
+import os
+import timeit
+
+from LWE.LWE_GSW import LWEGSW
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, width: int, workers: int, repeat: int = 3) -> float:
+    """
+    Times the evaluation of a circuit of width AND gates followed by width / 2 XOR gates.
+
+    :return: the evaluation time, in seconds.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    compiled = scheme.compile([["and"] * width, ["xor"] * (width // 2)])
+    cts = list(scheme.encrypt_many(pk, [True] * (2 * width)))
+
+    return min(timeit.repeat(lambda: scheme.evaluate(compiled, cts, workers), number=1, repeat=repeat))
+
+
+if __name__ == '__main__':
+    q = 4096
+    width = 64
+    cores = os.cpu_count()
+    worker_counts = sorted({1, 2, 4, cores})
+    print(f"{cores} cores, {width} AND gates")
+    print(f"{'n':>4} " + " ".join(f"{f'{workers} workers (s)':>16} {'speedup':>8}" for workers in worker_counts))
+    for n in [20, 40, 80]:
+        times = [benchmark(n, q, width, workers) for workers in worker_counts]
+        print(f"{n:>4} " + " ".join(f"{time:>16.4f} {times[0] / time:>8.2f}" for time in times))
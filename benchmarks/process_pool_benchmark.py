@@ -0,0 +1,51 @@
+import math
+import os
+import time
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_process_pool import LWEProcessPool
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, records: int, process_counts):
+    """
+    Evaluates a circuit of depth 3 on records of 8 bits in the current process and with pools of processes.
+
+    :return: the number of records evaluated per second in the current process, then with each pool.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    circuit = scheme.compile([["xor", "and", "or", "nand"], ["xor", "and"], ["or"]])
+    bits = np.random.randint(0, 2, size=(records, 8)).astype(bool)
+    tensor = np.stack([scheme.encrypt_many(pk, record) for record in bits])
+
+    start = time.perf_counter()
+    scheme.evaluate(circuit, [tensor[:, i] for i in range(8)])
+    throughputs = [records / (time.perf_counter() - start)]
+
+    for processes in process_counts:
+        with LWEProcessPool(scheme, processes=processes) as pool:
+            shared = pool.allocate(records, 8)
+            shared.array[:] = tensor
+            # Warms the workers up
+            pool.evaluate_many(circuit, shared)
+            start = time.perf_counter()
+            pool.evaluate_many(circuit, shared)
+            throughputs.append(records / (time.perf_counter() - start))
+            shared.close()
+    return throughputs
+
+
+if __name__ == '__main__':
+    q = 4096
+    records = 128
+    cores = os.cpu_count()
+    process_counts = sorted({1, 2, 4, cores})
+    print(f"{cores} cores, {records} records")
+    print(f"{'n':>4} {'in process (/s)':>16} " + " ".join(f"{f'{processes} processes (/s)':>18}"
+                                                      for processes in process_counts))
+    for n in [10, 20, 40]:
+        throughputs = benchmark(n, q, records, process_counts)
+        print(f"{n:>4} {throughputs[0]:>16.1f} " + " ".join(f"{throughput:>18.1f}" for throughput in throughputs[1:]))
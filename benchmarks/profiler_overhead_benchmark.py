@@ -0,0 +1,40 @@
+import math
+import timeit
+
+import numpy as np
+
+from FHEProfiler import FHEProfiler
+from LWE.LWE_GSW import LWEGSW
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, repeat: int = 20):
+    """
+    Times a circuit of depth 3 without a profiler, with a profiler, and with a profiler tracking memory.
+
+    :return: the three latencies, in seconds, and the profiler of the last run.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    compiled = scheme.compile([["xor", "and", "or", "nand"], ["xor", "and"], ["or"]])
+    cts = list(scheme.encrypt_many(pk, np.random.randint(0, 2, size=8).astype(bool)))
+
+    def run():
+        scheme.evaluate(compiled, cts)
+
+    disabled = min(timeit.repeat(run, number=1, repeat=repeat))
+    with scheme.profile():
+        enabled = min(timeit.repeat(run, number=1, repeat=repeat))
+    with scheme.profile(FHEProfiler(track_memory=True)) as profiler:
+        memory = min(timeit.repeat(run, number=1, repeat=repeat))
+    return disabled, enabled, memory, profiler
+
+
+if __name__ == '__main__':
+    q = 4096
+    print(f"{'n':>4} {'disabled (ms)':>14} {'profiled (ms)':>14} {'with memory (ms)':>17}")
+    for n in [10, 20, 40]:
+        disabled, enabled, memory, profiler = benchmark(n, q)
+        print(f"{n:>4} {disabled * 1e3:>14.3f} {enabled * 1e3:>14.3f} {memory * 1e3:>17.3f}")
+    print()
+    print(profiler.format_summary())
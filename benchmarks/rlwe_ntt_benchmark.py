@@ -0,0 +1,45 @@
+import importlib.util
+import timeit
+
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(scheme, q: int, n: int, repeat: int = 3):
+    """
+    Times keygen, encryption, decryption and an AND gate of a RLWE-GSW scheme.
+
+    :return: keygen, encrypt, decrypt and AND times, in seconds.
+    """
+    keygen_time = min(timeit.repeat(lambda: scheme.keygen((q, n, DiscreteGaussianSampler(3.2))), number=1,
+                                    repeat=repeat))
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(3.2)))
+    ct1 = scheme.encrypt(pk, True)
+    ct2 = scheme.encrypt(pk, True)
+
+    encrypt_time = min(timeit.repeat(lambda: scheme.encrypt(pk, True), number=1, repeat=repeat))
+    decrypt_time = min(timeit.repeat(lambda: scheme.decrypt(sk, ct1), number=1, repeat=repeat))
+    and_time = min(timeit.repeat(lambda: scheme.evaluate([["and"]], [ct1, ct2]), number=1, repeat=repeat))
+
+    return keygen_time, encrypt_time, decrypt_time, and_time
+
+
+def print_result(name: str, n: int, q: int, times) -> None:
+    print(f"{name:>6} {2 ** n:>6} {q:>10} " + " ".join(f"{t:>12.6f}" for t in times))
+
+
+if __name__ == '__main__':
+    sage_available = importlib.util.find_spec("sage") is not None
+    if sage_available:
+        from RLWE.RLWE_GSW import RLWEGSW
+    else:
+        print("Sage is not installed: only the NTT backend is measured")
+
+    print(f"{'scheme':>6} {'N':>6} {'q':>10} {'keygen (s)':>12} {'encrypt (s)':>12} {'decrypt (s)':>12} "
+          f"{'AND (s)':>12}")
+    for n in [5, 7, 10]:
+        q = find_ntt_prime(2 ** n, 2 ** 25)
+        print_result("NTT", n, q, benchmark(NTTRLWEGSW(), q, n))
+        if sage_available and n <= 7:
+            print_result("Sage", n, q, benchmark(RLWEGSW(), q, n, repeat=1))
@@ -0,0 +1,48 @@
+import math
+import timeit
+
+from LWE.LWE_GSW import LWEGSW
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark_lwe(n: int, q: int, count: int = 32):
+    """
+    Times the encryption of a bit with the public key and with the secret key in LWEGSW.
+
+    :return: the public key and secret key encryption latencies, in seconds.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    public = timeit.timeit(lambda: scheme.encrypt(pk, True), number=count) / count
+    secret = timeit.timeit(lambda: scheme.encrypt_sk(sk, True), number=count) / count
+    return public, secret
+
+
+def benchmark_ntt(log_N: int, q: int, count: int = 32):
+    """
+    Times the encryption of a bit with the public key and with the secret key in NTTRLWEGSW.
+
+    :return: the public key and secret key encryption latencies, in seconds.
+    """
+    scheme = NTTRLWEGSW()
+    pk, sk = scheme.keygen((q, log_N, DiscreteGaussianSampler(3.0)))
+    public = timeit.timeit(lambda: scheme.encrypt(pk, True), number=count) / count
+    secret = timeit.timeit(lambda: scheme.encrypt_sk(sk, True), number=count) / count
+    return public, secret
+
+
+if __name__ == '__main__':
+    q = 4096
+    print("LWE-GSW")
+    print(f"{'n':>6} {'public key (us)':>16} {'secret key (us)':>16} {'speedup':>8}")
+    for n in [10, 20, 40, 80]:
+        public, secret = benchmark_lwe(n, q)
+        print(f"{n:>6} {public * 1e6:>16.1f} {secret * 1e6:>16.1f} {public / secret:>8.1f}")
+
+    print("NTT RLWE-GSW")
+    print(f"{'N':>6} {'public key (us)':>16} {'secret key (us)':>16} {'speedup':>8}")
+    for log_N in [6, 8, 10]:
+        public, secret = benchmark_ntt(log_N, find_ntt_prime(2 ** log_N, 2 ** 20))
+        print(f"{2 ** log_N:>6} {public * 1e6:>16.1f} {secret * 1e6:>16.1f} {public / secret:>8.1f}")
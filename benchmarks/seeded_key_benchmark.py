@@ -0,0 +1,88 @@
+import timeit
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+from seeded import cached_expand_uniform
+from serialization import CIPHERTEXT_KIND, PUBLIC_KEY_KIND
+
+
+def load_times(scheme, raw: bytes, seeded: bytes, count: int):
+    """
+    Times the deserialization of a raw and of a seeded value, the latter with a cold and a warm expansion cache.
+
+    :return: the raw, cold and warm load latencies in seconds.
+    """
+    raw_time = timeit.timeit(lambda: scheme.deserialize(raw), number=count) / count
+
+    def cold_load():
+        cached_expand_uniform.cache_clear()
+        scheme.deserialize(seeded)
+
+    cold_time = timeit.timeit(cold_load, number=count) / count
+    warm_time = timeit.timeit(lambda: scheme.deserialize(seeded), number=count) / count
+    return raw_time, cold_time, warm_time
+
+
+def benchmark_public_key(scheme, pk, count: int = 20):
+    """
+    Measures the serialized size and the load time of a public key and of its compressed form.
+
+    :return: the raw and compressed sizes in bytes, and the load times of load_times.
+    """
+    raw = scheme.serialize(pk, PUBLIC_KEY_KIND)
+    seeded = scheme.serialize(scheme.compress_public_key(pk), PUBLIC_KEY_KIND)
+    return (len(raw), len(seeded)) + load_times(scheme, raw, seeded, count)
+
+
+def benchmark_ciphertexts(scheme, raw_value, seeded_value, count: int = 20):
+    """
+    Measures the serialized size and the load time of secret key cyphered texts, with and without seeds. Cyphered
+    texts are expanded without the cache, so the cold and warm load times only differ by noise.
+
+    :return: the raw and seeded sizes in bytes, and the raw and seeded load times in seconds.
+    """
+    raw = scheme.serialize(raw_value, CIPHERTEXT_KIND)
+    seeded = scheme.serialize(seeded_value, CIPHERTEXT_KIND)
+    raw_time, _, seeded_time = load_times(scheme, raw, seeded, count)
+    return len(raw), len(seeded), raw_time, seeded_time
+
+
+if __name__ == '__main__':
+    print("Public keys")
+    print(f"{'scheme':>12} {'size':>6} {'raw (KiB)':>10} {'seeded (KiB)':>13} {'raw load (ms)':>14} "
+          f"{'cold load (ms)':>15} {'warm load (ms)':>15}")
+    for n, q in [(10, 1 << 20), (40, 1 << 40), (100, 1 << 50)]:
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        raw_size, seeded_size, raw_time, cold_time, warm_time = benchmark_public_key(scheme, pk)
+        print(f"{'LWE':>12} {n:>6} {raw_size / 1024:>10.1f} {seeded_size / 1024:>13.1f} {raw_time * 1e3:>14.3f} "
+              f"{cold_time * 1e3:>15.3f} {warm_time * 1e3:>15.3f}")
+    for log_N in [8, 10, 12]:
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((find_ntt_prime(2 ** log_N, 2 ** 30), log_N, DiscreteGaussianSampler(3.2)))
+        raw_size, seeded_size, raw_time, cold_time, warm_time = benchmark_public_key(scheme, pk)
+        print(f"{'NTT RLWE':>12} {2 ** log_N:>6} {raw_size / 1024:>10.1f} {seeded_size / 1024:>13.1f} "
+              f"{raw_time * 1e3:>14.3f} {cold_time * 1e3:>15.3f} {warm_time * 1e3:>15.3f}")
+
+    print("Secret key cyphered texts (stacks of 64 bits for LWE, single bits for NTT RLWE)")
+    print(f"{'scheme':>12} {'size':>6} {'raw (KiB)':>10} {'seeded (KiB)':>13} {'raw load (ms)':>14} "
+          f"{'seeded load (ms)':>17}")
+    bits = np.random.randint(0, 2, size=64).astype(bool)
+    for n, q in [(10, 1 << 20), (40, 1 << 40)]:
+        scheme = LWEGSW()
+        pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        seeded = scheme.encrypt_many_sk(sk, bits, seeded=True)
+        raw_size, seeded_size, raw_time, seeded_time = benchmark_ciphertexts(scheme, seeded.expand(), seeded)
+        print(f"{'LWE':>12} {n:>6} {raw_size / 1024:>10.1f} {seeded_size / 1024:>13.1f} {raw_time * 1e3:>14.3f} "
+              f"{seeded_time * 1e3:>17.3f}")
+    for log_N in [8, 10]:
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((find_ntt_prime(2 ** log_N, 2 ** 30), log_N, DiscreteGaussianSampler(3.2)))
+        seeded = scheme.encrypt_sk(sk, True, seeded=True)
+        raw_size, seeded_size, raw_time, seeded_time = benchmark_ciphertexts(scheme, seeded.expand(), seeded)
+        print(f"{'NTT RLWE':>12} {2 ** log_N:>6} {raw_size / 1024:>10.1f} {seeded_size / 1024:>13.1f} "
+              f"{raw_time * 1e3:>14.3f} {seeded_time * 1e3:>17.3f}")
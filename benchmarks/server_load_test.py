@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import math
+import time
+
+import numpy as np
+
+from FHEServer import FHEClient, FHEServer
+from LWE.LWE_GSW import LWEGSW
+from error_samplers import DiscreteGaussianSampler
+
+CIRCUIT = [["xor", "and", "or", "nand"], ["xor", "and"], ["or"]]
+
+
+async def client_load(scheme, address, requests: int, records, latencies):
+    """
+    Sends requests one after the other from a single client, recording their latencies.
+    """
+    async with await FHEClient.connect(scheme, *address) as client:
+        for i in range(requests):
+            start = time.perf_counter()
+            await client.evaluate("circuit", records[i % len(records)])
+            latencies.append(time.perf_counter() - start)
+
+
+async def load_test(n: int, q: int, clients: int, requests: int, max_batch_size: int, batch_latency: float):
+    """
+    Runs concurrent clients against a loopback server.
+
+    :return: the number of requests answered per second, the client latencies and the metrics of the server.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    records = [list(scheme.encrypt_many(pk, bits)) for bits in np.random.randint(0, 2, size=(16, 8)).astype(bool)]
+    latencies = []
+
+    async with FHEServer(scheme, {"circuit": CIRCUIT}, max_batch_size, batch_latency) as server:
+        await server.start()
+        start = time.perf_counter()
+        await asyncio.gather(*[client_load(scheme, server.address, requests, records, latencies)
+                               for _ in range(clients)])
+        elapsed = time.perf_counter() - start
+        return clients * requests / elapsed, np.array(latencies), server.metrics.snapshot()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test of a loopback evaluation server")
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--q", type=int, default=4096)
+    parser.add_argument("--requests", type=int, default=32, help="requests sent by each client")
+    parser.add_argument("--batch-latency", type=float, default=0.002, help="batching delay of the server, in seconds")
+    arguments = parser.parse_args()
+
+    print(f"{'clients':>8} {'max batch':>10} {'requests/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'mean batch':>11} "
+          f"{'max queue':>10}")
+    for clients in [1, 8, 32]:
+        for max_batch_size in [1, 32]:
+            throughput, latencies, metrics = asyncio.run(load_test(arguments.n, arguments.q, clients,
+                                                                   arguments.requests, max_batch_size,
+                                                                   arguments.batch_latency))
+            print(f"{clients:>8} {max_batch_size:>10} {throughput:>11.1f} "
+                  f"{np.percentile(latencies, 50) * 1000:>9.2f} {np.percentile(latencies, 99) * 1000:>9.2f} "
+                  f"{metrics['mean_batch_size']:>11.1f} {metrics['max_queue_depth']:>10}")
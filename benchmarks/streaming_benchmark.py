@@ -0,0 +1,44 @@
+import math
+import time
+
+import numpy as np
+
+from FHEPipeline import StreamStats
+from LWE.LWE_GSW import LWEGSW
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, records: int, batch_size: int):
+    """
+    Evaluates a circuit of depth 3 on a stream of records of 8 bits, record by record and with the streaming
+    pipeline.
+
+    :return: the record by record throughput and the statistics of the pipeline.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    compiled = scheme.compile([["xor", "and", "or", "nand"], ["xor", "and"], ["or"]])
+    stream = [list(scheme.encrypt_many(pk, bits)) for bits in np.random.randint(0, 2, size=(records, 8)).astype(bool)]
+
+    start = time.perf_counter()
+    for record in stream:
+        scheme.evaluate(compiled, record)
+    single = records / (time.perf_counter() - start)
+
+    stats = StreamStats()
+    for _ in scheme.evaluate_stream(compiled, iter(stream), batch_size=batch_size, window=4 * batch_size,
+                                    stats=stats):
+        pass
+    return single, stats
+
+
+if __name__ == '__main__':
+    q = 4096
+    records = 256
+    print(f"{'n':>4} {'batch':>6} {'record by record (/s)':>22} {'stream (/s)':>12} {'p50 latency (ms)':>17} "
+          f"{'p99 latency (ms)':>17}")
+    for n in [5, 10, 20]:
+        for batch_size in [1, 16, 64]:
+            single, stats = benchmark(n, q, records, batch_size)
+            print(f"{n:>4} {batch_size:>6} {single:>22.1f} {stats.throughput():>12.1f} "
+                  f"{stats.latency_percentile(50) * 1000:>17.2f} {stats.latency_percentile(99) * 1000:>17.2f}")
@@ -0,0 +1,219 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from FHEBackends import available_backends, backend_class
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+# Version of the JSON results, bumped when their layout changes
+RESULTS_VERSION = 1
+# Gates measured on their own, with their number of inputs
+GATES = {"and": 2, "nand": 2, "or": 2, "xor": 2, "not": 1}
+# Representative circuits of several multiplicative depths
+CIRCUITS = {
+    "depth-2": [["and", "xor"], ["or"]],
+    "depth-3": [["xor", "and", "or", "nand"], ["xor", "and"], ["or"]],
+}
+# Slowdown of the median latency above which a measure is flagged as a regression
+DEFAULT_THRESHOLD = 0.2
+
+ParametersType = Tuple[int, int]
+
+
+def lwe_grid(quick: bool) -> List[ParametersType]:
+    return [(5, 4096), (10, 4096)] if quick else [(5, 4096), (10, 4096), (20, 2 ** 20), (40, 2 ** 20)]
+
+
+def ntt_grid(quick: bool) -> List[ParametersType]:
+    log_Ns = [5, 7] if quick else [5, 7, 10]
+    return [(log_N, find_ntt_prime(2 ** log_N, 2 ** 25)) for log_N in log_Ns]
+
+
+def sage_grid(quick: bool) -> List[ParametersType]:
+    # Polynomial arithmetic in Sage is much slower, larger rings would dominate the run
+    return [(log_N, find_ntt_prime(2 ** log_N, 2 ** 25)) for log_N in ([5] if quick else [5, 7])]
+
+
+def backends(quick: bool, schemes: Optional[List[str]] = None) -> Dict[str, Tuple[Callable, List[ParametersType],
+                                                                                   float]]:
+    """
+    Returns the schemes to measure by backend name (see FHEBackends), with their class, their grid of (n, q)
+    parameters (n being log2 of the ring dimension for RLWE) and the standard deviation of their errors. Backends
+    whose dependencies are not installed, e.g. RLWEGSW without Sage, are skipped, and only the given schemes are
+    imported.
+    """
+    grids = {
+        "lwe": (lwe_grid(quick), 1.0),
+        "ntt-rlwe": (ntt_grid(quick), 3.2),
+        "rlwe": (sage_grid(quick), 3.2),
+    }
+    return {name: (backend_class(name), *grids[name]) for name in available_backends()
+            if name in grids and (schemes is None or name in schemes)}
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Times repeated calls of a function, then measures the peak memory it allocates in one more call.
+
+    The peak memory is measured apart since tracing allocations slows the calls down.
+
+    :param func: function to measure.
+    :param repeat: number of timed calls.
+    :param warmup: number of calls before timing, filling the caches.
+    :return: the latency statistics in seconds, the throughput in calls per second and the peak memory in bytes.
+    """
+    for _ in range(warmup):
+        func()
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies[i] = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = float(np.median(latencies))
+    return {
+        "samples": repeat,
+        "median": median,
+        "p90": float(np.percentile(latencies, 90)),
+        "p99": float(np.percentile(latencies, 99)),
+        "mean": float(np.mean(latencies)),
+        "min": float(np.min(latencies)),
+        "throughput": 1 / median if median > 0 else float("inf"),
+        "peak_memory": peak_memory,
+    }
+
+
+def benchmark_scheme(name: str, factory: Callable, n: int, q: int, std: float, repeat: int) -> List[Dict]:
+    """
+    Measures keygen, encrypt, decrypt, each gate and each circuit of a scheme with the given parameters.
+
+    Gates and circuits are compiled once, so that only their evaluation is measured.
+
+    :return: one result per operation.
+    """
+    scheme = factory()
+    parameters = (q, n, DiscreteGaussianSampler(std))
+    # Each keygen sets up the scheme, so it is measured on a scheme of its own
+    key_results = measure(lambda: factory().keygen(parameters), max(1, repeat // 4))
+    pk, sk = scheme.keygen(parameters)
+    cts = [scheme.encrypt(pk, bit) for bit in [True, False] * 4]
+
+    operations = {
+        "keygen": None,
+        "encrypt": lambda: scheme.encrypt(pk, True),
+        "decrypt": lambda: scheme.decrypt(sk, cts[0]),
+    }
+    for gate, inputs in GATES.items():
+        compiled = scheme.compile([[gate]])
+        operations[f"gate/{gate}"] = lambda compiled=compiled, inputs=inputs: scheme.evaluate(compiled, cts[:inputs])
+    for circuit, binary_circuit in CIRCUITS.items():
+        compiled = scheme.compile(binary_circuit)
+        operations[f"circuit/{circuit}"] = lambda compiled=compiled: scheme.evaluate(compiled, cts[:compiled.inputs])
+
+    results = []
+    for operation, func in operations.items():
+        statistics = key_results if func is None else measure(func, repeat)
+        results.append({"name": f"{name}/n={n},q={q}/{operation}", "scheme": name, "n": n, "q": q,
+                        "operation": operation, **statistics})
+    return results
+
+
+def run_suite(quick: bool = False, repeat: int = 20, schemes: Optional[List[str]] = None) -> Dict:
+    """
+    Runs the suite over the grid of parameters of each backend.
+
+    :param quick: whether to use a smaller grid.
+    :param repeat: number of timed calls of each operation.
+    :param schemes: names of the backends to measure, all of them by default.
+    :return: the JSON-serializable results, with a description of the environment.
+    """
+    results = []
+    for name, (factory, grid, std) in backends(quick, schemes).items():
+        for n, q in grid:
+            results.extend(benchmark_scheme(name, factory, n, q, std, repeat))
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compares the median latencies of results with those of a baseline.
+
+    :param results: results of run_suite.
+    :param baseline: results of an earlier run_suite, e.g. loaded from a JSON file.
+    :param threshold: relative slowdown above which a measure is a regression.
+    :return: one comparison per measure present in both, with its ratio to the baseline and whether it regressed.
+    """
+    if baseline.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported baseline version {baseline.get('version')}!")
+    baseline_medians = {result["name"]: result["median"] for result in baseline["results"]}
+    comparisons = []
+    for result in results["results"]:
+        if result["name"] not in baseline_medians:
+            continue
+        reference = baseline_medians[result["name"]]
+        ratio = result["median"] / reference if reference > 0 else float("inf")
+        comparisons.append({"name": result["name"], "median": result["median"], "baseline": reference,
+                            "ratio": ratio, "regression": ratio > 1 + threshold})
+    return comparisons
+
+
+def print_results(results: Dict) -> None:
+    print(f"{'measure':<40} {'median (ms)':>12} {'p90 (ms)':>10} {'p99 (ms)':>10} {'ops/s':>10} "
+          f"{'peak (KiB)':>11}")
+    for result in results["results"]:
+        print(f"{result['name']:<40} {result['median'] * 1e3:>12.3f} {result['p90'] * 1e3:>10.3f} "
+              f"{result['p99'] * 1e3:>10.3f} {result['throughput']:>10.1f} {result['peak_memory'] / 1024:>11.1f}")
+
+
+def print_comparisons(comparisons: List[Dict]) -> None:
+    print(f"{'measure':<40} {'baseline (ms)':>14} {'median (ms)':>12} {'ratio':>7}")
+    for comparison in comparisons:
+        flag = "  REGRESSION" if comparison["regression"] else ""
+        print(f"{comparison['name']:<40} {comparison['baseline'] * 1e3:>14.3f} {comparison['median'] * 1e3:>12.3f} "
+              f"{comparison['ratio']:>7.2f}{flag}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark suite of keygen, encryption, gates and circuits")
+    parser.add_argument("--quick", action="store_true", help="measure a smaller grid of parameters")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls of each operation")
+    parser.add_argument("--scheme", action="append", help="backend to measure (lwe, ntt-rlwe, rlwe), all by default")
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the median flagged as a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args.quick, args.repeat, args.scheme)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            comparisons = compare(results, json.load(file), args.threshold)
+        print()
+        print_comparisons(comparisons)
+        if any(comparison["regression"] for comparison in comparisons):
+            sys.exit(1)
@@ -0,0 +1,30 @@
+import math
+import timeit
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_encryption_pool import ZeroEncryptionPool
+from error_samplers import DiscreteGaussianSampler
+
+
+def benchmark(n: int, q: int, count: int = 64):
+    """
+    Times the online encryption of a bit, directly and with a pool of precomputed encryptions of zero.
+
+    :return: the direct and pooled encryption latencies, in seconds.
+    """
+    scheme = LWEGSW()
+    pk, sk = scheme.keygen((q, n, DiscreteGaussianSampler(math.sqrt(n))))
+    direct = timeit.timeit(lambda: scheme.encrypt(pk, True), number=count) / count
+
+    pool = ZeroEncryptionPool(scheme, pk, size=count, start=False)
+    pool.refill()
+    pooled = timeit.timeit(lambda: pool.encrypt(True), number=count) / count
+    return direct, pooled
+
+
+if __name__ == '__main__':
+    q = 4096
+    print(f"{'n':>4} {'direct (us)':>12} {'pooled (us)':>12} {'speedup':>8}")
+    for n in [10, 20, 40]:
+        direct, pooled = benchmark(n, q)
+        print(f"{n:>4} {direct * 1e6:>12.1f} {pooled * 1e6:>12.1f} {direct / pooled:>8.1f}")
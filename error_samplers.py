@@ -0,0 +1,175 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+
+ShapeType = Union[int, Tuple[int, ...]]
+
+# Number of samples drawn to estimate the statistics of a distribution without closed form
+ESTIMATION_SAMPLES = 4096
+
+
+class ErrorSampler(ABC):
+    """
+    Abstract class representing an error distribution able to fill whole arrays in a single vectorized draw.
+
+    Samplers are also callable without argument and then return a single sample, so they can be used wherever an
+    error function is expected.
+
+    Methods:
+        sample: Draws an array of samples of the given shape.
+        variance: Variance of the distribution, used to estimate the noise growth.
+        bound: Largest absolute value of a sample.
+        __call__: Draws a single sample.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        :param seed: optional seed of the random generator used by the sampler.
+        """
+        self.rng = np.random.default_rng(seed)
+
+    @abstractmethod
+    def sample(self, shape: ShapeType) -> np.ndarray:
+        """
+        Draws an array of independent samples.
+
+        :param shape: shape of the array to fill.
+        :return: an int64 array of the given shape.
+        """
+        pass
+
+    def variance(self) -> float:
+        """
+        Returns the variance of the distribution, estimated from samples unless the distribution is known.
+        """
+        return float(np.var(self.sample(ESTIMATION_SAMPLES)))
+
+    def bound(self) -> int:
+        """
+        Returns the largest absolute value of a sample, estimated from samples unless the distribution is known.
+        """
+        return int(np.max(np.abs(self.sample(ESTIMATION_SAMPLES))))
+
+    def __call__(self) -> int:
+        return int(self.sample(1)[0])
+
+
+class DiscreteGaussianSampler(ErrorSampler):
+    """
+    Discrete Gaussian distribution centered on 0, sampled by inversion of a precomputed cumulative distribution table.
+
+    Attributes:
+        sigma: Standard deviation of the distribution.
+        support: Values that can be sampled, from -bound to bound.
+        cdt: Cumulative distribution table over the support.
+    """
+
+    def __init__(self, sigma: float, tail_cut: float = 12.0, seed: Optional[int] = None):
+        """
+        :param sigma: standard deviation of the distribution.
+        :param tail_cut: samples are bounded by tail_cut * sigma in absolute value.
+        :param seed: optional seed of the random generator used by the sampler.
+        """
+        super().__init__(seed)
+        if sigma <= 0:
+            raise ValueError("The standard deviation of a discrete Gaussian must be positive!")
+
+        self.sigma = sigma
+        bound = math.ceil(tail_cut * sigma)
+        self.support = np.arange(-bound, bound + 1, dtype=np.int64)
+        weights = np.exp(-(self.support.astype(np.float64) ** 2) / (2 * sigma ** 2))
+        self.cdt = np.cumsum(weights) / np.sum(weights)
+
+    def variance(self) -> float:
+        return float(np.sum(np.diff(self.cdt, prepend=0) * self.support.astype(np.float64) ** 2))
+
+    def bound(self) -> int:
+        return int(self.support[-1])
+
+    def sample(self, shape: ShapeType) -> np.ndarray:
+        indexes = np.searchsorted(self.cdt, self.rng.random(shape), side='right')
+        # Guards against the last entry of the table being rounded slightly below 1
+        return self.support[np.minimum(indexes, len(self.support) - 1)]
+
+
+class CenteredBinomialSampler(ErrorSampler):
+    """
+    Centered binomial distribution: difference of two sums of eta fair bits, with variance eta / 2.
+
+    Attributes:
+        eta: Number of bits in each sum, samples are bounded by eta in absolute value.
+    """
+
+    def __init__(self, eta: int, seed: Optional[int] = None):
+        """
+        :param eta: number of bits in each sum.
+        :param seed: optional seed of the random generator used by the sampler.
+        """
+        super().__init__(seed)
+        if eta <= 0:
+            raise ValueError("The parameter of a centered binomial distribution must be positive!")
+
+        self.eta = eta
+
+    def variance(self) -> float:
+        return self.eta / 2
+
+    def bound(self) -> int:
+        return self.eta
+
+    def sample(self, shape: ShapeType) -> np.ndarray:
+        return (self.rng.binomial(self.eta, 0.5, shape) - self.rng.binomial(self.eta, 0.5, shape)).astype(np.int64)
+
+
+class UniformTernarySampler(ErrorSampler):
+    """
+    Uniform distribution over {-1, 0, 1}.
+    """
+
+    def variance(self) -> float:
+        return 2 / 3
+
+    def bound(self) -> int:
+        return 1
+
+    def sample(self, shape: ShapeType) -> np.ndarray:
+        return self.rng.integers(-1, 2, size=shape, dtype=np.int64)
+
+
+class CallableSampler(ErrorSampler):
+    """
+    Adapts a per-element error function to the sampler interface, calling it once per coefficient.
+
+    Attributes:
+        error_function: The wrapped error function.
+    """
+
+    def __init__(self, error_function: Callable[[], int]):
+        """
+        :param error_function: callable returning a single error term.
+        """
+        super().__init__()
+        self.error_function = error_function
+
+    def sample(self, shape: ShapeType) -> np.ndarray:
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        return np.array([self.error_function() for _ in range(math.prod(shape))], dtype=np.int64).reshape(shape)
+
+    def __call__(self) -> int:
+        return self.error_function()
+
+
+def as_sampler(error: Union[ErrorSampler, Callable[[], int]]) -> ErrorSampler:
+    """
+    Returns the given error distribution as a sampler, wrapping plain error functions.
+
+    :param error: a sampler or a callable returning a single error term.
+    :return: a sampler drawing from the given distribution.
+    """
+    if isinstance(error, ErrorSampler):
+        return error
+    if callable(error):
+        return CallableSampler(error)
+    raise ValueError("The error distribution must be an ErrorSampler or a callable!")
@@ -0,0 +1,76 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+# Default decomposition base, giving the binary gadget matrix and bit decomposition
+DEFAULT_BASE = 2
+
+
+def base_bits(base: int) -> int:
+    """
+    Returns the number of bits k of a decomposition base B = 2^k.
+    """
+    if base < 2 or base & (base - 1) != 0:
+        raise ValueError("The decomposition base must be a power of two!")
+    return base.bit_length() - 1
+
+
+def gadget_digits(q: int, base: int = DEFAULT_BASE) -> int:
+    """
+    Returns the number of digits in base B of the integers modulo q, i.e. of rows of a block of the gadget matrix:
+    ceil(log2(q) / log2(B)).
+    """
+    k = base_bits(base)
+    return -(-math.ceil(math.log2(q)) // k)
+
+
+def gadget_powers(q: int, base: int = DEFAULT_BASE) -> List[int]:
+    """
+    Returns the powers 1, B, ..., B^(digits - 1) of a block of the gadget matrix.
+    """
+    return [base ** i for i in range(gadget_digits(q, base))]
+
+
+def decryption_row(exponent: int, base: int = DEFAULT_BASE) -> Tuple[int, int]:
+    """
+    Returns where decryption reads the bit. Decryption reads the row of the first block of the gadget matrix holding
+    the power of two 2^exponent closest to q / 2 below it. With a base B = 2^k, that power of two is not always a power
+    of B: decryption then reads the row holding the largest power B^r below it, and multiplies it by
+    2^exponent / B^r, which multiplies the noise as well.
+
+    :param exponent: exponent of the power of two read by decryption.
+    :param base: decomposition base.
+    :return: the row r and the factor 2^exponent / B^r.
+    """
+    k = base_bits(base)
+    row = exponent // k
+    return row, 1 << (exponent - k * row)
+
+
+def balanced_digits(values: np.ndarray, q: int, base: int) -> np.ndarray:
+    """
+    Decomposes integers modulo q into signed digits in base B = 2^k.
+
+    The values are centered in [-q / 2, q / 2) and every digit but the last one is taken in [-B / 2, B / 2), the last
+    one holding the remaining carry, of absolute value at most B / 2 + 1: the digits are about half as large as the
+    ones of an unsigned decomposition, which halves the noise they scale.
+
+    :param values: integers reduced modulo q.
+    :param q: modulus.
+    :param base: decomposition base.
+    :return: an int64 array of shape values.shape + (digits,), the i-th digit weighting B^i.
+    """
+    k = base_bits(base)
+    digits = gadget_digits(q, base)
+    half = base // 2
+    values = np.asarray(values, dtype=np.int64)
+    values = values - q * (values >= (q + 1) // 2)
+    result = np.empty(values.shape + (digits,), dtype=np.int64)
+    for i in range(digits - 1):
+        digit = ((values + half) & (base - 1)) - half
+        result[..., i] = digit
+        values = (values - digit) >> k
+    result[..., digits - 1] = values
+    return result
+
@@ -1,14 +1,58 @@
-from sage.all import *
-
 import unittest
 
+from FHEBackends import available_backends
 from LWE.tests.lwe_test import TestLWE
 from LWE.tests.utils_test import TestLWEUtils
-from RLWE.tests.rlwe_tests import TestRLWE
+from LWE.tests.noise_test import TestNoiseEstimator
+from LWE.tests.ciphertext_test import TestLWECiphertext
+from LWE.tests.store_test import TestLWECiphertextStore
+from LWE.tests.process_pool_test import TestLWEProcessPool
+from LWE.tests.encryption_pool_test import TestZeroEncryptionPool
+from RLWE.tests.ntt_rlwe_test import TestNTTRLWE
+from tests.error_samplers_test import TestErrorSamplers
+from tests.compiled_circuit_test import TestCompiledCircuit
+from tests.circuit_dag_test import TestCircuitDAG
+from tests.circuit_optimizer_test import TestCircuitOptimizer
+from tests.serialization_test import TestSerialization
+from tests.pipeline_test import TestPipeline
+from tests.server_test import TestFHEServer
+from tests.benchmark_suite_test import TestBenchmarkSuite
+from tests.profiler_test import TestProfiler
+from tests.backends_test import TestBackends
+from tests.gadget_test import TestGadget
+from tests.seeded_test import TestSeeded
+
+# The Sage backend is only imported when Sage is installed, the other tests not needing it
+sage_available = "rlwe" in available_backends()
+if sage_available:
+    from RLWE.tests.rlwe_tests import TestRLWE
+    from RLWE.tests.rlwe_utils_tests import TestRLWEUtils
 
 if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TestLWEUtils)
     suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLWE))
-    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRLWE))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestNoiseEstimator))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLWECiphertext))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLWECiphertextStore))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestLWEProcessPool))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestZeroEncryptionPool))
+    if sage_available:
+        suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRLWE))
+        suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestRLWEUtils))
+    else:
+        print("Sage is not installed: the tests of RLWEGSW are skipped")
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestNTTRLWE))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestErrorSamplers))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCompiledCircuit))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCircuitDAG))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestCircuitOptimizer))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSerialization))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestPipeline))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestFHEServer))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBenchmarkSuite))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestProfiler))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestBackends))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestGadget))
+    suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TestSeeded))
 
     unittest.TextTestRunner().run(suite)
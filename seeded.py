@@ -0,0 +1,129 @@
+import secrets
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+# Size of the seeds of the uniform parts of keys and cyphered texts, the key size of the Philox generator
+SEED_BYTES = 16
+# Number of expanded uniform parts kept by seed, e.g. the public keys loaded by an evaluation node
+SEED_CACHE_SIZE = 16
+
+
+def generate_seed() -> bytes:
+    """
+    Generates a random seed from the randomness of the operating system.
+    """
+    return secrets.token_bytes(SEED_BYTES)
+
+
+def expand_uniform(seed: bytes, shape: Tuple[int, ...], q: int) -> np.ndarray:
+    """
+    Expands a seed into an array of integers uniform modulo q.
+
+    The Philox counter-based generator is keyed by the seed, so that the same seed always expands to the same array,
+    on any machine, and the expansion is as fast as sampling with a stateful generator.
+
+    :param seed: seed of SEED_BYTES bytes.
+    :param shape: shape of the array.
+    :param q: modulus.
+    :return: an int64 array of integers in [0, q).
+    """
+    if len(seed) != SEED_BYTES:
+        raise ValueError(f"The seed must be {SEED_BYTES} bytes long!")
+    generator = np.random.Generator(np.random.Philox(key=int.from_bytes(seed, 'little')))
+    return generator.integers(0, q, size=shape, dtype=np.int64)
+
+
+@lru_cache(maxsize=SEED_CACHE_SIZE)
+def cached_expand_uniform(seed: bytes, shape: Tuple[int, ...], q: int) -> np.ndarray:
+    """
+    Expands a seed (see expand_uniform) once for each seed, shape and modulus. The expansions are shared, so they are
+    read-only.
+    """
+    uniform = expand_uniform(seed, shape, q)
+    uniform.setflags(write=False)
+    return uniform
+
+
+class SeededArray:
+    """
+    Compressed form of a key or cyphered text whose coefficients are, along one axis, a slice of stored coefficients
+    followed by uniform coefficients expanded from a seed, e.g. the b column and the uniform matrix A of a LWE public
+    key [b | A].
+
+    Attributes:
+        seed: Seed of the uniform coefficients.
+        stored: Stored coefficients, reduced modulo q.
+        shape: Shape of the expanded array.
+        axis: Axis along which the stored coefficients precede the uniform ones, non-negative.
+        q: Modulus.
+
+    Methods:
+        compress: Compresses an array whose uniform coefficients were expanded from a seed.
+        uniform_shape: Returns the shape of the uniform coefficients.
+        expand: Returns the expanded array.
+        nbytes: Returns the number of bytes of the stored coefficients and of the seed.
+    """
+
+    def __init__(self, seed: bytes, stored: np.ndarray, shape: Tuple[int, ...], axis: int, q: int):
+        """
+        :param seed: seed of the uniform coefficients.
+        :param stored: stored coefficients, reduced modulo q.
+        :param shape: shape of the expanded array.
+        :param axis: axis along which the stored coefficients precede the uniform ones.
+        :param q: modulus.
+        """
+        self.seed = seed
+        self.stored = stored
+        self.shape = tuple(shape)
+        self.axis = axis % len(self.shape)
+        self.q = q
+        if stored.ndim != len(self.shape) or stored.shape[self.axis] > self.shape[self.axis] or \
+                stored.shape != self.shape[:self.axis] + (stored.shape[self.axis],) + self.shape[self.axis + 1:]:
+            raise ValueError(f"Stored coefficients of shape {stored.shape} do not fit an array of shape {self.shape}!")
+
+    @classmethod
+    def compress(cls, array: np.ndarray, seed: bytes, axis: int, stored: int, q: int) -> 'SeededArray':
+        """
+        Compresses an array whose coefficients after the first ones along an axis were expanded from a seed.
+
+        :param array: array reduced modulo q.
+        :param seed: seed the uniform coefficients were expanded from.
+        :param axis: axis along which the stored coefficients precede the uniform ones.
+        :param stored: number of stored slices along the axis.
+        :param q: modulus.
+        :return: the compressed array.
+        """
+        stored_part, uniform = np.split(np.asarray(array), [stored], axis=axis)
+        if not np.array_equal(uniform, cached_expand_uniform(seed, uniform.shape, q)):
+            raise ValueError("The array was not expanded from the seed!")
+        return cls(seed, stored_part, array.shape, axis, q)
+
+    def uniform_shape(self) -> Tuple[int, ...]:
+        """
+        Returns the shape of the uniform coefficients.
+        """
+        shape = list(self.shape)
+        shape[self.axis] -= self.stored.shape[self.axis]
+        return tuple(shape)
+
+    def expand(self, cache: bool = False) -> np.ndarray:
+        """
+        Expands the uniform coefficients and joins them to the stored ones.
+
+        :param cache: whether to keep the expansion of the uniform coefficients, e.g. for a public key loaded several
+                      times, instead of the cyphered texts which are only expanded once.
+        :return: the int64 array.
+        """
+        expand = cached_expand_uniform if cache else expand_uniform
+        return np.concatenate((self.stored, expand(self.seed, self.uniform_shape(), self.q)), axis=self.axis)
+
+    def nbytes(self) -> int:
+        """
+        Returns the number of bytes of the stored coefficients and of the seed.
+        """
+        return self.stored.nbytes + len(self.seed)
+
+    def __repr__(self):
+        return f"SeededArray(shape={self.shape}, stored={self.stored.shape}, axis={self.axis}, q={self.q})"
@@ -0,0 +1,256 @@
+import struct
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from seeded import SEED_BYTES, SeededArray
+
+MAGIC = b"CHEH"
+FORMAT_VERSION = 2
+# Version 1 had no seeded values
+SUPPORTED_VERSIONS = (1, 2)
+
+# Kinds of serialized values
+CIPHERTEXT_KIND = 0
+PUBLIC_KEY_KIND = 1
+SECRET_KEY_KIND = 2
+KINDS = (CIPHERTEXT_KIND, PUBLIC_KEY_KIND, SECRET_KEY_KIND)
+
+# Schemes are identified by their class name
+SCHEME_IDS = {"LWEGSW": 1, "RLWEGSW": 2, "NTTRLWEGSW": 3}
+
+# Set when coefficients are bit-packed, otherwise they are stored as little-endian int64
+PACKED_FLAG = 1
+# Set when the value is a seeded array (see seeded.SeededArray): only its stored coefficients follow the header, the
+# uniform ones being expanded from the seed
+SEEDED_FLAG = 2
+
+# magic, version, scheme id, kind, flags, q, n, bits per coefficient, number of dimensions
+HEADER_FORMAT = "<4sBBBBQQBB"
+DIMENSION_FORMAT = "<Q"
+# seed, axis along which the stored coefficients precede the uniform ones, and number of stored slices along it
+SEED_FORMAT = f"<{SEED_BYTES}sBQ"
+# Payloads start at a multiple of 8 bytes so that unpacked coefficients are aligned
+ALIGNMENT = 8
+
+BufferType = Union[bytes, bytearray, memoryview]
+
+
+class SerializationHeader:
+    """
+    Header of a serialized value.
+
+    Attributes:
+        version: Version of the format.
+        scheme_id: Identifier of the scheme (see SCHEME_IDS).
+        kind: Kind of the value: cyphered text, public key or secret key.
+        packed: Whether the coefficients are bit-packed.
+        q: Modulus of the scheme.
+        n: Dimension parameter given to the keygen of the scheme.
+        bits: Number of bits of each packed coefficient.
+        shape: Shape of the coefficient array, expanded for seeded values.
+        seed: Seed of the uniform coefficients of a seeded value, None otherwise.
+        seed_axis: Axis along which the stored coefficients of a seeded value precede the uniform ones.
+        stored: Number of stored slices of a seeded value along its axis.
+        size: Size of the header in bytes, padding included.
+    """
+
+    def __init__(self, version: int, scheme_id: int, kind: int, packed: bool, q: int, n: int, bits: int,
+                 shape: Tuple[int, ...], seed: Optional[bytes] = None, seed_axis: int = 0, stored: int = 0):
+        self.version = version
+        self.scheme_id = scheme_id
+        self.kind = kind
+        self.packed = packed
+        self.q = q
+        self.n = n
+        self.bits = bits
+        self.shape = shape
+        self.seed = seed
+        self.seed_axis = seed_axis
+        self.stored = stored
+        size = struct.calcsize(HEADER_FORMAT) + len(shape) * struct.calcsize(DIMENSION_FORMAT)
+        if seed is not None:
+            size += struct.calcsize(SEED_FORMAT)
+        self.size = -(-size // ALIGNMENT) * ALIGNMENT
+
+    def to_bytes(self) -> bytes:
+        flags = (PACKED_FLAG if self.packed else 0) | (SEEDED_FLAG if self.seed is not None else 0)
+        header = struct.pack(HEADER_FORMAT, MAGIC, self.version, self.scheme_id, self.kind, flags, self.q, self.n,
+                             self.bits, len(self.shape))
+        header += b"".join(struct.pack(DIMENSION_FORMAT, dimension) for dimension in self.shape)
+        if self.seed is not None:
+            header += struct.pack(SEED_FORMAT, self.seed, self.seed_axis, self.stored)
+        return header.ljust(self.size, b"\0")
+
+    def stored_shape(self) -> Tuple[int, ...]:
+        """
+        Returns the shape of the coefficients following the header, only the stored ones for seeded values.
+        """
+        if self.seed is None:
+            return self.shape
+        return self.shape[:self.seed_axis] + (self.stored,) + self.shape[self.seed_axis + 1:]
+
+    def payload_size(self) -> int:
+        """
+        Returns the size of the coefficients in bytes.
+        """
+        count = int(np.prod(self.stored_shape(), dtype=np.int64))
+        return -(-count * self.bits // 8) if self.packed else 8 * count
+
+    def __repr__(self):
+        return f"SerializationHeader(version={self.version}, scheme_id={self.scheme_id}, kind={self.kind}, " \
+               f"q={self.q}, n={self.n}, shape={self.shape}, packed={self.packed})"
+
+
+def read_header(data: BufferType, check_payload: bool = True) -> SerializationHeader:
+    """
+    Parses the header of a serialized value.
+
+    :param data: serialized value.
+    :param check_payload: whether the coefficients must follow the header, which is not the case of headers stored
+                          apart from their coefficients.
+    :return: the header.
+    """
+    data = memoryview(data)
+    base_size = struct.calcsize(HEADER_FORMAT)
+    if len(data) < base_size:
+        raise ValueError("Serialized value is truncated!")
+
+    magic, version, scheme_id, kind, flags, q, n, bits, ndim = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != MAGIC:
+        raise ValueError("Not a serialized value!")
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Unsupported serialization format version {version}!")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind of serialized value {kind}!")
+
+    dimensions_size = base_size + ndim * struct.calcsize(DIMENSION_FORMAT)
+    if len(data) < dimensions_size:
+        raise ValueError("Serialized value is truncated!")
+    shape = tuple(struct.unpack_from(DIMENSION_FORMAT, data, base_size + i * struct.calcsize(DIMENSION_FORMAT))[0]
+                  for i in range(ndim))
+    seed, seed_axis, stored = None, 0, 0
+    if flags & SEEDED_FLAG:
+        if len(data) < dimensions_size + struct.calcsize(SEED_FORMAT):
+            raise ValueError("Serialized value is truncated!")
+        seed, seed_axis, stored = struct.unpack_from(SEED_FORMAT, data, dimensions_size)
+        if seed_axis >= ndim or stored > shape[seed_axis]:
+            raise ValueError("Invalid seeded value!")
+    header = SerializationHeader(version, scheme_id, kind, bool(flags & PACKED_FLAG), q, n, bits, shape, seed,
+                                 seed_axis, stored)
+    if check_payload and len(data) < header.size + header.payload_size():
+        raise ValueError("Serialized value is truncated!")
+    return header
+
+
+def coefficient_bits(q: int) -> int:
+    """
+    Returns the number of bits needed to store a coefficient reduced modulo q.
+    """
+    return max((q - 1).bit_length(), 1)
+
+
+def pack_coefficients(values: np.ndarray, bits: int) -> bytes:
+    """
+    Packs non-negative integers into bits bits each, least significant bit first.
+
+    :param values: integers below 2^bits.
+    :param bits: number of bits of each integer.
+    :return: the packed bytes.
+    """
+    values = np.ascontiguousarray(values, dtype=np.uint64).reshape(-1)
+    expanded = ((values[:, np.newaxis] >> np.arange(bits, dtype=np.uint64)) & np.uint64(1)).astype(np.uint8)
+    return np.packbits(expanded.reshape(-1), bitorder='little').tobytes()
+
+
+def unpack_coefficients(data: BufferType, bits: int, count: int) -> np.ndarray:
+    """
+    Unpacks integers packed by pack_coefficients.
+
+    :param data: packed bytes.
+    :param bits: number of bits of each integer.
+    :param count: number of integers.
+    :return: an int64 array of the integers.
+    """
+    expanded = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=count * bits, bitorder='little')
+    weights = np.uint64(1) << np.arange(bits, dtype=np.uint64)
+    return (expanded.reshape(count, bits).astype(np.uint64) @ weights).astype(np.int64)
+
+
+def dumps(scheme, value, kind: int = CIPHERTEXT_KIND, packed: bool = True) -> bytes:
+    """
+    Serializes a cyphered text or a key of a scheme.
+
+    :param scheme: scheme the value belongs to, with generated keys.
+    :param value: cyphered text, stack of cyphered texts, public key or secret key, or a seeded array of one of them
+                  (see FHEScheme.compress_public_key), of which only the seed and the stored coefficients are written.
+    :param kind: CIPHERTEXT_KIND, PUBLIC_KEY_KIND or SECRET_KEY_KIND.
+    :param packed: whether to pack each coefficient into ceil(log2 q) bits, or to store it as an int64 which can be
+                   loaded without copy.
+    :return: the header followed by the coefficients reduced modulo q.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind of serialized value {kind}!")
+
+    q, n = scheme._parameters()
+    bits = coefficient_bits(q)
+    if isinstance(value, SeededArray):
+        if value.q != q:
+            raise ValueError(f"The seeded array was expanded modulo {value.q}, the scheme uses {q}!")
+        array = np.asarray(value.stored, dtype=np.int64) % q
+        header = SerializationHeader(FORMAT_VERSION, scheme_id(scheme), kind, packed, q, n, bits, value.shape,
+                                     value.seed, value.axis, array.shape[value.axis])
+    else:
+        array = np.asarray(scheme._to_array(value), dtype=np.int64) % q
+        header = SerializationHeader(FORMAT_VERSION, scheme_id(scheme), kind, packed, q, n, bits, array.shape)
+
+    payload = pack_coefficients(array, bits) if packed else array.astype('<i8').tobytes()
+    return header.to_bytes() + payload
+
+
+def load_array(data: BufferType) -> Tuple[SerializationHeader, np.ndarray]:
+    """
+    Loads the coefficients of a serialized value. Unpacked coefficients are a read-only view of the buffer.
+
+    :param data: serialized value.
+    :return: the header and the int64 coefficients, only the stored ones for seeded values.
+    """
+    header = read_header(data)
+    count = int(np.prod(header.stored_shape(), dtype=np.int64))
+    payload = memoryview(data)[header.size:header.size + header.payload_size()]
+    if header.packed:
+        array = unpack_coefficients(payload, header.bits, count)
+    else:
+        array = np.frombuffer(payload, dtype='<i8', count=count)
+    return header, array.reshape(header.stored_shape())
+
+
+def loads(scheme, data: BufferType, expand: bool = True):
+    """
+    Deserializes a cyphered text or a key of a scheme.
+
+    :param scheme: scheme the value belongs to, with the parameters used to serialize it.
+    :param data: serialized value.
+    :param expand: whether to expand seeded values (see FHEScheme.expand), or to return their seeded array.
+    :return: the cyphered text or key.
+    """
+    header, array = load_array(data)
+    if header.scheme_id != scheme_id(scheme):
+        raise ValueError(f"The value was not serialized by {type(scheme).__name__}!")
+    if (header.q, header.n) != scheme._parameters():
+        raise ValueError(f"The value was serialized with parameters (q: {header.q}, n: {header.n}), the scheme uses "
+                         f"(q: {scheme._parameters()[0]}, n: {scheme._parameters()[1]})!")
+    if header.seed is not None:
+        seeded = SeededArray(header.seed, array, header.shape, header.seed_axis, header.q)
+        return scheme.expand(seeded, header.kind) if expand else seeded
+    return scheme._from_array(array, header.kind)
+
+
+def scheme_id(scheme) -> int:
+    """
+    Returns the identifier of a scheme stored in headers.
+    """
+    name = type(scheme).__name__
+    if name not in SCHEME_IDS:
+        raise ValueError(f"Serialization is not supported for {name}!")
+    return SCHEME_IDS[name]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import FHEBackends
+from FHEBackends import FHEBackend, available_backends, backend_class, backends, create_scheme, register_backend
+from LWE.LWE_GSW import LWEGSW
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+
+
+class TestBackends(unittest.TestCase):
+
+    def test_registered_backends(self):
+        self.assertEqual(backends()[:3], ["lwe", "ntt-rlwe", "rlwe"])
+        self.assertIn("lwe", available_backends())
+        self.assertIs(backend_class("lwe"), LWEGSW)
+        self.assertIsInstance(create_scheme("ntt-rlwe"), NTTRLWEGSW)
+        self.assertRaises(ValueError, backend_class, "missing")
+
+    def test_missing_dependency(self):
+        register_backend("test-missing", "LWE.LWE_GSW", "LWEGSW", requires=("package_which_does_not_exist",))
+        self.addCleanup(FHEBackends._backends.pop, "test-missing")
+        self.assertNotIn("test-missing", available_backends())
+        self.assertRaises(ImportError, backend_class, "test-missing")
+        self.assertTrue(FHEBackend("test", "LWE.LWE_GSW", "LWEGSW").available())
+
+    def test_lazy_import(self):
+        # A fresh interpreter creating a LWE scheme imports neither the RLWE schemes nor Sage
+        code = "import sys\n" \
+               "from FHEBackends import create_scheme\n" \
+               "from error_samplers import DiscreteGaussianSampler\n" \
+               "create_scheme('lwe').keygen((4096, 5, DiscreteGaussianSampler(1.0)))\n" \
+               "print(sorted(name for name in sys.modules if name.startswith(('RLWE', 'sage'))))"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+        self.assertEqual(result.stdout.strip(), "[]")
@@ -0,0 +1,41 @@
+import json
+import unittest
+
+import numpy as np
+
+from benchmarks.suite import RESULTS_VERSION, benchmark_scheme, compare, measure
+from LWE.LWE_GSW import LWEGSW
+
+
+def results(medians):
+    return {"version": RESULTS_VERSION, "results": [{"name": name, "median": median}
+                                                    for name, median in medians.items()]}
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_measure(self):
+        statistics = measure(lambda: np.ones(1 << 16), repeat=5)
+        self.assertEqual(statistics["samples"], 5)
+        self.assertLessEqual(statistics["min"], statistics["median"])
+        self.assertLessEqual(statistics["median"], statistics["p90"])
+        self.assertLessEqual(statistics["p90"], statistics["p99"])
+        # The array of 2^16 floats is traced by tracemalloc
+        self.assertGreaterEqual(statistics["peak_memory"], 8 << 16)
+
+    def test_benchmark_scheme(self):
+        measures = benchmark_scheme("lwe", LWEGSW, 3, 256, 1.0, repeat=2)
+        operations = [result["operation"] for result in measures]
+        self.assertEqual(operations[:3], ["keygen", "encrypt", "decrypt"])
+        self.assertIn("gate/not", operations)
+        self.assertIn("circuit/depth-3", operations)
+        # Results are written as JSON
+        json.dumps(measures)
+
+    def test_compare(self):
+        baseline = results({"a": 1.0, "b": 1.0, "c": 1.0})
+        comparisons = compare(results({"a": 1.1, "b": 1.5, "d": 3.0}), baseline, threshold=0.2)
+        self.assertEqual([comparison["name"] for comparison in comparisons], ["a", "b"])
+        self.assertEqual([comparison["regression"] for comparison in comparisons], [False, True])
+        self.assertAlmostEqual(comparisons[1]["ratio"], 1.5)
+        self.assertRaises(ValueError, compare, results({}), {"version": RESULTS_VERSION + 1, "results": []})
@@ -0,0 +1,95 @@
+import unittest
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECircuitDAG import FHECircuitDAG
+from FHECompiledCircuit import compile_circuit
+from tests_utils import generic_test
+
+
+class CountingCircuit:
+    """
+    Plain integer circuit counting the multiplications it performs.
+    """
+
+    def __init__(self):
+        self.muls = 0
+        self.circuit = FHEBinaryCircuit[int](1, self.mul)
+
+    def mul(self, a: int, b: int) -> int:
+        self.muls += 1
+        return a * b
+
+    def evaluate(self, binary_circuit, inputs) -> list:
+        return [output % 2 for output in self.circuit.evaluate_compiled(compile_circuit(binary_circuit), inputs)]
+
+
+def full_adder() -> FHECircuitDAG:
+    """
+    Full adder where the XOR of the two operands is read by two gates.
+    """
+    dag = FHECircuitDAG(["a", "b", "carry_in"])
+    dag.add_gate("xor", "a", "b", name="a_xor_b")
+    dag.add_gate("xor", "a_xor_b", "carry_in", name="sum")
+    dag.add_gate("and", "a", "b", name="a_and_b")
+    dag.add_gate("and", "a_xor_b", "carry_in", name="propagate")
+    dag.add_gate("or", "a_and_b", "propagate", name="carry_out")
+    dag.set_outputs(["sum", "carry_out"])
+    return dag
+
+
+class TestCircuitDAG(unittest.TestCase):
+
+    def test_full_adder(self):
+        dag = full_adder()
+        for value in range(8):
+            a, b, carry_in = value & 1, (value >> 1) & 1, (value >> 2) & 1
+            total = a + b + carry_in
+            generic_test(CountingCircuit().evaluate, (dag, [a, b, carry_in]), [total % 2, total // 2],
+                         f"Full adder on {a} + {b} + {carry_in}")
+
+    def test_fan_out_evaluated_once(self):
+        dag = FHECircuitDAG(2)
+        product = dag.add_gate("and", 0, 1)
+        dag.set_outputs([dag.add_gate("not", product), dag.add_gate("xor", product, 0), product])
+
+        circuit = CountingCircuit()
+        generic_test(circuit.evaluate, (dag, [1, 1]), [0, 0, 1], "Fan-out of an AND gate")
+        self.assertEqual(circuit.muls, 1)
+
+    def test_from_depths_removes_wire_gates(self):
+        binary_circuit = [["and", "wire", "wire"], ["xor", "wire"], ["or"]]
+        dag = FHECircuitDAG.from_depths(binary_circuit)
+        self.assertEqual(dag.gates(), 3)
+        self.assertEqual(len(compile_circuit(binary_circuit).levels), 3)
+
+        for value in range(16):
+            inputs = [(value >> i) & 1 for i in range(4)]
+            expected_result = [((inputs[0] & inputs[1]) ^ inputs[2]) | inputs[3]]
+            generic_test(CountingCircuit().evaluate, (binary_circuit, inputs), expected_result,
+                         f"Depth-list circuit on {inputs}")
+
+    def test_levels(self):
+        dag = FHECircuitDAG(3)
+        first = dag.add_gate("and", 0, 1)
+        second = dag.add_gate("not", 2)
+        dag.set_outputs([dag.add_gate("and", first, second)])
+        generic_test(lambda: [len(level) for level in compile_circuit(dag).levels], (), [2, 1],
+                     "Independent gates share a level")
+
+    def test_same_structure_same_plan(self):
+        self.assertIs(compile_circuit(full_adder()), compile_circuit(full_adder()))
+
+    def test_errors(self):
+        dag = FHECircuitDAG(["a", "b"])
+        with self.assertRaises(ValueError):
+            dag.add_gate("and", "a")
+        with self.assertRaises(ValueError):
+            dag.add_gate("and", "a", "c")
+        with self.assertRaises(ValueError):
+            dag.add_gate("and", 0, 5)
+        with self.assertRaises(ValueError):
+            dag.add_gate("nor", "a", "b")
+        with self.assertRaises(ValueError):
+            dag.add_gate("and", "a", "b", name="a")
+        with self.assertRaises(ValueError):
+            compile_circuit(dag)
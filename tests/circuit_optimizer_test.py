@@ -0,0 +1,105 @@
+import unittest
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECircuitDAG import FHECircuitDAG
+from FHECircuitOptimizer import optimize_circuit
+from FHECompiledCircuit import compile_circuit
+from tests.circuit_dag_test import full_adder
+
+
+def plain_evaluate(binary_circuit, inputs: list) -> list:
+    """
+    Evaluates a circuit on plain bits.
+    """
+    circuit = FHEBinaryCircuit[int](1, lambda a, b: a * b)
+    return [output % 2 for output in circuit.evaluate_compiled(compile_circuit(binary_circuit), inputs)]
+
+
+def all_inputs(inputs: int) -> list:
+    return [[(value >> i) & 1 for i in range(inputs)] for value in range(2 ** inputs)]
+
+
+class TestCircuitOptimizer(unittest.TestCase):
+
+    def assert_equivalent(self, dag: FHECircuitDAG, optimized: FHECircuitDAG):
+        for inputs in all_inputs(len(dag.input_wires)):
+            self.assertEqual(plain_evaluate(dag, inputs), plain_evaluate(optimized, inputs), f"Inputs {inputs}")
+
+    def test_full_adder(self):
+        dag = full_adder()
+        optimized, report = optimize_circuit(dag)
+        self.assert_equivalent(dag, optimized)
+        self.assertLessEqual(report.muls_after, report.muls_before)
+        self.assertLessEqual(report.mul_depth_after, report.mul_depth_before)
+
+    def test_constant_folding(self):
+        dag = FHECircuitDAG(["a", "b"])
+        one = dag.add_constant(True)
+        zero = dag.add_constant(False)
+        dag.set_outputs([dag.add_gate("and", "a", one), dag.add_gate("or", "b", zero), dag.add_gate("and", "a", zero),
+                         dag.add_gate("xor", "b", one), dag.add_gate("nand", "a", "a")])
+
+        optimized, report = optimize_circuit(dag)
+        self.assert_equivalent(dag, optimized)
+        self.assertEqual(report.muls_after, 0)
+        self.assertEqual(optimized.output_wires[:2], optimized.input_wires)
+
+    def test_common_subexpressions(self):
+        dag = FHECircuitDAG(["a", "b"])
+        dag.set_outputs([dag.add_gate("and", "a", "b"), dag.add_gate("and", "b", "a"),
+                         dag.add_gate("not", dag.add_gate("not", "a"))])
+
+        optimized, report = optimize_circuit(dag)
+        self.assert_equivalent(dag, optimized)
+        self.assertEqual(report.muls_after, 1)
+        self.assertEqual(optimized.output_wires[0], optimized.output_wires[1])
+        self.assertEqual(optimized.output_wires[2], optimized.input_wires[0])
+
+    def test_dead_gates(self):
+        dag = FHECircuitDAG(2)
+        dag.add_gate("and", 0, 1)
+        dag.set_outputs([dag.add_gate("xor", 0, 1)])
+
+        optimized, report = optimize_circuit(dag)
+        self.assertEqual((report.gates_before, report.gates_after), (2, 1))
+        self.assertEqual(report.muls_after, 0)
+
+    def test_shared_products(self):
+        # OR, NAND and AND on the same operands only need one multiplication
+        dag = FHECircuitDAG(2)
+        dag.set_outputs([dag.add_gate("or", 0, 1), dag.add_gate("nand", 0, 1), dag.add_gate("and", 1, 0)])
+
+        optimized, report = optimize_circuit(dag)
+        self.assert_equivalent(dag, optimized)
+        self.assertEqual((report.muls_before, report.muls_after), (3, 1))
+
+    def test_unshared_gates_are_fused(self):
+        dag = FHECircuitDAG(3)
+        dag.set_outputs([dag.add_gate("nand", dag.add_gate("or", 0, 1), 2)])
+
+        optimized, report = optimize_circuit(dag)
+        self.assert_equivalent(dag, optimized)
+        self.assertEqual(report.gates_after, 2)
+        self.assertEqual(report.muls_after, 2)
+
+    def test_chain_rebalancing(self):
+        for gate in ["and", "or", "xor"]:
+            dag = FHECircuitDAG(8)
+            wire = 0
+            for i in range(1, 8):
+                wire = dag.add_gate(gate, wire, i)
+            dag.set_outputs([wire])
+
+            optimized, report = optimize_circuit(dag)
+            self.assert_equivalent(dag, optimized)
+            self.assertEqual(report.muls_after, report.muls_before)
+            if gate != "xor":
+                self.assertEqual((report.mul_depth_before, report.mul_depth_after), (7, 3))
+
+    def test_depth_list_compilation(self):
+        binary_circuit = [["and", "wire", "wire"], ["and", "wire"], ["and"]]
+        compiled = compile_circuit(binary_circuit, optimize=True)
+        self.assertEqual(len(compiled.levels), 2)
+        self.assertIs(compiled, compile_circuit(binary_circuit, optimize=True))
+        for inputs in all_inputs(4):
+            self.assertEqual(plain_evaluate(compiled, inputs), plain_evaluate(binary_circuit, inputs))
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from FHECompiledCircuit import compile_circuit, FHECompiledCircuit
+from tests_utils import generic_test
+
+# Plain integers behave as noiseless cyphered texts: gates compute polynomials whose parity is the gate output
+plain_circuit = FHEBinaryCircuit[int](1, lambda a, b: a * b)
+
+
+def evaluate_plain(binary_circuit, inputs) -> list:
+    return [output % 2 for output in plain_circuit.evaluate_compiled(compile_circuit(binary_circuit), inputs)]
+
+
+def evaluate_legacy(binary_circuit, inputs) -> list:
+    circuit = FHEBinaryCircuit[int](1, lambda a, b: a * b)
+    for depth in binary_circuit:
+        circuit.add_depth(depth)
+    return [output % 2 for output in circuit.evaluate(inputs)]
+
+
+class TestCompiledCircuit(unittest.TestCase):
+
+    def test_compile_instructions(self):
+        compiled = compile_circuit([["AND", "not", "wire"], ["xor", "wire"]])
+        self.assertEqual(compiled.inputs, 4)
+        self.assertEqual(compiled.outputs, 2)
+        self.assertEqual(compiled.output_slots, (6, 3))
+        self.assertEqual(compiled.releases, ((0, 1, 2), (4, 5)))
+        generic_test(lambda: compiled.levels, (), (((1, (0, 1), 4), (4, (2,), 5)), ((3, (4, 5), 6),)),
+                     "Compiled circuit instructions")
+
+    def test_compile_cache(self):
+        compiled = compile_circuit([["and", "or"], ["nand"]])
+        self.assertIs(compile_circuit([["AND", "Or"], ["NAND"]]), compiled)
+        self.assertIs(compile_circuit(compiled), compiled)
+        self.assertIsInstance(compiled, FHECompiledCircuit)
+
+    def test_compile_errors(self):
+        with self.assertRaises(ValueError):
+            compile_circuit([])
+        with self.assertRaises(ValueError):
+            compile_circuit([["and", "nor"]])
+        with self.assertRaises(ValueError):
+            compile_circuit([["and", "or"], ["not"]])
+
+    def test_evaluate_compiled_matches_legacy(self):
+        binary_circuit = [["and", "or", "xor", "not"], ["nand", "wire", "wire"], ["or", "wire"]]
+        for value in range(1 << 7):
+            inputs = [(value >> i) & 1 for i in range(7)]
+            generic_test(evaluate_plain, (binary_circuit, inputs), evaluate_legacy(binary_circuit, inputs),
+                         f"Compiled circuit on inputs {inputs}")
+
+    def test_evaluate_compiled_input_amount(self):
+        with self.assertRaises(ValueError):
+            evaluate_plain([["and"]], [1])
+
+    def test_evaluate_compiled_workers(self):
+        compiled = compile_circuit([["and", "or", "xor", "not"] * 4, ["nand", "wire", "wire"] * 4, ["or", "wire"] * 4])
+        for value in range(0, 1 << 28, 7919 * 613):
+            inputs = [(value >> i) & 1 for i in range(28)]
+            generic_test(lambda: [output % 2 for output in plain_circuit.evaluate_compiled(compiled, inputs, 4)], (),
+                         evaluate_plain(compiled, inputs), f"Compiled circuit with 4 workers on inputs {inputs}")
+        with self.assertRaises(ValueError):
+            plain_circuit.evaluate_compiled(compiled, [0] * 28, 0)
+
+    def test_evaluate_compiled_batches(self):
+        # Plain integers stacked into arrays are multiplied element-wise, one product per gate
+        muls = []
+        batched_circuit = FHEBinaryCircuit[int](1, lambda a, b: muls.append(np.size(a)) or a * b, np.array)
+        compiled = compile_circuit([["and", "and", "and", "or", "or", "xor"], ["nand", "wire", "wire", "wire", "wire"]])
+        for value in range(0, 1 << 12, 37):
+            inputs = [(value >> i) & 1 for i in range(12)]
+            muls.clear()
+            generic_test(lambda: [int(output) % 2 for output in batched_circuit.evaluate_compiled(compiled, inputs)],
+                         (), evaluate_plain(compiled, inputs), f"Batched compiled circuit on inputs {inputs}")
+            self.assertEqual(muls, [3, 2, 1])
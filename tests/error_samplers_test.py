@@ -0,0 +1,79 @@
+import math
+import unittest
+
+import numpy as np
+
+from error_samplers import DiscreteGaussianSampler, CenteredBinomialSampler, UniformTernarySampler, CallableSampler, \
+    as_sampler
+from LWE.lwe_utils import generate_error_matrix
+from tests_utils import generic_test
+
+nb_samples = 200000
+
+
+def chi_square(samples: np.ndarray, support: np.ndarray, probabilities: np.ndarray) -> float:
+    """
+    Computes the chi-square statistic of the samples against the expected probabilities over the support.
+    """
+    observed = np.array([np.count_nonzero(samples == value) for value in support])
+    expected = probabilities * len(samples)
+    return float(np.sum((observed - expected) ** 2 / expected))
+
+
+def chi_square_threshold(degrees_of_freedom: int) -> float:
+    """
+    Loose upper bound of the chi-square statistic, about 6 standard deviations above its mean.
+    """
+    return degrees_of_freedom + 6 * math.sqrt(2 * degrees_of_freedom)
+
+
+class TestErrorSamplers(unittest.TestCase):
+
+    def test_discrete_gaussian_distribution(self):
+        sigma = 3.2
+        sampler = DiscreteGaussianSampler(sigma, seed=1)
+        samples = sampler.sample(nb_samples)
+
+        # Bins with a negligible expected count are left out of the statistic
+        support = np.arange(-12, 13)
+        weights = np.exp(-support.astype(float) ** 2 / (2 * sigma ** 2))
+        probabilities = weights / np.sum(np.exp(-sampler.support.astype(float) ** 2 / (2 * sigma ** 2)))
+
+        self.assertLess(chi_square(samples, support, probabilities), chi_square_threshold(len(support) - 1))
+        self.assertAlmostEqual(float(np.mean(samples)), 0, delta=6 * sigma / math.sqrt(nb_samples))
+        self.assertAlmostEqual(float(np.std(samples)), sigma, delta=0.05 * sigma)
+
+    def test_centered_binomial_distribution(self):
+        eta = 3
+        samples = CenteredBinomialSampler(eta, seed=2).sample(nb_samples)
+
+        support = np.arange(-eta, eta + 1)
+        probabilities = np.array([math.comb(2 * eta, eta + value) for value in support]) / 2 ** (2 * eta)
+
+        self.assertTrue(np.all(np.abs(samples) <= eta))
+        self.assertLess(chi_square(samples, support, probabilities), chi_square_threshold(len(support) - 1))
+
+    def test_uniform_ternary_distribution(self):
+        samples = UniformTernarySampler(seed=3).sample(nb_samples)
+
+        support = np.arange(-1, 2)
+        probabilities = np.full(3, 1 / 3)
+
+        self.assertTrue(np.all(np.abs(samples) <= 1))
+        self.assertLess(chi_square(samples, support, probabilities), chi_square_threshold(len(support) - 1))
+
+    def test_sample_shape(self):
+        for sampler in [DiscreteGaussianSampler(2.0), CenteredBinomialSampler(2), UniformTernarySampler(),
+                        CallableSampler(lambda: 1)]:
+            self.assertEqual(sampler.sample((4, 3, 2)).shape, (4, 3, 2))
+            self.assertIsInstance(sampler(), int)
+
+    def test_seeded_sampler_is_reproducible(self):
+        expected_result = DiscreteGaussianSampler(3.2, seed=42).sample((10, 10))
+        generic_test(DiscreteGaussianSampler(3.2, seed=42).sample, ((10, 10),), expected_result,
+                     "Seeded discrete Gaussian sampler")
+
+    def test_callable_compatibility(self):
+        sampler = as_sampler(lambda: 7)
+        self.assertIsInstance(sampler, CallableSampler)
+        generic_test(generate_error_matrix, (3, 2, lambda: 7), np.full((3, 2), 7), "Error matrix from a callable")
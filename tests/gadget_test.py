@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from gadget import balanced_digits, base_bits, decryption_row, gadget_digits, gadget_powers
+from tests_utils import generic_test
+
+
+class TestGadget(unittest.TestCase):
+
+    def test_base_bits(self):
+        generic_test(lambda: [base_bits(base) for base in (2, 4, 16, 64)], (), [1, 2, 4, 6], "Bits of the bases")
+        for base in (0, 1, 3, 12):
+            self.assertRaises(ValueError, base_bits, base)
+
+    def test_gadget_digits(self):
+        generic_test(lambda: [gadget_digits(4096, base) for base in (2, 4, 16, 64)], (), [12, 6, 3, 2],
+                     "Digits of a 12 bits modulus")
+        generic_test(lambda: [gadget_digits(45, base) for base in (2, 4, 16, 64)], (), [6, 3, 2, 1],
+                     "Digits of a modulus which is not a power of two")
+        generic_test(gadget_powers, (1 << 20, 16), [1, 16, 256, 4096, 65536], "Powers of a base 16 gadget")
+
+    def test_decryption_row(self):
+        generic_test(decryption_row, (11, 2), (11, 1), "Decryption row of a binary gadget")
+        generic_test(decryption_row, (11, 16), (2, 8), "Decryption row of a base 16 gadget")
+        generic_test(decryption_row, (12, 16), (3, 1), "Decryption row of a power of the base")
+
+    def test_balanced_digits_recomposition(self):
+        rng = np.random.default_rng(0)
+        for q in [45, 4096, 786433, 1 << 40]:
+            for base in [4, 16, 64]:
+                values = rng.integers(0, q, size=(7, 9))
+                digits = balanced_digits(values, q, base)
+                powers = np.array(gadget_powers(q, base), dtype=object)
+                self.assertEqual(digits.shape, (7, 9, gadget_digits(q, base)))
+                generic_test(lambda: (digits.astype(object) @ powers) % q, (), values.astype(object),
+                             f"Recomposition of base {base} digits (q: {q})")
+                self.assertTrue(np.all(np.abs(digits[..., :-1]) <= base // 2))
+                self.assertTrue(np.all(np.abs(digits[..., -1]) <= base // 2 + 1))
+
+    def test_balanced_digits_are_centered(self):
+        # q - 1 is -1, a single digit instead of the largest unsigned digits
+        generic_test(lambda: balanced_digits(np.array([4095, 1, 2048]), 4096, 16), (),
+                     np.array([[-1, 0, 0], [1, 0, 0], [0, 0, -8]]), "Signed digits of -1, 1 and -q / 2")
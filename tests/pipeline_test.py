@@ -0,0 +1,79 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from FHEPipeline import StreamStats
+from LWE.LWE_GSW import LWEGSW
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+n = 5
+q = 2 ** 20
+circuit = [["and", "xor", "one"]]
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = LWEGSW()
+        self.pk, self.sk = self.scheme.keygen((q, n, DiscreteGaussianSampler(1.0, seed=5)))
+        self.bits = np.random.randint(0, 2, size=(23, 2)).astype(bool)
+
+    def records(self, scheme, pk, bits):
+        for a, b in bits:
+            yield [scheme.encrypt(pk, a), scheme.encrypt(pk, b), scheme.encrypt(pk, a), scheme.encrypt(pk, b)]
+
+    def check_outputs(self, scheme, sk, outputs, bits):
+        self.assertEqual(len(outputs), len(bits))
+        for (a, b), output in zip(bits, outputs):
+            self.assertEqual([scheme.decrypt(sk, ct) for ct in output], [a and b, a ^ b, True])
+
+    def test_stream(self):
+        stats = StreamStats()
+        outputs = list(self.scheme.evaluate_stream(circuit, self.records(self.scheme, self.pk, self.bits),
+                                                   batch_size=4, window=8, stats=stats))
+        self.check_outputs(self.scheme, self.sk, outputs, self.bits)
+        self.assertEqual(stats.records, 23)
+        self.assertEqual(stats.batches, 6)
+        self.assertEqual(len(stats.latencies), 23)
+        self.assertLessEqual(stats.max_in_flight, 8)
+        self.assertGreater(stats.throughput(), 0)
+        self.assertGreaterEqual(stats.latency_percentile(99), stats.latency_percentile(50))
+
+    def test_several_workers(self):
+        outputs = list(self.scheme.evaluate_stream(circuit, self.records(self.scheme, self.pk, self.bits),
+                                                   batch_size=3, window=12, workers=3))
+        self.check_outputs(self.scheme, self.sk, outputs, self.bits)
+
+    def test_backpressure(self):
+        read = itertools.count()
+        records = (record for record, _ in zip(self.records(self.scheme, self.pk, self.bits), read))
+        stream = self.scheme.evaluate_stream(circuit, records, batch_size=2, window=5)
+        next(stream)
+        # The producer is not read further than the window while the outputs are not consumed
+        self.assertLessEqual(next(read), 5)
+        stream.close()
+
+    def test_ntt_stream(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((find_ntt_prime(2 ** 4, 2 ** 20), 4, DiscreteGaussianSampler(1.0)))
+        outputs = list(scheme.evaluate_stream(circuit, self.records(scheme, pk, self.bits[:7]), batch_size=3))
+        self.check_outputs(scheme, sk, outputs, self.bits[:7])
+
+    def test_constant_operand(self):
+        # The output of a constant gate is a single cyphered text multiplied by the stacks of the micro-batches
+        for scheme, parameters in [(self.scheme, (q, n, DiscreteGaussianSampler(1.0))),
+                                   (NTTRLWEGSW(), (find_ntt_prime(2 ** 4, 2 ** 20), 4, DiscreteGaussianSampler(1.0)))]:
+            pk, sk = scheme.keygen(parameters)
+            records = [[scheme.encrypt(pk, a)] for a, _ in self.bits[:9]]
+            for batch_size in [1, 4]:
+                outputs = list(scheme.evaluate_stream([["one", "not"], ["and"]], records, batch_size=batch_size))
+                self.assertEqual([scheme.decrypt(sk, output[0]) for output in outputs],
+                                 [not a for a, _ in self.bits[:9]])
+
+    def test_invalid_stream(self):
+        self.assertRaises(ValueError, list, self.scheme.evaluate_stream(circuit, [], batch_size=0))
+        records = [[self.scheme.encrypt(self.pk, True)]]
+        self.assertRaises(ValueError, list, self.scheme.evaluate_stream(circuit, records))
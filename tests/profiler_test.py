@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from FHEBinaryCircuit import FHEBinaryCircuit
+from FHEProfiler import FHEProfiler, GATE_CATEGORY, MUL_CATEGORY, PHASE_CATEGORY
+from LWE.LWE_GSW import LWEGSW
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+n = 5
+q = 4096
+binary_circuit = [["and", "xor", "or", "nand"], ["and", "or"]]
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = LWEGSW()
+        self.pk, self.sk = self.scheme.keygen((q, n, DiscreteGaussianSampler(1.0)))
+        self.cts = list(self.scheme.encrypt_many(self.pk, [True, False, True, True, False, True, False, False]))
+
+    def test_disabled_by_default(self):
+        self.scheme.evaluate(binary_circuit, self.cts)
+        self.assertIsNone(self.scheme.profiler)
+        self.assertIsNone(self.scheme.circuit.profiler)
+
+    def test_gates_and_multiplications(self):
+        with self.scheme.profile() as profiler:
+            outputs = self.scheme.evaluate(binary_circuit, self.cts)
+        self.assertIsNone(self.scheme.profiler)
+        self.assertIsNone(self.scheme.circuit.profiler)
+        # Profiling does not change the result
+        for output, expected_output in zip(outputs, self.scheme.evaluate(binary_circuit, self.cts)):
+            self.assertTrue(np.array_equal(output, expected_output))
+
+        summary = profiler.summary()
+        self.assertEqual(summary["and"]["gates"], 2)
+        self.assertEqual(summary["xor"]["muls"], 0)
+        self.assertEqual(summary["nand"]["muls"], 1)
+        self.assertEqual(summary["mul:mul"]["count"], 5)
+        self.assertEqual(summary["phase:bit_decomp"]["count"], 5)
+        self.assertEqual(summary["phase:matmul"]["count"], 5)
+        self.assertEqual({event.args["depth"] for event in profiler.events if event.category == GATE_CATEGORY},
+                         {0, 1})
+        # Multiplications and their phases are recorded within the span of their gate
+        gates = [event for event in profiler.events if event.category == GATE_CATEGORY]
+        for event in profiler.events:
+            if event.category in (MUL_CATEGORY, PHASE_CATEGORY):
+                self.assertTrue(any(gate.start <= event.start and
+                                    event.start + event.duration <= gate.start + gate.duration for gate in gates))
+        self.assertIn("phase:matmul", profiler.format_summary())
+
+    def test_memory_and_workers(self):
+        with self.scheme.profile(FHEProfiler(track_memory=True)) as profiler:
+            self.scheme.evaluate(binary_circuit, self.cts, workers=2)
+        summary = profiler.summary()
+        self.assertGreater(summary["and"]["bytes"], 0)
+        self.assertEqual(sum(entry["gates"] for entry in summary.values()), 6)
+
+    def test_depth_lists(self):
+        circuit = FHEBinaryCircuit[np.ndarray](self.scheme.G, self.scheme._mul)
+        circuit.add_depth(["and", "not"])
+        circuit.profiler = FHEProfiler()
+        circuit.evaluate(self.cts[:3])
+        self.assertEqual([event.name for event in circuit.profiler.events if event.category == GATE_CATEGORY],
+                         ["and", "not"])
+
+    def test_chrome_trace(self):
+        with self.scheme.profile() as profiler:
+            self.scheme.evaluate(binary_circuit, self.cts)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "trace.json")
+        profiler.export_chrome_trace(path)
+        with open(path) as file:
+            trace = json.load(file)
+        self.assertEqual(len(trace["traceEvents"]), len(profiler.events))
+        for event in trace["traceEvents"]:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["dur"], 0)
+            self.assertIn(event["cat"], (GATE_CATEGORY, MUL_CATEGORY, PHASE_CATEGORY))
+
+    def test_ntt_phases(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((find_ntt_prime(2 ** 4, 2 ** 20), 4, DiscreteGaussianSampler(1.0)))
+        with scheme.profile() as profiler:
+            scheme.evaluate([["and"]], [scheme.encrypt(pk, True), scheme.encrypt(pk, True)])
+        self.assertEqual({key for key in profiler.summary() if key.startswith("phase:")},
+                         {"phase:inverse_ntt", "phase:bit_decomp", "phase:forward_ntt", "phase:product"})
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from seeded import SEED_BYTES, SeededArray, cached_expand_uniform, expand_uniform, generate_seed
+
+
+class TestSeeded(unittest.TestCase):
+
+    def test_expansion_is_deterministic(self):
+        seed = generate_seed()
+        self.assertEqual(len(seed), SEED_BYTES)
+        uniform = expand_uniform(seed, (40, 7), 4096)
+        np.testing.assert_array_equal(expand_uniform(seed, (40, 7), 4096), uniform)
+        self.assertFalse(np.array_equal(expand_uniform(generate_seed(), (40, 7), 4096), uniform))
+        self.assertEqual(uniform.dtype, np.int64)
+        self.assertTrue(np.all((uniform >= 0) & (uniform < 4096)))
+
+    def test_expansion_is_uniform(self):
+        q = 1 << 40
+        uniform = expand_uniform(generate_seed(), 100000, q)
+        self.assertTrue(np.all((uniform >= 0) & (uniform < q)))
+        self.assertAlmostEqual(np.mean(uniform) / q, 0.5, delta=0.01)
+        counts = np.bincount(expand_uniform(generate_seed(), 100000, 5), minlength=5)
+        self.assertTrue(np.all(np.abs(counts - 20000) < 1000))
+
+    def test_cached_expansion(self):
+        seed = generate_seed()
+        uniform = cached_expand_uniform(seed, (3, 5), 97)
+        self.assertIs(cached_expand_uniform(seed, (3, 5), 97), uniform)
+        np.testing.assert_array_equal(uniform, expand_uniform(seed, (3, 5), 97))
+        with self.assertRaises(ValueError):
+            uniform += 1
+        self.assertRaises(ValueError, expand_uniform, b"short", (3, 5), 97)
+
+    def test_compress_and_expand(self):
+        q = 4096
+        seed = generate_seed()
+        for shape, axis in [((60, 5), -1), ((2, 32), 0), ((4, 60, 5), 2), ((8, 2, 16), -2)]:
+            stored_shape = list(shape)
+            stored_shape[axis] = 1
+            stored = np.random.randint(0, q, size=stored_shape)
+            uniform_shape = list(shape)
+            uniform_shape[axis] -= 1
+            array = np.concatenate((stored, cached_expand_uniform(seed, tuple(uniform_shape), q)), axis=axis)
+
+            seeded = SeededArray.compress(array, seed, axis, 1, q)
+            self.assertEqual(seeded.shape, shape)
+            np.testing.assert_array_equal(seeded.stored, stored)
+            np.testing.assert_array_equal(seeded.expand(), array)
+            np.testing.assert_array_equal(seeded.expand(cache=True), array)
+            self.assertEqual(seeded.nbytes(), stored.nbytes + SEED_BYTES)
+            self.assertRaises(ValueError, SeededArray.compress, array, generate_seed(), axis, 1, q)
+
+    def test_invalid_stored_shape(self):
+        self.assertRaises(ValueError, SeededArray, generate_seed(), np.zeros((60, 2)), (59, 5), -1, 4096)
+        self.assertRaises(ValueError, SeededArray, generate_seed(), np.zeros((60, 6)), (60, 5), -1, 4096)
+        self.assertRaises(ValueError, SeededArray, generate_seed(), np.zeros(60), (60, 5), -1, 4096)
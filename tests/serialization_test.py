@@ -0,0 +1,156 @@
+import unittest
+
+import numpy as np
+
+from LWE.LWE_GSW import LWEGSW
+from LWE.lwe_ciphertext import LWECiphertext
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+from seeded import SeededArray
+from serialization import CIPHERTEXT_KIND, PUBLIC_KEY_KIND, SECRET_KEY_KIND, coefficient_bits, load_array, \
+    pack_coefficients, read_header, unpack_coefficients
+
+
+class TestSerialization(unittest.TestCase):
+
+    def setUp(self):
+        self.lwe = LWEGSW()
+        self.lwe_pk, self.lwe_sk = self.lwe.keygen((4096, 5, DiscreteGaussianSampler(1.0, seed=1)))
+        self.ntt = NTTRLWEGSW()
+        self.ntt_pk, self.ntt_sk = self.ntt.keygen((find_ntt_prime(2 ** 4, 2 ** 20), 4, DiscreteGaussianSampler(1.0)))
+
+    def test_pack_coefficients(self):
+        for bits in [1, 5, 12, 33, 62]:
+            values = np.random.randint(0, 1 << min(bits, 62), size=37, dtype=np.int64)
+            packed = pack_coefficients(values, bits)
+            self.assertEqual(len(packed), -(-37 * bits // 8))
+            np.testing.assert_array_equal(unpack_coefficients(packed, bits, 37), values)
+
+    def test_coefficient_bits(self):
+        self.assertEqual(coefficient_bits(4096), 12)
+        self.assertEqual(coefficient_bits(4093), 12)
+        self.assertEqual(coefficient_bits(2), 1)
+
+    def test_lwe_round_trip(self):
+        ct = self.lwe.encrypt(self.lwe_pk, True)
+        for packed in [True, False]:
+            loaded = self.lwe.deserialize(self.lwe.serialize(ct, packed=packed))
+            self.assertIsInstance(loaded, LWECiphertext)
+            self.assertTrue(loaded.is_reduced())
+            np.testing.assert_array_equal(loaded, ct)
+            self.assertTrue(self.lwe.decrypt(self.lwe_sk, loaded))
+
+    def test_lwe_unreduced_round_trip(self):
+        # Gates leave coefficients outside [0, q), which are reduced when serialized
+        ct = self.lwe.evaluate([["xor"]], [self.lwe.encrypt(self.lwe_pk, True), self.lwe.encrypt(self.lwe_pk, False)])[0]
+        loaded = self.lwe.deserialize(self.lwe.serialize(ct))
+        np.testing.assert_array_equal(loaded, np.asarray(ct) % self.lwe.q)
+        self.assertTrue(self.lwe.decrypt(self.lwe_sk, loaded))
+
+    def test_lwe_stack_round_trip(self):
+        bits = np.array([True, False, True])
+        cts = self.lwe.encrypt_many(self.lwe_pk, bits)
+        loaded = self.lwe.deserialize(self.lwe.serialize(cts))
+        self.assertEqual(loaded.shape, cts.shape)
+        np.testing.assert_array_equal(self.lwe.decrypt_many(self.lwe_sk, loaded), bits)
+
+    def test_lwe_keys_round_trip(self):
+        pk = self.lwe.deserialize(self.lwe.serialize(self.lwe_pk, PUBLIC_KEY_KIND))
+        sk = self.lwe.deserialize(self.lwe.serialize(self.lwe_sk, SECRET_KEY_KIND))
+        np.testing.assert_array_equal(pk, self.lwe_pk)
+        # The secret key is stored modulo q
+        np.testing.assert_array_equal(sk, self.lwe_sk % self.lwe.q)
+        self.assertTrue(self.lwe.decrypt(sk, self.lwe.encrypt(pk, True)))
+
+    def test_packed_size(self):
+        ct = self.lwe.encrypt(self.lwe_pk, False)
+        packed = self.lwe.serialize(ct)
+        unpacked = self.lwe.serialize(ct, packed=False)
+        header = read_header(packed)
+        self.assertEqual(header.bits, 12)
+        self.assertEqual(len(packed) - header.size, ct.size * 12 // 8)
+        self.assertEqual(len(unpacked) - header.size, ct.size * 8)
+
+    def test_zero_copy_loading(self):
+        data = self.lwe.serialize(self.lwe.encrypt(self.lwe_pk, True), packed=False)
+        header, array = load_array(data)
+        self.assertEqual(header.kind, CIPHERTEXT_KIND)
+        self.assertFalse(header.packed)
+        self.assertTrue(np.shares_memory(array, np.frombuffer(data, dtype=np.uint8)))
+        self.assertFalse(array.flags.writeable)
+        self.assertEqual(array.ctypes.data % 8, 0)
+
+    def test_ntt_round_trip(self):
+        ct = self.ntt.encrypt(self.ntt_pk, True)
+        for packed in [True, False]:
+            loaded = self.ntt.deserialize(self.ntt.serialize(ct, packed=packed))
+            np.testing.assert_array_equal(loaded, ct)
+            self.assertTrue(self.ntt.decrypt(self.ntt_sk, loaded))
+
+        pk = self.ntt.deserialize(self.ntt.serialize(self.ntt_pk, PUBLIC_KEY_KIND))
+        sk = self.ntt.deserialize(self.ntt.serialize(self.ntt_sk, SECRET_KEY_KIND))
+        self.assertFalse(self.ntt.decrypt(sk, self.ntt.encrypt(pk, False)))
+
+    def test_invalid_data(self):
+        data = self.lwe.serialize(self.lwe.encrypt(self.lwe_pk, True))
+        self.assertRaises(ValueError, self.lwe.deserialize, b"XXXX" + data[4:])
+        self.assertRaises(ValueError, self.lwe.deserialize, data[:-1])
+        self.assertRaises(ValueError, self.lwe.deserialize, data[:4])
+        self.assertRaises(ValueError, self.lwe.serialize, self.lwe_pk, 7)
+
+    def test_parameter_mismatch(self):
+        data = self.lwe.serialize(self.lwe.encrypt(self.lwe_pk, True))
+        other = LWEGSW()
+        other.keygen((2048, 5, DiscreteGaussianSampler(1.0)))
+        self.assertRaises(ValueError, other.deserialize, data)
+        self.assertRaises(ValueError, self.ntt.deserialize, data)
+
+    def test_compressed_public_key(self):
+        for scheme, pk, sk in [(self.lwe, self.lwe_pk, self.lwe_sk), (self.ntt, self.ntt_pk, self.ntt_sk)]:
+            compressed = scheme.compress_public_key(pk)
+            data = scheme.serialize(compressed, PUBLIC_KEY_KIND)
+            self.assertLess(len(data), len(scheme.serialize(pk, PUBLIC_KEY_KIND)))
+            self.assertIsNotNone(read_header(data).seed)
+
+            seeded = scheme.deserialize(data, expand=False)
+            self.assertIsInstance(seeded, SeededArray)
+            np.testing.assert_array_equal(scheme.expand(seeded, PUBLIC_KEY_KIND), np.asarray(pk) % scheme.q)
+            np.testing.assert_array_equal(scheme.deserialize(data), np.asarray(pk) % scheme.q)
+            # Encryption expands compressed public keys
+            self.assertTrue(scheme.decrypt(sk, scheme.encrypt(seeded, True)))
+            self.assertFalse(scheme.decrypt(sk, scheme.encrypt(seeded, False)))
+
+    def test_compress_other_public_key(self):
+        other = LWEGSW()
+        other_pk, _ = other.keygen((4096, 5, DiscreteGaussianSampler(1.0)))
+        self.assertRaises(ValueError, self.lwe.compress_public_key, other_pk)
+        self.assertRaises(ValueError, LWEGSW().compress_public_key, self.lwe_pk)
+
+    def test_seeded_ciphertexts_round_trip(self):
+        bits = np.array([True, False, False, True])
+        seeded = self.lwe.encrypt_many_sk(self.lwe_sk, bits, seeded=True)
+        data = self.lwe.serialize(seeded)
+        self.assertLess(len(data), len(self.lwe.serialize(seeded.expand())) / 2)
+        loaded = self.lwe.deserialize(data)
+        self.assertEqual(loaded.shape, seeded.shape)
+        np.testing.assert_array_equal(self.lwe.decrypt_many(self.lwe_sk, loaded), bits)
+
+        for bit in [True, False]:
+            for scheme, sk in [(self.lwe, self.lwe_sk), (self.ntt, self.ntt_sk)]:
+                loaded = scheme.deserialize(scheme.serialize(scheme.encrypt_sk(sk, bit, seeded=True)))
+                self.assertEqual(scheme.decrypt(sk, loaded), bit)
+
+    def test_seeded_modulus_mismatch(self):
+        other = LWEGSW()
+        _, other_sk = other.keygen((2048, 5, DiscreteGaussianSampler(1.0)))
+        self.assertRaises(ValueError, self.lwe.serialize, other.encrypt_sk(other_sk, True, seeded=True))
+
+    def test_version_1_data(self):
+        ct = self.lwe.encrypt(self.lwe_pk, True)
+        data = bytearray(self.lwe.serialize(ct))
+        data[4] = 1
+        self.assertEqual(read_header(data).version, 1)
+        np.testing.assert_array_equal(self.lwe.deserialize(bytes(data)), ct)
+        data[4] = 3
+        self.assertRaises(ValueError, self.lwe.deserialize, bytes(data))
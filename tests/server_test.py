@@ -0,0 +1,133 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from FHEServer import FHEClient, FHEServer, decode_cts, encode_cts
+from LWE.LWE_GSW import LWEGSW
+from RLWE.NTT_RLWE_GSW import NTTRLWEGSW
+from RLWE.ntt_utils import find_ntt_prime
+from error_samplers import DiscreteGaussianSampler
+
+n = 5
+q = 2 ** 20
+circuits = {"and-xor": [["and", "xor"]], "not": [["not"]], "constant-and": [["one", "not"], ["and"]]}
+
+
+class TestFHEServer(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = LWEGSW()
+        self.pk, self.sk = self.scheme.keygen((q, n, DiscreteGaussianSampler(1.0, seed=11)))
+
+    def test_encode_cts(self):
+        cts = [b"", b"abc", bytes(300)]
+        self.assertEqual([bytes(ct) for ct in decode_cts(encode_cts(cts))], cts)
+        self.assertRaises(ValueError, decode_cts, encode_cts(cts)[:-1])
+
+    def test_concurrent_requests_are_batched(self):
+        bits = np.random.randint(0, 2, size=(12, 2)).astype(bool)
+
+        async def run():
+            async with FHEServer(self.scheme, circuits, max_batch_size=8, batch_latency=0.05) as server:
+                await server.start()
+                async with await FHEClient.connect(self.scheme, *server.address) as client:
+                    requests = [client.evaluate("and-xor", [self.scheme.encrypt(self.pk, a),
+                                                            self.scheme.encrypt(self.pk, b),
+                                                            self.scheme.encrypt(self.pk, a),
+                                                            self.scheme.encrypt(self.pk, b)]) for a, b in bits]
+                    return await asyncio.gather(*requests), await client.metrics()
+
+        results, metrics = asyncio.run(run())
+        for (a, b), (and_ct, xor_ct) in zip(bits, results):
+            self.assertEqual(self.scheme.decrypt(self.sk, and_ct), a and b)
+            self.assertEqual(self.scheme.decrypt(self.sk, xor_ct), a ^ b)
+        self.assertEqual(metrics["requests"], 12)
+        self.assertEqual(metrics["errors"], 0)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["max_batch_size"], 8)
+        self.assertLess(metrics["batches"], 12)
+
+    def test_batched_requests_with_constant_operand(self):
+        bits = np.random.randint(0, 2, size=6).astype(bool)
+
+        async def run():
+            async with FHEServer(self.scheme, circuits, max_batch_size=8, batch_latency=0.05) as server:
+                await server.start()
+                async with await FHEClient.connect(self.scheme, *server.address) as client:
+                    requests = [client.evaluate("constant-and", [self.scheme.encrypt(self.pk, bit)]) for bit in bits]
+                    return await asyncio.gather(*requests), await client.metrics()
+
+        # Coalesced requests multiply the single cyphered text of the constant gate by a stack
+        results, metrics = asyncio.run(run())
+        self.assertEqual([self.scheme.decrypt(self.sk, ct) for ct, in results], list(~bits))
+        self.assertEqual(metrics["errors"], 0)
+        self.assertLess(metrics["batches"], 6)
+
+    def test_malformed_request_does_not_fail_its_batch(self):
+        bits = [True, False, True]
+        stack = self.scheme.encrypt_many(self.pk, [True, False])
+
+        async def run():
+            async with FHEServer(self.scheme, circuits, max_batch_size=8, batch_latency=0.05) as server:
+                await server.start()
+                async with await FHEClient.connect(self.scheme, *server.address) as client, \
+                        await FHEClient.connect(self.scheme, *server.address) as other_client:
+                    requests = [client.evaluate("not", [self.scheme.encrypt(self.pk, bit)]) for bit in bits]
+                    # A stack of 2 cyphered texts sent as a single input, in the same batch as the valid requests
+                    malformed = other_client.evaluate("not", [stack])
+                    return await asyncio.gather(*requests, malformed, return_exceptions=True), \
+                        await client.metrics()
+
+        results, metrics = asyncio.run(run())
+        self.assertEqual([self.scheme.decrypt(self.sk, ct) for ct, in results[:3]], [not bit for bit in bits])
+        self.assertIsInstance(results[3], ValueError)
+        self.assertEqual(metrics["errors"], 1)
+
+    def test_failing_batch_is_evaluated_request_by_request(self):
+        server = FHEServer(self.scheme, circuits)
+        self.addCleanup(server._executor.shutdown)
+        true, false = [self.scheme.serialize(self.scheme.encrypt(self.pk, bit)) for bit in [True, False]]
+        stacks = [self.scheme.serialize(self.scheme.encrypt_many(self.pk, [True] * size)) for size in [2, 3]]
+        # Stacks pass the deserialization, but fail the stacking of the batch and the evaluation of their record
+        results = server._evaluate_batch("and-xor", [[true, true, true, false], stacks + [true, true],
+                                                     [false, true, true, true]])
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual([[self.scheme.decrypt(self.sk, self.scheme.deserialize(ct)) for ct in results[i]]
+                          for i in (0, 2)], [[True, True], [False, False]])
+
+    def test_unix_socket_and_errors(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "server.sock")
+
+        async def run():
+            async with FHEServer(self.scheme, circuits, batch_latency=0) as server:
+                await server.start_unix(path)
+                async with await FHEClient.connect_unix(self.scheme, path) as client:
+                    result = await client.evaluate("not", [self.scheme.encrypt(self.pk, False)])
+                    with self.assertRaises(ValueError):
+                        await client.evaluate("missing", [self.scheme.encrypt(self.pk, False)])
+                    with self.assertRaises(ValueError):
+                        await client.evaluate("not", [])
+                    return result, await client.metrics()
+
+        (ct,), metrics = asyncio.run(run())
+        self.assertTrue(self.scheme.decrypt(self.sk, ct))
+        self.assertEqual(metrics["errors"], 2)
+
+    def test_ntt_server(self):
+        scheme = NTTRLWEGSW()
+        pk, sk = scheme.keygen((find_ntt_prime(2 ** 4, 2 ** 20), 4, DiscreteGaussianSampler(1.0)))
+
+        async def run():
+            async with FHEServer(scheme, circuits) as server:
+                await server.start()
+                async with await FHEClient.connect(scheme, *server.address) as client:
+                    return await asyncio.gather(*[client.evaluate("not", [scheme.encrypt(pk, bit)])
+                                                  for bit in [True, False, True]])
+
+        results = asyncio.run(run())
+        self.assertEqual([scheme.decrypt(sk, ct) for ct, in results], [False, True, False])